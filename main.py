@@ -1,3 +1,10 @@
+import os
+import sys
+import time
+import json
+import argparse
+import tempfile
+from contextlib import contextmanager
 import cv2
 import numpy as np
 from module.handTracker import HandTracker
@@ -8,9 +15,31 @@ from module.utils import file_select_dialog
 from module.shape_Recog import ShapeRecognizer
 
 from module.keyboard_input import KeyboardInputManager
-from module.overlay_hud import draw_hud
+from module.overlay_hud import draw_hud, draw_pointer
 
 from module.view_manager import ViewManager
+from module.session_store import SessionStore
+from module.frame_source import open_source
+from module.stroke_interp import StrokeInterpolator
+from module.mask_refine import MaskRefiner
+from module.frame_prep import FramePrep
+from module.frame_pacer import FramePacer
+from module.motion_gate import MotionGate
+from module.highlight_ink import HighlightLayer
+from module.board_sync import BoardSyncServer, run_viewer
+from module.page_overview import PageOverview
+from module.dual_output import DualOutput, open_view_output
+from module import shape_corpus
+from module import microbench
+from module.batch import load_profile, run_inference_pass
+from module.inference_backends import benchmark_backends
+from module.inference_workers import InferenceWorkers, SessionInferencePool
+from module.session_server import FairScheduler, FrameFeeder, HeadlessSession, open_output
+from module.landmark_trace import (
+    TraceWriter, TraceReader,
+    RecordingHandTracker, RecordingUserMaskManager,
+    ReplayHandTracker, ReplayUserMaskManager,
+)
 
 class VirtualBlackboard:
     """
@@ -18,15 +47,24 @@ class VirtualBlackboard:
     [MODIFIED] Based on the "black canvas(0) + color ink(1-255)" model.
     """
 
-    def __init__(self, cap_w, cap_h, background_path=None):
+    def __init__(self, cap_w, cap_h, background_path=None,
+                 hand_tracker=None, user_mask_manager=None, session_store=None, motion_gate=True):
+        """
+        hand_tracker / user_mask_manager / session_store can be injected
+        (e.g. trace replay implementations); the defaults are created otherwise.
+        motion_gate=False runs hand detection on every frame (trace recording/replay need every frame).
+        """
         # Layer resolution (original)
         self.width = cap_w
         self.height = cap_h
         self.background_path = background_path
 
         # Low resolution for AI processing
-        self.PROC_WIDTH = 640
+        # (the mask edges are refined at full resolution, so segmentation can run small)
+        self.PROC_WIDTH = 320
         self.PROC_HEIGHT = int(self.PROC_WIDTH * (self.height / self.width))
+        self.refine_mask = True
+        self.mask_refiner = MaskRefiner()
 
         # [MODIFIED] Canvas with black background (normal)
         self.canvas = np.zeros(
@@ -34,9 +72,10 @@ class VirtualBlackboard:
         )  # Black canvas
 
         # Class initialization
-        self.hand_tracker = HandTracker(draw_thresh=30, erase_thresh=120)
-        self.bg_module = UserMaskManager()  # ★ Load cvzone module
+        self.hand_tracker = hand_tracker or HandTracker(draw_thresh=30, erase_thresh=120)
+        self.bg_module = user_mask_manager or UserMaskManager()  # ★ Load cvzone module
         self.bg_manager = BackgroundManager(self.width, self.height)
+        self.session = session_store or SessionStore()  # Autosave of page canvases
 
         # Add shape recognition module
         self.shape_recognizer = ShapeRecognizer(
@@ -52,37 +91,136 @@ class VirtualBlackboard:
         self.prev_draw_pt = (-1, -1)  # Previous coordinate for drawing lines
         self.drawing_mode = "normal"  # 'normal' or 'shape'
 
+        # Smooth ink mode: hand tracking every `inference_interval` frames,
+        # strokes drawn as a Catmull-Rom spline with an extrapolated tail in between
+        self.smooth_ink = False
+        self.inference_interval = 2
+        self.stroke_interp = StrokeInterpolator()
+        self._frames_since_inference = 0
+
+        # Multi-hand tracking (HandTracker max_hands > 1): one inference, a result per stable hand slot.
+        # Slot 0 draws with the blackboard's own pen and stroke state; the other hands keep theirs in
+        # hand_states (swapped in by _as_hand) and draw with hand_pens (set by KeyboardInputManager)
+        self.max_hands = getattr(self.hand_tracker, "max_hands", 1)
+        self.last_hands = [('none', (-1, -1))] * self.max_hands   # (mode, screen point) per hand slot
+        self.hand_pens = {}         # slot -> (color, thickness, alpha) for slots >= 1
+        self.hand_states = {}
+
+        # Idle gating: while no hand is tracked and nothing moves near the presenter,
+        # hand detection runs at a low rate (MotionGate)
+        self.motion_gate = MotionGate() if motion_gate else None
+        self.shape_corpus = None    # CorpusWriter: finished shape-mode strokes are recorded with a label
+
         # [MODIFIED] Drawing/erasing settings (based on black canvas)
         self.draw_color = (255, 255, 255)  # Ink: white (default)
         self.draw_thickness = 8
         self.erase_color = (0, 0, 0)  # Eraser: black (canvas background color)
         self.erase_thickness = 100
+        # Pen opacity: below 1.0 the pen draws translucent (highlighter) ink, kept per page
+        # in a HighlightLayer next to the opaque canvas and blended under the opaque ink
+        self.draw_alpha = 1.0
 
-        # Per-page canvas management
-        self.page_canvases = {}
+        # Per-page canvas management (each background deck keeps its own canvases)
+        self.page_canvases = self.bg_manager.deck.page_canvases
+        self.page_highlights = self.bg_manager.deck.page_highlights
         self.current_page_index = 0
+        self.session.open(None, self.page_canvases, self.width, self.height, self.page_highlights)
+        # The solid deck is active from the start (no background switch): restore its page 0 here
+        self.canvas = self._load_page_canvas(self.current_page_index)
         self.page_canvases[self.current_page_index] = self.canvas
 
+        # Page thumbnails + overview grid ('o' key)
+        self.overview = PageOverview(self.width, self.height)
+        self._reset_overview()
+
         # For saving layers for PIP
+        self.pip_mode = False  # Set by main() when ViewManager switches to PIP
         self.last_combined_bg = None
         self.last_frame = None
+        self.last_prep = None       # FramePrep of the last frame (shared RGB / downscaled versions)
+        self.last_user_rect = None  # (x, y, w, h) of the user mask, full-resolution coordinates
+
+        # Remote viewers (BoardSyncServer): canvas deltas are published while drawing
+        self.sync = None
+
+        # Main loop FramePacer (set by main()): its timing stats are shown under the HUD
+        self.pacer = None
+
+        # Inference worker processes (InferenceWorkers): when set, the frame is handed to both
+        # models at the start of update(), so hand tracking and segmentation run in parallel
+        self.inference = None
+
+        # Page canvases are in document space (aligned with the background page);
+        # the zoom/pan view transform is applied to background and ink alike
+        self._view_m = None         # Document -> screen affine of this frame (None = identity)
+        self._ink_version = 0       # Bumped on every canvas change (invalidates the warped ink)
+        self._ink_view_key = None
+        self._ink_view = None
 
     def add_back_ground(self, source=None, color=(0, 0, 0)):
-        self.background_path = source
-        self.bg_manager.add_background(source=source, color=color)
+        """
+        Request a background switch. Files are loaded by BackgroundManager in the background;
+        the canvases are swapped in update() when the new background becomes active.
+        """
+        self.bg_manager.add_background(source=source, color=color, preload=self.session.warm)
 
-        # Reset per-page canvases when a new background is loaded
-        self.page_canvases = {}
-        self.current_page_index = 0
-        
-        # [MODIFIED] Create the default canvas as 'black' (np.ones -> np.zeros)
-        self.canvas = np.zeros((self.height, self.width, 3), dtype=np.uint8)
-        self.page_canvases[self.current_page_index] = self.canvas
+    def _on_background_switched(self, deck):
+        """Use the page canvases of the newly active background deck"""
+        self.background_path = deck.source
+        self.page_canvases = deck.page_canvases
+        self.page_highlights = deck.page_highlights
+
+        # Switch to this background's saved session (pages are restored lazily)
+        self.session.open(deck.source, self.page_canvases, self.width, self.height, self.page_highlights)
+
+        self.current_page_index = deck.page_index if deck.mode in ("pdf", "video") else 0
+        if self.current_page_index in self.page_canvases:
+            self.canvas = self.page_canvases[self.current_page_index]
+        else:
+            self.canvas = self._load_page_canvas(self.current_page_index)
+            self.page_canvases[self.current_page_index] = self.canvas
+
+        # Stroke state belongs to the previous board
+        self.reset_stroke()
+
+        if self.sync is not None:
+            self.sync.resync(self.session.snapshot(), self.current_page_index)
+        self._reset_overview()
+
+        # First time this deck is shown: resume on the page that was open last time
+        if not deck.activated:
+            deck.activated = True
+            if deck.mode in ("pdf", "video"):
+                self.bg_manager.go_to_page(self.session.page_index)
+
+    def _reset_overview(self):
+        """Drop the page thumbnails of the previous deck (rebuilt as the overview shows them)"""
+        bg = self.bg_manager
+        self.overview.set_deck(
+            self.background_path, bg.mode, bg.total_pages,
+            self.session.load_page, bg.color, self.session.load_highlight,
+        )
+
+    def toggle_overview(self):
+        # update_canvas() does not run while the grid is open: a stroke in progress ends here
+        self.reset_stroke()
+        self.overview.toggle(self.page_canvases, self.current_page_index, self.page_highlights)
+
+    def reset_stroke(self):
+        """End the strokes in progress of every hand without drawing anything more"""
+        self.prev_draw_pt = (-1, -1)
+        self.stroke_interp.reset()
+        self.shape_recognizer.current_drawing_pts.clear()
+        self.shape_recognizer.prev_mode = "none"
+        self.hand_states.clear()
 
     def update(self, frame, drawing_enabled, user_mask_enabled):
         """
         Main update function called for every frame.
         """
+        deck = self.bg_manager.poll()
+        if deck is not None:
+            self._on_background_switched(deck)
         self._sync_canvas_with_page()
 
         # [MODIFIED] Prevent 't' key error: set default values for gesture_mode, point
@@ -90,41 +228,246 @@ class VirtualBlackboard:
         point = (-1, -1)
         # debug_frame = frame # (if needed)
 
+        # Color conversions / downscaled frames, computed once and shared by all consumers
+        prep = FramePrep(frame)
+        self.last_prep = prep
+
+        # Zoom/pan of the background view (the solid blackboard is never zoomed)
+        bg = self.bg_manager
+        if self.background_path is None or bg.is_identity_view:
+            self._view_m = None
+        else:
+            self._view_m = bg.view_matrix()
+
+        interval = self.inference_interval if self.smooth_ink else 1
+        hand_due = drawing_enabled and self._frames_since_inference + 1 >= interval
+        if drawing_enabled and self.motion_gate is not None:
+            # Checked on every frame (it keeps the previous tiny frame for differencing)
+            gate_open = self.motion_gate.check(prep.pyramid(self.motion_gate.level, "gray"))
+            hand_due = hand_due and gate_open
+        if self.inference is not None:
+            self.inference.submit(prep.rgb(), hand=hand_due, mask=user_mask_enabled, threshold=0.62)
+
         if drawing_enabled:
-            gesture_mode, point, debug_frame = self.hand_tracker.get_gesture(frame)
-            self.update_canvas(gesture_mode, point)
+            if hand_due:
+                if self.max_hands > 1:
+                    hands, debug_frame = self.hand_tracker.get_gestures(frame, rgb=prep.rgb())
+                else:
+                    gesture_mode, point, debug_frame = self.hand_tracker.get_gesture(frame, rgb=prep.rgb())
+                    hands = [(gesture_mode, point)]
+                gesture_mode, point = self._primary(hands)
+                if self.motion_gate is not None:
+                    self.motion_gate.observe(gesture_mode != "none", point)
+                if self.overview.visible:
+                    # Overview grid open: the hand selects pages instead of drawing
+                    page = self.overview.handle_pointer(gesture_mode, point)
+                    if page is not None:
+                        self.bg_manager.go_to_page(page)
+                    gesture_mode = "move"
+                    hands = [("move", pt) for _, pt in hands]
+                else:
+                    # Pointer is in screen coordinates: draw at the document position under it
+                    for slot, (mode, pt) in enumerate(hands):
+                        with self._as_hand(slot):
+                            self.update_canvas(mode, self._to_document(pt))
+                self.last_hands = hands
+                self._frames_since_inference = 0
+            else:
+                # Skipped inference (smooth ink or idle gate): keep the last result,
+                # the stroke tail is extrapolated in render
+                gesture_mode, point = self._primary(self.last_hands)
+                self._frames_since_inference += 1
         else:
-            self.update_canvas('move', (-1, -1))
+            for slot in range(self.max_hands):
+                with self._as_hand(slot):
+                    self.update_canvas('move', (-1, -1))
+            self.last_hands = [('none', (-1, -1))] * self.max_hands
+            if self.motion_gate is not None:
+                self.motion_gate.reset()
 
         # Create user mask
         if user_mask_enabled:
-            frame_small = cv2.resize(frame, (self.PROC_WIDTH, self.PROC_HEIGHT))
-            user_mask_small = self.bg_module.create_layer3_mask(frame_small, threshold=0.62)
-            user_mask = cv2.resize(
-                user_mask_small, (self.width, self.height), interpolation=cv2.INTER_NEAREST
-            )
+            proc_size = (self.PROC_WIDTH, self.PROC_HEIGHT)
+            if self.inference is not None:
+                # The worker downsizes the frame itself: no local downscaled copy is needed
+                user_mask_small = self.bg_module.mask_of_size(proc_size, threshold=0.62)
+            else:
+                user_mask_small = self.bg_module.create_layer3_mask(
+                    prep.get("bgr", proc_size), threshold=0.62, rgb=prep.rgb(proc_size)
+                )
+            if self.refine_mask:
+                # Guided-filter refinement of the boundary band only
+                user_mask = self.mask_refiner.refine(user_mask_small, frame)
+            else:
+                user_mask = cv2.resize(
+                    user_mask_small, (self.width, self.height), interpolation=cv2.INTER_NEAREST
+                )
             if user_mask.ndim == 3:
                 user_mask = cv2.cvtColor(user_mask, cv2.COLOR_BGR2GRAY)
             user_mask = np.ascontiguousarray(user_mask, dtype=np.uint8)
+            self.last_user_rect = self._mask_rect(user_mask_small)
         else:
+            user_mask_small = None
             user_mask = np.zeros((self.height, self.width), dtype=np.uint8)
+            self.last_user_rect = None
+        if self.motion_gate is not None:
+            self.motion_gate.set_presenter_mask(user_mask_small)
 
         # Final rendering
-        output_frame = self.render(frame, self.canvas, user_mask)
+        output_frame = self.render(frame, self.canvas, user_mask,
+                                   self.page_highlights.get(self.current_page_index))
+        self._draw_stroke_tail(output_frame)
+
+        if self.overview.visible:
+            self.overview.refresh(self.page_canvases, self.page_highlights)
+
+        if self.sync is not None:
+            if self._view_m is None:
+                # The ink is not transformed (e.g. the solid board ignores zoom/pan): neither may the viewers
+                self.sync.view(1.0, 0, 0)
+            else:
+                self.sync.view(bg.zoom, bg.offset_x, bg.offset_y)
+            # A new viewer gets every page, including the ones not visited yet: the sync thread
+            # reads them from the session files (only pages changed since the last autosave are copied)
+            self.sync.flush(self.current_page_index, self.session.snapshot)
         
         return output_frame, gesture_mode, point
 
+    @staticmethod
+    def _primary(hands):
+        """First tracked hand: page overview pointer, motion gate"""
+        return next((h for h in hands if h[0] != "none"), hands[0])
+
+    def _hand_state(self, slot):
+        """Stroke state + pen of hand `slot` (>= 1), created on first use"""
+        state = self.hand_states.get(slot)
+        if state is None:
+            state = self.hand_states[slot] = {
+                "prev_draw_pt": (-1, -1),
+                "stroke_interp": StrokeInterpolator(),
+                "shape_recognizer": ShapeRecognizer(history_len=500, min_contour_area=500),
+            }
+        color, thickness, alpha = self.hand_pens.get(slot, (self.draw_color, self.draw_thickness, self.draw_alpha))
+        state.update(draw_color=color, draw_thickness=thickness, draw_alpha=alpha)
+        state["shape_recognizer"].set_draw_color(color)
+        return state
+
+    @contextmanager
+    def _as_hand(self, slot):
+        """Runs the block with the stroke state and pen of hand `slot` (slot 0: the blackboard's own)"""
+        if slot == 0:
+            yield
+            return
+        state = self._hand_state(slot)
+        saved = {k: getattr(self, k) for k in state}
+        for k, v in state.items():
+            setattr(self, k, v)
+        try:
+            yield
+        finally:
+            for k in state:
+                state[k] = getattr(self, k)
+            for k, v in saved.items():
+                setattr(self, k, v)
+
+    def _draw_points(self, pts, color, thickness):
+        """Draw a polyline (or a dot for a single point) into the canvas"""
+        if not pts:
+            return
+        if self._translucent:
+            self._highlight(create=True).polyline(pts, color, self.draw_alpha, thickness)
+            self._ink_changed()
+            if self.sync is not None:
+                self.sync.highlight_polyline(pts, color, self.draw_alpha, thickness)
+            return
+        if len(pts) == 1:
+            cv2.line(self.canvas, pts[0], pts[0], color, thickness)
+        else:
+            cv2.polylines(self.canvas, [np.array(pts, dtype=np.int32)], False, color, thickness)
+        self._ink_changed()
+        if self.sync is not None:
+            self.sync.polyline(pts, color, thickness)
+
+    @property
+    def _translucent(self):
+        """The pen draws highlighter ink (shape mode always corrects opaque strokes)"""
+        return self.draw_alpha < 1.0 and self.drawing_mode != "shape"
+
+    def _highlight(self, create=False):
+        """HighlightLayer of the current page (created on the first translucent stroke)"""
+        layer = self.page_highlights.get(self.current_page_index)
+        if layer is None and create:
+            layer = HighlightLayer(self.width, self.height)
+            self.page_highlights[self.current_page_index] = layer
+        return layer
+
+    def _ink_changed(self):
+        """The current page canvas was modified"""
+        self._ink_version += 1
+        self.session.mark_dirty(self.current_page_index)
+        self.overview.mark_ink(self.current_page_index)
+
+    def _to_document(self, pt):
+        """Screen point -> page canvas point (inverse of the view transform)"""
+        if self._view_m is None:
+            return pt
+        return self.bg_manager.to_document(pt)
+
+    def _doc_thickness(self, thickness):
+        """Pen width in document space, so strokes keep their on-screen width when zoomed"""
+        if self._view_m is None:
+            return thickness
+        return max(int(round(thickness / self._view_m[0, 0])), 1)
+
+    def _ink_for_view(self, canvas):
+        """Ink canvas warped with the view transform, cached until the ink or the view changes"""
+        if self._view_m is None:
+            return canvas
+        key = (id(canvas), self._ink_version, self.bg_manager._view_key)
+        if key != self._ink_view_key:
+            self._ink_view_key = key
+            # Nearest neighbour keeps ink pixels exact (no dark fringes in the ink mask)
+            self._ink_view = cv2.warpAffine(
+                canvas, self._view_m, (self.width, self.height),
+                flags=cv2.INTER_NEAREST, borderMode=cv2.BORDER_CONSTANT, borderValue=0,
+            )
+        return self._ink_view
+
+    def _draw_stroke_tail(self, output_frame):
+        """Uncommitted end of the smooth-ink stroke of every drawing hand, drawn on the output only"""
+        if not self.smooth_ink:
+            return
+        alpha = self._frames_since_inference / max(self.inference_interval, 1)
+        for slot, (mode, _) in enumerate(self.last_hands):
+            if mode != "draw":
+                continue
+            with self._as_hand(slot):
+                tail = self.stroke_interp.tail(alpha)
+                if len(tail) > 1 and not self._translucent:
+                    pts = np.array(tail, dtype=np.float32)
+                    if self._view_m is not None:
+                        pts = cv2.transform(pts[None], self._view_m)[0]
+                    cv2.polylines(
+                        output_frame, [np.rint(pts).astype(np.int32)], False,
+                        self.draw_color, self.draw_thickness,
+                    )
+
     def update_canvas(self, mode, point):
         """
         Updates the drawing canvas (self.canvas) based on hand input.
         (This function already works correctly with the "black canvas" model)
         """
         is_shape_recognized = False
+        pen = self._doc_thickness(self.draw_thickness)
+        eraser = self._doc_thickness(self.erase_thickness)
 
         if self.drawing_mode == "shape":
             if mode == "draw":
                 self.shape_recognizer.add_point(point)
             if self.shape_recognizer.prev_mode == "draw" and mode in ("move", "none", "erase"):
+                stroke_pts = list(self.shape_recognizer.current_drawing_pts)
+                if self.shape_corpus is not None and len(stroke_pts) > 10:
+                    self.shape_corpus.write(stroke_pts, (self.canvas.shape[1], self.canvas.shape[0]))
                 is_shape_recognized = self.shape_recognizer.process_drawing(
                     mode, self.canvas
                 )
@@ -132,19 +475,42 @@ class VirtualBlackboard:
 
         if is_shape_recognized:
             self.prev_draw_pt = (-1, -1)
+            self.stroke_interp.reset()
+            self._ink_changed()
+            if self.sync is not None:
+                # The correction erased the stroke and drew the shape around it: send that region
+                x, y, w, h = cv2.boundingRect(np.array(stroke_pts, dtype=np.int32))
+                pad = 30 + self.shape_recognizer.draw_thickness
+                self.sync.patch(self.canvas, x - pad, y - pad, w + 2 * pad, h + 2 * pad)
             return
-        
-        if mode == "draw":
+
+        # Smooth ink: the stroke ended, commit its last spline segment
+        if mode != "draw" and self.stroke_interp.pts:
+            self._draw_points(self.stroke_interp.finish(), self.draw_color, pen)
+
+        if mode == "draw" and self.smooth_ink:
+            self._draw_points(self.stroke_interp.add_point(point), self.draw_color, pen)
+            self.prev_draw_pt = point
+
+        elif mode == "draw":
             if self.prev_draw_pt == (-1, -1):
                 self.prev_draw_pt = point
-            cv2.line(
-                self.canvas,
-                self.prev_draw_pt,
-                point,
-                self.draw_color,
-                self.draw_thickness,
-            )
+            if self._translucent:
+                self._highlight(create=True).line(self.prev_draw_pt, point, self.draw_color, self.draw_alpha, pen)
+                if self.sync is not None:
+                    self.sync.highlight_line(self.prev_draw_pt, point, self.draw_color, self.draw_alpha, pen)
+            else:
+                cv2.line(
+                    self.canvas,
+                    self.prev_draw_pt,
+                    point,
+                    self.draw_color,
+                    pen,
+                )
+                if self.sync is not None:
+                    self.sync.line(self.prev_draw_pt, point, self.draw_color, pen)
             self.prev_draw_pt = point
+            self._ink_changed()
 
         elif mode == "erase" and self.drawing_mode != "shape":
             if self.prev_draw_pt == (-1, -1):
@@ -154,20 +520,34 @@ class VirtualBlackboard:
                 self.prev_draw_pt,
                 point,
                 self.erase_color,  # Paints with 0 (black)
-                self.erase_thickness,
+                eraser,
             )
+            layer = self._highlight()
+            if layer is not None:
+                layer.erase_line(self.prev_draw_pt, point, eraser)
+            if self.sync is not None:
+                self.sync.line(self.prev_draw_pt, point, self.erase_color, eraser)
+                if layer is not None:
+                    self.sync.highlight_erase(self.prev_draw_pt, point, eraser)
             self.prev_draw_pt = point
+            self._ink_changed()
 
         else:  # 'move' or 'none'
             self.prev_draw_pt = (-1, -1)
 
-    def render(self, frame, canvas, user_mask):
+    def render(self, frame, canvas, user_mask, highlight=None):
             """
             3-Layer composition logic (Modified: Optimized mask creation using cv2.inRange)
             Order: (1.Background -> 2.User) -> 3.Drawing
+            In PIP mode the user layer is skipped: the main screen is the blackboard without user
+            and the camera is shown by ViewManager.
+            highlight: HighlightLayer of the page, blended under the opaque ink (tiles with highlight only)
             """
             user_mask = np.ascontiguousarray(user_mask, dtype=np.uint8)
 
+            # Ink is stored in document space: same view transform as the background
+            canvas = self._ink_for_view(canvas)
+
             # (Layer 1) Get background
             bg_view = (
                 self.bg_manager.get_view()
@@ -175,14 +555,6 @@ class VirtualBlackboard:
                 else self.background
             )
 
-            # (Layer 2) Cut out user
-            user_part = cv2.bitwise_and(frame, frame, mask=user_mask)
-            bg_mask = cv2.bitwise_not(user_mask)
-            final_bg_part = cv2.bitwise_and(bg_view, bg_view, mask=bg_mask)
-
-            # (Layer 1 + Layer 2) Composite
-            bg_with_user = cv2.add(final_bg_part, user_part)
-
             # === [CORE OPTIMIZATION] ===
             # (Layer 3) Composite drawing canvas (based on black canvas)
             
@@ -194,47 +566,122 @@ class VirtualBlackboard:
             mask_ink = cv2.bitwise_not(mask_bg)
             # =======================
 
-            # 3. Black out the area where the ink will be drawn on the (background+user) image.
-            bg_part = cv2.bitwise_and(bg_with_user, bg_with_user, mask=mask_bg)
-            
             # 4. Cut out only the ink part from the canvas.
             ink_part = cv2.bitwise_and(canvas, canvas, mask=mask_ink)
 
+            # For PIP (camera is kept by reference; it is not modified after update)
+            self.last_frame = frame
+
+            if self.pip_mode:
+                # --- [PIP Layer] (Background + ink only, shown as the main screen) ---
+                bg_part_pip = cv2.bitwise_and(bg_view, bg_view, mask=mask_bg)
+                output = cv2.add(bg_part_pip, ink_part)
+                self._blend_highlight(output, highlight, mask_bg)
+                self.last_combined_bg = output
+                return output
+
+            self.last_combined_bg = None
+
+            # (Layer 2) Cut out user
+            user_part = cv2.bitwise_and(frame, frame, mask=user_mask)
+            bg_mask = cv2.bitwise_not(user_mask)
+            final_bg_part = cv2.bitwise_and(bg_view, bg_view, mask=bg_mask)
+
+            # (Layer 1 + Layer 2) Composite
+            bg_with_user = cv2.add(final_bg_part, user_part)
+
+            # 3. Black out the area where the ink will be drawn on the (background+user) image.
+            bg_part = cv2.bitwise_and(bg_with_user, bg_with_user, mask=mask_bg)
+
             # 5. (Punched background) + (ink) = Final composite
             output = cv2.add(bg_part, ink_part)
-
-            # --- [Save PIP Layer] (Logic modified similarly) ---
-            bg_part_pip = cv2.bitwise_and(bg_view, bg_view, mask=mask_bg)
-            ink_part_pip = cv2.bitwise_and(canvas, canvas, mask=mask_ink)
-            self.last_combined_bg = cv2.add(bg_part_pip, ink_part_pip)
-            
-            self.last_frame = frame.copy()
+            self._blend_highlight(output, highlight, mask_bg)
 
             return output
 
+    def _blend_highlight(self, output, highlight, mask_bg):
+        """Translucent ink over the composite, except under opaque ink (mask_bg: 255 = no opaque ink)"""
+        if highlight is None:
+            return
+        index, occ = highlight.for_view(self._view_m, (self.width, self.height), self.bg_manager._view_key)
+        if occ.any():
+            highlight.blend(output, index, occ, keep=mask_bg)
+
+    def _mask_rect(self, mask_small):
+        """Bounding box of the (low resolution) user mask, scaled to layer resolution."""
+        if mask_small.ndim == 3:
+            mask_small = mask_small[:, :, 0]
+        x, y, w, h = cv2.boundingRect(mask_small)
+        if w == 0 or h == 0:
+            return None
+        sx = self.width / mask_small.shape[1]
+        sy = self.height / mask_small.shape[0]
+        return (int(x * sx), int(y * sy), int(w * sx), int(h * sy))
+
     def _sync_canvas_with_page(self):
         # ... (Page index logic remains the same) ...
         page_idx = 0
-        if self.background_path is not None and self.bg_manager.mode == "pdf":
+        if self.background_path is not None and self.bg_manager.mode in ("pdf", "video"):
+            # PDF: page number, video: paused frame (see video_background.video_page_key)
             page_idx = self.bg_manager.page_index
         
         if page_idx != self.current_page_index:
-            # Save the canvas of the previous page
-            self.page_canvases[self.current_page_index] = self.canvas
+            self._leave_page(self.current_page_index)
+            # Page turned (keys, overview grid): the next point must not join the previous page's stroke
+            self.reset_stroke()
 
             # Load or create the canvas for the new page
-            if page_idx in self.page_canvases:
-                self.canvas = self.page_canvases[page_idx]
-            else:
-                # [MODIFIED] Create a new canvas as 'black' (np.ones -> np.zeros)
-                self.canvas = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+            restored = page_idx not in self.page_canvases
+            if restored:
+                self.canvas = self._load_page_canvas(page_idx)
                 self.page_canvases[page_idx] = self.canvas
+            else:
+                self.canvas = self.page_canvases[page_idx]
 
             self.current_page_index = page_idx
+            self.session.set_page_index(page_idx)
+
+            if self.sync is not None:
+                self.sync.page(page_idx)
+                if restored and self.canvas.any():
+                    # Ink restored from the session is not known to the viewers yet
+                    self.sync.patch(self.canvas, 0, 0, self.width, self.height)
+                layer = self._highlight()
+                if restored and layer is not None and layer.any():
+                    self.sync.highlight_page(page_idx, layer)
+
+    def _leave_page(self, page_idx):
+        """
+        Keep the canvas of the page being left only if it has ink. Every paused, stepped or
+        seeked video frame is its own page, so blank canvases would pile up while scrubbing.
+        """
+        layer = self.page_highlights.get(page_idx)
+        if self.canvas.any() or (layer is not None and layer.any()):
+            self.page_canvases[page_idx] = self.canvas
+        else:
+            self.page_canvases.pop(page_idx, None)
+            self.page_highlights.pop(page_idx, None)
+
+    def _load_page_canvas(self, page_idx):
+        """Canvas saved in the session for this page, or a new black canvas"""
+        canvas = self.session.load_page(page_idx)
+        if canvas is None:
+            # [MODIFIED] Create a new canvas as 'black' (np.ones -> np.zeros)
+            canvas = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        bgra = self.session.load_highlight(page_idx)
+        if bgra is not None:
+            self.page_highlights[page_idx] = HighlightLayer.from_bgra(bgra)
+        return canvas
 
     def clear_canvas(self):
         """[MODIFIED] Initialize canvas to black"""
         self.canvas.fill(0) # Fill with 0 instead of 255
+        layer = self._highlight()
+        if layer is not None:
+            layer.clear()
+        self._ink_changed()
+        if self.sync is not None:
+            self.sync.clear()
         print("Canvas cleared.")
 
     def update_shape_recognizer_color(self, color):
@@ -245,27 +692,400 @@ class VirtualBlackboard:
         """Release all resources"""
         self.hand_tracker.close()
         self.bg_module.close()
+        self.session.close()
+        self.overview.close()
+        if self.shape_corpus is not None:
+            self.shape_corpus.close()
+        if self.sync is not None:
+            self.sync.close()
+
+
+def run_trace_benchmark(trace_path, source_spec="synthetic", frames=1000, golden=None,
+                        width=1280, height=720):
+    """
+    Headless rendering benchmark: replays a landmark/mask trace instead of running the models,
+    so update() + compose() can be timed deterministically.
+    golden: PNG path of the final frame; written if missing, compared otherwise.
+    """
+    reader = TraceReader(trace_path)
+    cap = open_source(source_spec, width, height, mirror=True)
+    if not cap.is_opened():
+        print("Error: Could not open frame source.")
+        return False
+
+    # Pre-read a short loop of frames so that decoding is not part of the measurement
+    clip = []
+    while len(clip) < min(frames, 64):
+        ret, frame, _ = cap.read()
+        if not ret:
+            break
+        clip.append(frame)
+    cap.release()
+    if not clip:
+        print("Error: No frames to replay.")
+        return False
+
+    with tempfile.TemporaryDirectory() as session_dir:
+        blackboard = VirtualBlackboard(
+            width, height,
+            hand_tracker=ReplayHandTracker(reader, loop=False),
+            user_mask_manager=ReplayUserMaskManager(reader, loop=False),
+            session_store=SessionStore(root=session_dir),
+            motion_gate=False,
+        )
+        kb = KeyboardInputManager()
+        view = ViewManager()
+
+        t0 = time.perf_counter()
+        for i in range(frames):
+            output_image, _, _ = blackboard.update(clip[i % len(clip)], True, True)
+            display_image = view.compose(output_image, blackboard, kb)
+            reader.next_frame()
+        elapsed = time.perf_counter() - t0
+
+        kb.close()
+        blackboard.close()
+
+    print(f"[BENCH] {frames} frames in {elapsed:.3f}s -> {frames / elapsed:.1f} fps "
+          f"({elapsed / frames * 1000:.2f} ms/frame)")
+
+    if golden is None:
+        return True
+    expected = cv2.imread(golden) if os.path.exists(golden) else None
+    if expected is None:
+        cv2.imwrite(golden, display_image)
+        print(f"[BENCH] Golden image written to {golden}")
+        return True
+    diff = cv2.absdiff(expected, display_image) if expected.shape == display_image.shape else None
+    if diff is None or diff.any():
+        print(f"[BENCH] Golden image MISMATCH ({golden})")
+        return False
+    print("[BENCH] Golden image OK")
+    return True
+
+
+def _microbench_board(width, height, session_dir):
+    """Headless blackboard for the micro-benchmarks (no models: the cases call the render functions directly)."""
+    empty = TraceReader.concat([])
+    return VirtualBlackboard(
+        width, height,
+        hand_tracker=ReplayHandTracker(empty),
+        user_mask_manager=ReplayUserMaskManager(empty),
+        session_store=SessionStore(root=session_dir),
+        motion_gate=False,
+    )
+
+
+def run_microbench(bench_dir="benchmarks", threshold=0.5, update=False,
+                   sizes=((1280, 720), (1920, 1080))):
+    """
+    Micro-benchmarks of render / get_view / draw_hud / compose / shape recognition
+    against stored baselines and golden images (see module/microbench.py).
+    """
+    kb = KeyboardInputManager()
+    ok = True
+    with tempfile.TemporaryDirectory() as session_dir:
+        cases, boards = [], []
+        for width, height in sizes:
+            bb = _microbench_board(width, height, session_dir)
+            boards.append(bb)
+            cases += microbench.hot_path_cases(bb, kb)
+        try:
+            ok = microbench.run_suite(cases, bench_dir, threshold, update)
+        finally:
+            for bb in boards:
+                bb.close()
+            kb.close()
+    return ok
+
+
+def _apply_profile(blackboard, profile, background=None, hud=False):
+    """Apply pen/view/background settings of a profile; returns the (ViewManager, KeyboardInputManager)"""
+    blackboard.PROC_WIDTH = profile["proc_width"]
+    blackboard.PROC_HEIGHT = int(blackboard.PROC_WIDTH * (blackboard.height / blackboard.width))
+    blackboard.draw_color = tuple(profile["pen_color"])
+    blackboard.draw_thickness = profile["thickness"]
+    blackboard.drawing_mode = "shape" if profile["shape_mode"] else "normal"
+    blackboard.smooth_ink = profile["smooth_ink"]
+    blackboard.update_shape_recognizer_color(blackboard.draw_color)
+
+    blackboard.add_back_ground(background, color=tuple(profile["background_color"]))
+    while blackboard.bg_manager.is_loading:
+        time.sleep(0.01)
+
+    view = ViewManager()
+    if profile["view"] == "pip":
+        view.toggle_mode()
+        blackboard.pip_mode = True
+    kb = KeyboardInputManager()
+    kb.hud_on = hud  # Clean output by default
+    kb.pen_color, kb.thickness = blackboard.draw_color, blackboard.draw_thickness
+    return view, kb
+
+
+def run_batch(video_path, output_path, background=None, profile_path=None, workers=None):
+    """
+    Offline lecture rendering:
+      pass 1 - parallel HandTracker/UserMaskManager inference (cached on disk)
+      pass 2 - sequential canvas/render pass replaying the cached results, encoded to output_path
+    """
+    profile = load_profile(profile_path)
+    reader = run_inference_pass(video_path, profile, workers=workers)
+
+    width, height = profile["width"], profile["height"]
+    cap = open_source(video_path, width, height, mirror=profile["mirror"])
+    if not cap.is_opened():
+        print(f"Error: Could not open '{video_path}'.")
+        return False
+
+    with tempfile.TemporaryDirectory() as session_dir:
+        blackboard = VirtualBlackboard(
+            width, height,
+            hand_tracker=ReplayHandTracker(reader, loop=False),
+            user_mask_manager=ReplayUserMaskManager(reader, loop=False),
+            session_store=SessionStore(root=session_dir),
+            motion_gate=False,
+        )
+        view, kb = _apply_profile(blackboard, profile, background)
+        blackboard.inference_interval = 1  # Every frame has a cached result
+
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        writer = cv2.VideoWriter(output_path, fourcc, cap.fps or 30.0, (width, height))
+        t0 = time.perf_counter()
+        frames = 0
+        while True:
+            ret, frame, _ = cap.read()
+            if not ret:
+                break
+            output_image, _, _ = blackboard.update(frame, True, profile["user_mask"])
+            writer.write(view.compose(output_image, blackboard, kb))
+            reader.next_frame()
+            frames += 1
+        elapsed = time.perf_counter() - t0
+
+        writer.release()
+        kb.close()
+        blackboard.close()
+    cap.release()
+
+    print(f"[BATCH] render pass: {frames} frames in {elapsed:.1f}s ({frames / max(elapsed, 1e-9):.1f} fps) -> {output_path}")
+    return True
+
+
+def run_server(config_path, workers=None, duration=None):
+    """
+    Headless multi-session mode: one blackboard per entry of config["sessions"], all scheduled
+    on one shared pool of compositing threads, with the models of every session on one shared
+    pool of inference processes (see module/session_server.py). Each session entry overrides the
+    keys of DEFAULT_PROFILE and adds:
+        name, source (camera index / file / stream URL / "synthetic"), output (file or "mjpeg:PORT",
+        or a list), background, sync (PORT), sync_host (default 127.0.0.1), hud,
+        realtime (pace files to their fps), queue (depth)
+    Top-level keys: workers (threads), inference_processes (default: all cores), duration, report_interval
+    """
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    workers = workers or config.get("workers") or os.cpu_count() or 1
+    scheduler = FairScheduler([], workers)
+    pool = SessionInferencePool(config.get("inference_processes") or os.cpu_count() or 1)
+
+    for i, entry in enumerate(config["sessions"]):
+        profile = load_profile()
+        profile.update(entry)
+        name = entry.get("name", f"session{i}")
+        width, height = profile["width"], profile["height"]
+        spec = str(entry.get("source", "synthetic"))
+        cap = open_source(spec, width, height, mirror=profile["mirror"])
+        if not cap.is_opened():
+            print(f"[SERVER] {name}: could not open '{spec}', skipped")
+            continue
+
+        # Models run in the shared pool; this session's threads only composite
+        proc_w = profile["proc_width"]
+        inference = pool.client(name, (width, height), (proc_w, int(proc_w * height / width)),
+                                profile["hand_backend"], profile["seg_backend"])
+        blackboard = VirtualBlackboard(
+            width, height,
+            hand_tracker=HandTracker(draw_thresh=profile["draw_thresh"], erase_thresh=profile["erase_thresh"],
+                                     backend=inference.hand_backend()),
+            user_mask_manager=inference.mask_manager(),
+            session_store=SessionStore(root=os.path.join("sessions", name)),
+        )
+        blackboard.inference = inference
+        view, kb = _apply_profile(blackboard, profile, entry.get("background"), hud=entry.get("hud", False))
+        if entry.get("sync"):
+            blackboard.sync = BoardSyncServer(width, height, host=entry.get("sync_host", "127.0.0.1"),
+                                              port=entry["sync"])
+
+        outputs = entry.get("output", [])
+        outputs = [outputs] if isinstance(outputs, str) else outputs
+        feeder = FrameFeeder(
+            cap, live=spec.isdigit() or "://" in spec, depth=entry.get("queue", 4),
+            realtime=entry.get("realtime", False), on_frame=scheduler.notify,
+        )
+        scheduler.sessions.append(HeadlessSession(
+            name, blackboard, view, kb, feeder,
+            [open_output(o, cap.fps, (width, height)) for o in outputs],
+            user_mask=profile["user_mask"],
+        ))
+        print(f"[SERVER] {name}: {spec} -> {', '.join(outputs) or '(no output)'}")
+
+    if not scheduler.sessions:
+        print("[SERVER] No sessions")
+        pool.close()
+        return False
+    scheduler.run(duration=duration or config.get("duration"),
+                  report_interval=config.get("report_interval", 5.0))
+    for session in scheduler.sessions:
+        session.close()
+    pool.close()
+    return True
+
+
+def run_backend_benchmark(source_spec="synthetic", frames=100, hand_specs=None, seg_specs=None):
+    """
+    Rank the inference backends by latency on the same frames.
+    Both MediaPipe variants are always included; extra specs (e.g. "onnx:selfie.onnx:2") are added.
+    """
+    CAP_WIDTH, CAP_HEIGHT = 1280, 720
+    cap = open_source(source_spec, CAP_WIDTH, CAP_HEIGHT, mirror=True)
+    if not cap.is_opened():
+        print(f"[BENCH] Could not open source '{source_spec}'")
+        return False
+    samples = []
+    while len(samples) < frames:
+        ret, frame, _ = cap.read()
+        if not ret:
+            break
+        samples.append(frame)
+    cap.release()
+    if not samples:
+        print("[BENCH] No frames")
+        return False
+
+    proc_w = 320  # VirtualBlackboard.PROC_WIDTH
+    proc_h = int(proc_w * (CAP_HEIGHT / CAP_WIDTH))
+    benchmark_backends(
+        samples,
+        list(dict.fromkeys(["mediapipe:0", "mediapipe:1"] + list(hand_specs or []))),
+        list(dict.fromkeys(["mediapipe:0", "mediapipe:1"] + list(seg_specs or []))),
+        seg_size=(proc_w, proc_h),
+    )
+    return True
+
+
+def run_shape_bench(corpus_spec, workers=None, sweep=None, report_path=None):
+    """
+    ShapeRecognizer accuracy/latency on a labeled stroke corpus (file from --record-shapes, or
+    "synthetic[:N]"): confusion matrix, latency percentiles and peak memory for the current thresholds.
+    sweep: grid spec (see shape_corpus.parse_grid, "" = default grid) to grid-search the thresholds.
+    """
+    current = shape_corpus.default_params()
+    evaluator = shape_corpus.CorpusEvaluator(corpus_spec, workers)
+    if evaluator.size == 0:
+        print(f"[SHAPES] No strokes in {corpus_spec}")
+        evaluator.close()
+        return False
+    print(f"[SHAPES] {evaluator.size} strokes from {corpus_spec}, {evaluator.workers} worker(s)")
+    try:
+        t0 = time.perf_counter()
+        result = evaluator.evaluate(current)
+        shape_corpus.print_report(result)
+        report = {"corpus": corpus_spec, "current": result}
+
+        if sweep is not None:
+            params = shape_corpus.sweep_params(shape_corpus.parse_grid(sweep))
+            if current not in params:
+                params.append(current)
+            results = evaluator.evaluate_many(params, memory=False)
+            shape_corpus.print_sweep(results, current)
+            report["sweep"] = results
+        print(f"[SHAPES] done in {time.perf_counter() - t0:.1f}s")
+    finally:
+        evaluator.close()
+
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[SHAPES] Report written to {report_path}")
+    return True
 
 
 # Main function
-def main():
-    # Connect to webcam (high resolution)
+def main(source_spec=0, record_trace=None, replay_trace=None, hand_backend="mediapipe", seg_backend="mediapipe",
+         sync_port=None, inference_processes=False, target_fps=None, motion_gate=True,
+         presenter=None, audience=None, record_shapes=None, shape_label="unknown", hands=1,
+         sync_host="127.0.0.1"):
+    # Connect to webcam (high resolution) or another frame source (video file, image folder, "synthetic")
     CAP_WIDTH, CAP_HEIGHT = 1280, 720
     bg_file_path = None
-    cap = cv2.VideoCapture(0)
+    cap = open_source(source_spec, CAP_WIDTH, CAP_HEIGHT, mirror=True)
 
-    if not cap.isOpened():
+    if not cap.is_opened():
         print("Error: Could not open camera.")
         return
 
-    cap.set(3, CAP_WIDTH)
-    cap.set(4, CAP_HEIGHT)
+    # Optional landmark/mask trace: record model outputs, or replay them instead of running the models
+    trace_writer = None
+    trace_reader = None
+    if replay_trace:
+        trace_reader = TraceReader(replay_trace)
+        blackboard = VirtualBlackboard(
+            CAP_WIDTH, CAP_HEIGHT,
+            hand_tracker=ReplayHandTracker(trace_reader),
+            user_mask_manager=ReplayUserMaskManager(trace_reader),
+            motion_gate=False,
+        )
+    elif record_trace:
+        trace_writer = TraceWriter(record_trace)
+        blackboard = VirtualBlackboard(
+            CAP_WIDTH, CAP_HEIGHT,
+            hand_tracker=RecordingHandTracker(
+                HandTracker(draw_thresh=30, erase_thresh=120, backend=hand_backend), trace_writer),
+            user_mask_manager=RecordingUserMaskManager(UserMaskManager(backend=seg_backend), trace_writer),
+            motion_gate=False,
+        )
+    elif inference_processes:
+        # Models in supervised worker processes, frames/results through shared memory
+        workers = InferenceWorkers(
+            CAP_WIDTH, CAP_HEIGHT, (320, int(320 * CAP_HEIGHT / CAP_WIDTH)),
+            hand_backend=hand_backend, seg_backend=seg_backend, max_hands=hands,
+        )
+        blackboard = VirtualBlackboard(
+            CAP_WIDTH, CAP_HEIGHT,
+            hand_tracker=HandTracker(draw_thresh=30, erase_thresh=120, backend=workers.hand_backend(),
+                                     max_hands=hands),
+            user_mask_manager=workers.mask_manager(),
+            motion_gate=motion_gate,
+        )
+        blackboard.inference = workers
+    else:
+        # Create main blackboard object
+        blackboard = VirtualBlackboard(
+            CAP_WIDTH, CAP_HEIGHT,
+            hand_tracker=HandTracker(draw_thresh=30, erase_thresh=120, backend=hand_backend, max_hands=hands),
+            user_mask_manager=UserMaskManager(backend=seg_backend),
+            motion_gate=motion_gate,
+        )
+
+    # Labeled stroke corpus for the shape benchmark: every finished shape-mode stroke is recorded
+    if record_shapes:
+        blackboard.shape_corpus = shape_corpus.CorpusWriter(record_shapes, shape_label)
+        blackboard.drawing_mode = "shape"
+        print(f"[SHAPES] Recording '{shape_label}' strokes to {record_shapes} (shape mode on)")
 
-    # Create main blackboard object
-    blackboard = VirtualBlackboard(CAP_WIDTH, CAP_HEIGHT)
+    # Resume the last session (background + ink) if its file is unchanged
+    found, last_source = blackboard.session.last_source()
+    if found:
+        bg_file_path = last_source
+        print(f"[SESSION] Resuming {last_source or 'solid blackboard'}")
 
     blackboard.add_back_ground(bg_file_path)
 
+    # Publish ink deltas to remote viewers (python main.py --view-sync HOST:PORT)
+    if sync_port:
+        blackboard.sync = BoardSyncServer(CAP_WIDTH, CAP_HEIGHT, host=sync_host, port=sync_port)
+
     # Keyboard manager
     kb = KeyboardInputManager()
 
@@ -278,43 +1098,56 @@ def main():
     # cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
     cv2.setMouseCallback(window_name, blackboard.bg_manager.on_mouse)
 
+    # Separate presenter (HUD + pointer) and audience (clean) outputs from one composite
+    outputs = None
+    if presenter or audience:
+        fps = cap.fps or 30.0
+        size = (CAP_WIDTH, CAP_HEIGHT)
+        outputs = DualOutput(
+            [open_view_output(s, fps, size, window_name) for s in presenter or ["window"]],
+            [open_view_output(s, fps, size, "Virtual Blackboard - Audience") for s in audience or []],
+        )
+
+    # Work is aligned to the capture rate (or --fps); the loop idles in waitKeyEx in between
+    pacer = FramePacer(cap, target_fps=target_fps)
+    blackboard.pacer = pacer
+
     while True:
-        ret, frame = cap.read()
+        # Frame is already flipped horizontally and sized to the blackboard resolution
+        # (fresh is False while no new frame is due: nothing is re-processed, only keys are handled)
+        ret, frame, frame_ts, fresh = pacer.read()
         if not ret:
             print("Could not read frame. (Stream end?)")
             break
 
-        # Flip horizontally
-        frame = cv2.flip(frame, 1)
-
-        # Force frame to match blackboard resolution (to prevent size mismatch)
-        frame = cv2.resize(frame, (blackboard.width, blackboard.height))
-
         # Get current toggle states from the keyboard manager (kb)
         draw_flag = kb.drawing_enabled
         mask_flag = kb.user_mask_enabled
 
-        # Call the main update function (Virtual Blackboard 3-Layer composite)
-        # Pass the read flags to the update function
-        output_image, gesture_mode, point = blackboard.update(frame, draw_flag, mask_flag)
-        # HUD + View mode
-        display_image = view.compose(output_image, blackboard, kb)
-
-        if draw_flag:
-            # Finger pointer (debugging)
-            debug_color = (255, 0, 255) # Draw (Magenta)
-            if(gesture_mode == "erase"):
-                debug_color = (255, 255, 0) # Erase (Cyan)
-            elif(gesture_mode == "move"):
-                debug_color = (0, 255, 255) # Move (Yellow)
-            cv2.circle(display_image, point, 12, debug_color, cv2.FILLED)
-
-        # Display output
-        cv2.imshow(window_name, display_image)
+        if fresh:
+            # Call the main update function (Virtual Blackboard 3-Layer composite)
+            # Pass the read flags to the update function
+            output_image, gesture_mode, point = blackboard.update(frame, draw_flag, mask_flag)
+            if outputs is None:
+                # HUD + View mode
+                display_image = view.compose(output_image, blackboard, kb)
+
+                if draw_flag:
+                    # Finger pointer of every tracked hand (debugging)
+                    for mode, pt in blackboard.last_hands:
+                        draw_pointer(display_image, mode, pt)
+
+                # Display output
+                cv2.imshow(window_name, display_image)
+            else:
+                # View mode only; HUD + pointer go to the presenter outputs (snapshots/recording stay clean)
+                display_image = view.scene(output_image, blackboard)
+                outputs.publish(display_image, lambda img, roi, scale: view.draw_presenter(
+                    img, blackboard, kb, blackboard.last_hands, roi, scale))
 
         # Keyboard events (special key code constants)
         LEFT, UP, RIGHT, DOWN = 2424832, 2490368, 2555904, 2621440
-        key = cv2.waitKeyEx(1)
+        key = pacer.wait_key()
 
         # Pass to keyboard manager first (additional features: color/thickness/record/snapshot/help)
         #  - Snapshot (P) saves the final screen including the HUD
@@ -327,7 +1160,18 @@ def main():
         blackboard.update_shape_recognizer_color(blackboard.draw_color)
 
         # ===== Keep existing shortcut logic =====
-        if key == ord("q"):
+        # Page overview grid ('o'): while it is open, arrows/a/d/Enter navigate the grid
+        consumed, jump = (False, None)
+        if blackboard.overview.visible:
+            consumed, jump = blackboard.overview.handle_key(key, LEFT, UP, RIGHT, DOWN)
+            if jump is not None:
+                blackboard.bg_manager.go_to_page(jump)
+
+        if consumed:
+            pass
+        elif key == ord("o"):
+            blackboard.toggle_overview()
+        elif key == ord("q"):
             break
         elif key == ord("c"):
             blackboard.clear_canvas()
@@ -359,26 +1203,150 @@ def main():
                 print("Normal Mode ON")
 
             # Clear buffer and previous point to prevent correction of the last stroke upon mode switch
-            blackboard.shape_recognizer.current_drawing_pts.clear()
-            blackboard.prev_draw_pt = (-1, -1)
-            blackboard.shape_recognizer.prev_mode = "none"
+            blackboard.reset_stroke()
+
+        # Smooth ink: half-rate hand tracking + spline strokes (i key)
+        elif key == ord("i"):
+            blackboard.smooth_ink = not blackboard.smooth_ink
+            blackboard.stroke_interp.reset()
+            kb.last_msg = "Smooth Ink ON" if blackboard.smooth_ink else "Smooth Ink OFF"
+            print(kb.last_msg)
 
         # Toggle view mode (z key)
         elif key == ord("z"):
             view.toggle_mode()
+            blackboard.pip_mode = view.view_mode == "pip"
 
         elif key == ord("x"):  # 'x' to turn off PDF
             blackboard.add_back_ground(None, color=(0, 0, 0))
             print("[BG] Reverted to solid color blackboard mode")
 
-        # If recording, record the current frame (save after render -> HUD)
-        kb.after_render(display_image)
+        if fresh:
+            # If recording, record the current frame (save after render -> HUD)
+            kb.after_render(display_image)
+
+            if trace_writer is not None:
+                trace_writer.next_frame()
+            if trace_reader is not None:
+                trace_reader.next_frame()
 
     # Release resources
+    pacer.close()
+    gate = blackboard.motion_gate
+    if gate is not None:
+        print(f"[GATE] {gate.detections}/{gate.frames} frames ran hand detection")
+    if outputs is not None:
+        outputs.close()
+    kb.close()
     blackboard.close()
+    if trace_writer is not None:
+        trace_writer.close()
     cap.release()
     cv2.destroyAllWindows()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Virtual Blackboard")
+    parser.add_argument("source", nargs="?", default="0",
+                        help='camera index, video file, image folder/glob, or "synthetic"')
+    parser.add_argument("--record-trace", metavar="PATH",
+                        help="record hand landmarks and user masks to a trace file")
+    parser.add_argument("--replay-trace", metavar="PATH",
+                        help="replay a trace instead of running the models")
+    parser.add_argument("--bench", type=int, metavar="FRAMES",
+                        help="headless rendering benchmark over FRAMES frames (requires --replay-trace)")
+    parser.add_argument("--golden", metavar="PNG",
+                        help="with --bench: write or compare the final frame")
+    parser.add_argument("--batch", metavar="OUTPUT",
+                        help="offline mode: render the input video (source) to OUTPUT")
+    parser.add_argument("--background", metavar="FILE",
+                        help="with --batch: background image/PDF")
+    parser.add_argument("--profile", metavar="JSON",
+                        help="with --batch: settings profile (pen, view, inference options)")
+    parser.add_argument("--workers", type=int,
+                        help="with --batch: inference processes; with --serve: pool threads (default: all cores)")
+    parser.add_argument("--serve", metavar="JSON",
+                        help="headless multi-session server (one blackboard per configured stream)")
+    parser.add_argument("--serve-seconds", type=float, metavar="SEC",
+                        help="with --serve: stop after SEC seconds (default: until all sources end)")
+    parser.add_argument("--hand-backend", default="mediapipe", metavar="SPEC",
+                        help='hand landmarks: "mediapipe[:0|1]", "onnx:MODEL[:threads]", "opencv:MODEL[:threads]"')
+    parser.add_argument("--seg-backend", default="mediapipe", metavar="SPEC",
+                        help='segmentation: "mediapipe[:0|1]" (general/landscape), "onnx:MODEL[:threads]", "opencv:MODEL[:threads]"')
+    parser.add_argument("--fps", type=float, metavar="N",
+                        help="target frame rate of the main loop (default: camera rate / file fps)")
+    parser.add_argument("--inference-processes", action="store_true",
+                        help="run hand tracking and segmentation in supervised worker processes")
+    parser.add_argument("--presenter", action="append", metavar="SPEC",
+                        help="presenter output with HUD (window[:NAME], mjpeg:PORT or video file, "
+                             "optional @WxH); repeatable, default: the main window")
+    parser.add_argument("--audience", action="append", metavar="SPEC",
+                        help="clean audience output without HUD (same specs as --presenter); repeatable")
+    parser.add_argument("--hands", type=int, default=1, choices=(1, 2),
+                        help="hands tracked by one hand inference, each with its own pen (default 1; "
+                             "record/replay/batch modes track one hand)")
+    parser.add_argument("--record-shapes", metavar="CORPUS",
+                        help="append every finished shape-mode stroke to a labeled stroke corpus file")
+    parser.add_argument("--shape-label", default="unknown", choices=shape_corpus.LABELS,
+                        help="with --record-shapes: label of the recorded strokes (default: unknown = no shape)")
+    parser.add_argument("--shape-bench", metavar="CORPUS",
+                        help="ShapeRecognizer accuracy/latency on a stroke corpus file or synthetic[:N] "
+                             "(confusion matrix, latency percentiles, peak memory; --workers processes)")
+    parser.add_argument("--shape-sweep", nargs="?", const="", metavar="GRID",
+                        help="with --shape-bench: grid-search the thresholds, e.g. "
+                             "'approx_epsilon=0.03,0.04;min_contour_area=250,500' (default grid if omitted)")
+    parser.add_argument("--shape-report", metavar="JSON",
+                        help="with --shape-bench: write all results to a JSON file")
+    parser.add_argument("--no-motion-gate", action="store_true",
+                        help="run hand detection on every frame, also while the scene is idle")
+    parser.add_argument("--sync", type=int, metavar="PORT",
+                        help="publish the ink as a stroke-delta stream for remote viewers on PORT")
+    parser.add_argument("--sync-host", default="127.0.0.1", metavar="HOST",
+                        help="with --sync: address to listen on (default: localhost only; "
+                             "0.0.0.0 accepts viewers from other machines)")
+    parser.add_argument("--view-sync", metavar="HOST:PORT",
+                        help="reference viewer: show the board published with --sync")
+    parser.add_argument("--microbench", action="store_true",
+                        help="hot-path micro-benchmarks against stored baselines and golden images")
+    parser.add_argument("--bench-dir", default="benchmarks", metavar="DIR",
+                        help="with --microbench: baseline.json and golden/ location")
+    parser.add_argument("--bench-threshold", type=float, default=0.5, metavar="RATIO",
+                        help="with --microbench: allowed median slowdown/extra memory (default 0.5 = 50%%)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="with --microbench: rewrite baselines and golden images")
+    parser.add_argument("--bench-backends", type=int, metavar="FRAMES",
+                        help="rank inference backends by latency on FRAMES frames of source "
+                             "(--hand-backend/--seg-backend: extra comma-separated specs)")
+    args = parser.parse_args()
+
+    if args.view_sync:
+        run_viewer(args.view_sync)
+        sys.exit(0)
+    if args.microbench:
+        ok = run_microbench(args.bench_dir, args.bench_threshold, args.update_baseline)
+        sys.exit(0 if ok else 1)
+    if args.serve:
+        ok = run_server(args.serve, args.workers, args.serve_seconds)
+        sys.exit(0 if ok else 1)
+    if args.batch:
+        ok = run_batch(args.source, args.batch, args.background, args.profile, args.workers)
+        sys.exit(0 if ok else 1)
+    if args.shape_bench:
+        ok = run_shape_bench(args.shape_bench, args.workers, args.shape_sweep, args.shape_report)
+        sys.exit(0 if ok else 1)
+    if args.bench_backends:
+        extra = lambda spec: [s for s in spec.split(",") if s and s != "mediapipe"]
+        ok = run_backend_benchmark(args.source, args.bench_backends,
+                                   extra(args.hand_backend), extra(args.seg_backend))
+        sys.exit(0 if ok else 1)
+    if args.bench:
+        if not args.replay_trace:
+            parser.error("--bench requires --replay-trace")
+        ok = run_trace_benchmark(args.replay_trace, args.source, args.bench, args.golden)
+        sys.exit(0 if ok else 1)
+    main(args.source, record_trace=args.record_trace, replay_trace=args.replay_trace,
+         hand_backend=args.hand_backend, seg_backend=args.seg_backend, sync_port=args.sync,
+         inference_processes=args.inference_processes, target_fps=args.fps,
+         motion_gate=not args.no_motion_gate, presenter=args.presenter, audience=args.audience,
+         record_shapes=args.record_shapes, shape_label=args.shape_label, hands=args.hands,
+         sync_host=args.sync_host)
     # TEST
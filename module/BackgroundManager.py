@@ -1,16 +1,65 @@
 import os
+import queue
+import threading
+from collections import OrderedDict
+
 import cv2
 import numpy as np
 import fitz  # PyMuPDF (for PDF)
 
+from .video_background import VideoPlayer, VIDEO_EXTS
+
+
+class _Deck:
+    """One opened background (solid / image / pdf / video) with its own view state and page canvases."""
+
+    # View state saved/restored when switching decks
+    STATE = ("mode", "doc", "video", "page_index", "background", "possible_prev_page",
+             "zoom", "offset_x", "offset_y")
+
+    def __init__(self, key, source, mode, background, doc=None, video=None):
+        self.key = key
+        self.source = source
+        self.mode = mode
+        self.doc = doc
+        self.video = video
+        self.page_index = 0
+        self.background = background
+        self.possible_prev_page = background
+        self.zoom = 1.0
+        self.offset_x = 0
+        self.offset_y = 0
+        self.page_canvases = {}
+        self.page_highlights = {}   # page -> HighlightLayer (pages with translucent ink only)
+        self.activated = False  # True after the first switch to this deck
+
+    def close(self):
+        if self.doc is not None:
+            self.doc.close()
+            self.doc = None
+        if self.video is not None:
+            self.video.close()
+            self.video = None
+
+
+def view_matrix(width, height, zoom, offset_x, offset_y):
+    """Document -> screen affine (2x3) of a zoom/pan view (scaled page centered, then panned)."""
+    sw, sh = int(round(width * zoom)), int(round(height * zoom))
+    tx = width // 2 - sw // 2 + offset_x
+    ty = height // 2 - sh // 2 + offset_y
+    return np.float32([[zoom, 0, tx], [0, zoom, ty]])
+
+
 class BackgroundManager:
-    def __init__(self, width, height, dpi=150):
+    SOLID_KEY = "solid"
+
+    def __init__(self, width, height, dpi=150, cache_size=4):
         self.width = width
         self.height = height
         self.dpi = dpi
 
         # State variables
-        self.mode = "solid"     # solid / image / pdf
+        self.mode = "solid"     # solid / image / pdf / video
         self.background = np.zeros((height, width, 3), np.uint8)
         self.color = (0, 0, 0)
 
@@ -18,6 +67,9 @@ class BackgroundManager:
         self.doc = None
         self.page_index = 0
 
+        # Video specific (VideoPlayer); page_index is the ink page of the paused frame
+        self.video = None
+
         # Interaction
         self.zoom = 1.0
         self.offset_x = 0
@@ -26,82 +78,214 @@ class BackgroundManager:
         self.drag_start = (0, 0)
         self.possible_prev_page = None
 
+        # View transform cache (rebuilt only when zoom/pan or the background changes)
+        self._view_key = None
+        self._view_m = None
+        self._view_inv = None
+        self._view_src = None
+        self._view_img = None
+
         # Error message to display on HUD, etc.
         self.last_error = ""
+        self.status = ""        # Loading message to display on HUD
+
+        # Opened decks (LRU): key = (abs path, mtime). The solid deck is never evicted.
+        self.cache_size = cache_size
+        self.decks = OrderedDict()
+        self.deck = _Deck(self.SOLID_KEY, None, "solid", self.background)
+        self.deck.activated = True
+        self.decks[self.SOLID_KEY] = self.deck
+        self._switched = False
+
+        # Background loader (files are opened/decoded off the render thread)
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._latest_request = None
+        self._loader = threading.Thread(target=self._load_worker, name="BackgroundLoader", daemon=True)
+        self._loader.start()
 
     # =======================================================
     #  Background Loading
     # =======================================================
-    def add_background(self, source=None, color=(0, 0, 0)):
+    def add_background(self, source=None, color=(0, 0, 0), preload=None):
+        """
+        Switch to a solid color (source=None) or to an image/PDF/video file.
+        Cached decks switch immediately; others are loaded on the worker thread
+        and switched to by poll() when ready (the current board stays live meanwhile).
+        preload(source) is an optional extra job run on the worker after loading.
+        """
         # Clear previous error
         self.last_error = ""
         self.color = color
 
         if source is None:
-            self.mode = "solid"
-            self.background[:] = color
-            self.color = color
-        
-             # Reset PDF related states
-            self.doc = None
-            self.page_index = 0
+            solid = self.decks[self.SOLID_KEY]
+            solid.background[:] = color
+            self._latest_request = None
+            self.status = ""
+            self._activate(solid)
 
-            print(f"[BG] Solid color({color}) set and page info reset")
+            print(f"[BG] Solid color({color}) set")
             return
 
         ext = os.path.splitext(source)[1].lower()
-        if ext in [".jpg", ".jpeg", ".png"]:
-            self.mode = "image"
-            img = cv2.imread(source)
-            if img is not None:
-                self.background = cv2.resize(img, (self.width, self.height))
-                self.background = cv2.cvtColor(self.background, cv2.COLOR_RGB2BGR)
-                print(f"[BG] Image '{source}' loaded successfully")
-            else:
-                msg = f"[BG] Failed to load image '{source}'"
-                print(msg)
-                self.mode = "solid"
-                self.background[:] = color
-                self.last_error = msg
+        if ext not in (".jpg", ".jpeg", ".png", ".pdf") + VIDEO_EXTS:
+            msg = f"[BG] Unsupported file format: {ext}"
+            print(msg)
+            self.last_error = msg
+            return
+
+        try:
+            key = (os.path.abspath(source), os.path.getmtime(source))
+        except OSError as e:
+            msg = f"[BG] Failed to load '{source}': {e}"
+            print(msg)
+            self.last_error = msg
+            return
+
+        if key in self.decks:
+            # Nothing to wait for (also drops a load still running for an earlier request)
+            self._latest_request = None
+            self.status = ""
+            self._activate(self.decks[key])
+            print(f"[BG] '{source}' restored from cache")
+            return
+
+        self._latest_request = key
+        self.status = f"Loading {os.path.basename(source)}..."
+        self._requests.put((key, source, ext, preload))
 
-        elif ext == ".pdf":
-            self.mode = "pdf"
+    @property
+    def is_loading(self):
+        """True while the requested file is still being loaded (a finished load is applied by poll())"""
+        return self._latest_request is not None and self._results.empty()
+
+    def poll(self):
+        """
+        Called once per frame from the render thread.
+        Applies finished loads and returns the newly active deck if the background switched, else None.
+        """
+        while True:
             try:
-                self.doc = fitz.open(source)
-                self.page_index = 0
-                print(f"[BG] PDF '{source}' loaded ({len(self.doc)} pages)")
-                self.background = self._render_pdf_page(self.page_index)
+                key, deck, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if error:
+                if key == self._latest_request:
+                    self._latest_request = None
+                    self.status = ""
+                    self.last_error = error
+                continue
+
+            self._remember(deck)
+            if key == self._latest_request:
+                self._latest_request = None
+                self.status = ""
+                self._activate(deck)
+
+        # Video background: next decoded frame (never waits for the decoder)
+        if self.video is not None:
+            frame = self.video.update()
+            if frame is not None:
+                self.background = frame
+            self.page_index = self.video.page_key
+
+        if self._switched:
+            self._switched = False
+            return self.deck
+        return None
+
+    def _load_worker(self):
+        while True:
+            key, source, ext, preload = self._requests.get()
+            try:
+                deck = self._open_deck(key, source, ext)
+                if preload is not None:
+                    preload(source)
+                self._results.put((key, deck, ""))
             except Exception as e:
-                msg = f"[BG] Failed to load PDF '{source}': {e}"
+                msg = f"[BG] Failed to load '{source}': {e}"
                 print(msg)
-                self.doc = None
-                self.mode = "solid"
-                self.background[:] = color
-                self.last_error = msg
-        else:
-            msg = f"[BG] Unsupported file format: {ext}"
-            print(msg)
-            self.last_error = msg
+                self._results.put((key, None, msg))
+
+    def _open_deck(self, key, source, ext):
+        if ext in VIDEO_EXTS:
+            video = VideoPlayer(source, self.width, self.height)
+            print(f"[BG] Video '{source}' loaded ({video.frame_count} frames @ {video.fps:.1f}fps)")
+            return _Deck(key, source, "video", video.frame, video=video)
+
+        if ext == ".pdf":
+            doc = fitz.open(source)
+            print(f"[BG] PDF '{source}' loaded ({len(doc)} pages)")
+            background = self._render_pdf_page(0, doc)
+            if background is None:
+                raise ValueError("PDF has no pages")
+            return _Deck(key, source, "pdf", background, doc)
+
+        img = cv2.imread(source)
+        if img is None:
+            raise ValueError("could not decode image")
+        background = cv2.resize(img, (self.width, self.height))
+        background = cv2.cvtColor(background, cv2.COLOR_RGB2BGR)
+        print(f"[BG] Image '{source}' loaded successfully")
+        return _Deck(key, source, "image", background)
+
+    def _remember(self, deck):
+        """Add a deck to the LRU cache, evicting the least recently used file deck."""
+        self.decks[deck.key] = deck
+        self.decks.move_to_end(deck.key)
+        file_keys = [k for k in self.decks if k != self.SOLID_KEY]
+        while len(file_keys) > self.cache_size:
+            old_key = file_keys.pop(0)
+            if old_key == self.deck.key:
+                continue
+            self.decks.pop(old_key).close()
+            print(f"[BG] '{old_key[0]}' evicted from cache")
+
+    def _activate(self, deck):
+        """Save the current view state into its deck and restore the state of `deck`."""
+        if deck is self.deck:
+            return
+        if self.video is not None:
+            self.video.pause()  # A video in the background does not keep playing
+        for name in _Deck.STATE:
+            setattr(self.deck, name, getattr(self, name))
+        for name in _Deck.STATE:
+            setattr(self, name, getattr(deck, name))
+        self.deck = deck
+        self.dragging = False
+        self._remember(deck)
+        self._switched = True
 
     # =======================================================
     #  PDF Rendering
     # =======================================================
-    def _render_pdf_page(self, index):
+    def _render_pdf_page(self, index, doc=None):
+        """Render a page of the current document (or of `doc`, used by the loader thread)."""
+        if doc is not None:
+            return self._rasterize_page(doc, index)
         if not self.doc:
             return self.background
+        page = self._rasterize_page(self.doc, index)
+        if page is None:
+            return self.possible_prev_page
+        self.possible_prev_page = page
+        return self.possible_prev_page
+
+    def _rasterize_page(self, doc, index):
         try:
-            page = self.doc.load_page(index)
+            page = doc.load_page(index)
         except:
             print(F"INDEX{index} PAGE IS NOT EXIST")
-            return self.possible_prev_page
+            return None
         pix = page.get_pixmap(dpi=self.dpi)
         img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
         if pix.n == 4:
             img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
         
-        self.possible_prev_page = cv2.resize(img, (self.width, self.height))
-        self.possible_prev_page = cv2.cvtColor(self.possible_prev_page, cv2.COLOR_RGB2BGR)
-        return self.possible_prev_page
+        img = cv2.resize(img, (self.width, self.height))
+        return cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
 
     @property
     def current_page(self):
@@ -123,6 +307,18 @@ class BackgroundManager:
             self.background = self._render_pdf_page(self.page_index)
             print(f"[PDF] Page {self.page_index + 1}/{len(self.doc)}")
 
+    def go_to_page(self, index):
+        if self.video is not None:
+            # Video ink pages are paused frames (page 0: playback layer)
+            if index > 0:
+                self.video.pause()
+                self.video.seek(index - 1)
+            return
+        if self.doc and 0 <= index < len(self.doc) and index != self.page_index:
+            self.page_index = index
+            self.background = self._render_pdf_page(self.page_index)
+            print(f"[PDF] Page {self.page_index + 1}/{len(self.doc)}")
+
     # =======================================================
     # Zoom & Drag
     # =======================================================
@@ -150,20 +346,41 @@ class BackgroundManager:
     # =======================================================
     # Return view (zoom + pan applied)
     # =======================================================
+    @property
+    def is_identity_view(self):
+        return self.zoom == 1.0 and self.offset_x == 0 and self.offset_y == 0
+
+    def view_matrix(self):
+        """Cached document -> screen transform shared by the background and the ink."""
+        key = (self.zoom, self.offset_x, self.offset_y)
+        if key != self._view_key:
+            self._view_key = key
+            self._view_m = view_matrix(self.width, self.height, *key)
+            self._view_inv = cv2.invertAffineTransform(self._view_m)
+            self._view_img = None
+        return self._view_m
+
+    def to_document(self, pt):
+        """Screen point -> document (page canvas) point."""
+        if self.is_identity_view or pt == (-1, -1):
+            return pt
+        self.view_matrix()
+        m = self._view_inv
+        x, y = pt
+        return (int(round(m[0, 0] * x + m[0, 2])), int(round(m[1, 1] * y + m[1, 2])))
+
     def get_view(self):
-        img = self.background.copy()
-        scaled = cv2.resize(img, None, fx=self.zoom, fy=self.zoom)
-        sh, sw = scaled.shape[:2]
-
-        cx = self.width // 2 - sw // 2 + self.offset_x
-        cy = self.height // 2 - sh // 2 + self.offset_y
-
-        result = np.zeros((self.height, self.width, 3), np.uint8)
-        x1, y1 = max(cx, 0), max(cy, 0)
-        x2, y2 = min(cx + sw, self.width), min(cy + sh, self.height)
-        src_x1, src_y1 = max(0, -cx), max(0, -cy)
-        src_x2 = src_x1 + (x2 - x1)
-        src_y2 = src_y1 + (y2 - y1)
-
-        result[y1:y2, x1:x2] = scaled[src_y1:src_y2, src_x1:src_x2]
-        return result
+        """
+        Background as seen on screen. The warped image is cached until zoom/pan or the
+        background changes; the unzoomed background is returned as is (read-only).
+        """
+        if self.is_identity_view:
+            return self.background
+        m = self.view_matrix()
+        if self._view_img is None or self._view_src is not self.background:
+            self._view_src = self.background
+            self._view_img = cv2.warpAffine(
+                self.background, m, (self.width, self.height),
+                flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=0,
+            )
+        return self._view_img
@@ -1,40 +1,44 @@
 import cv2
 import numpy as np
-import mediapipe as mp
-from cvzone.SelfiSegmentationModule import SelfiSegmentation
+
+from .inference_backends import make_seg_backend
 
 
 class UserMaskManager:
     """
-    (Layer 1) Background Creation + (Layer 3) User Segmentation with cvzone(MediaPipe)
-    Controls MediaPipe more easily using the cvzone library.
+    (Layer 1) Background Creation + (Layer 3) User Segmentation
+    Segmentation runs on a pluggable backend (default: cvzone(MediaPipe) Selfie Segmentation).
+    model: MediaPipe variant when backend is "mediapipe" (0 = general, 1 = landscape)
     """
 
-    def __init__(self, model=1):
-        # Initialize cvzone Segmenter
-        self.segmentor = SelfiSegmentation(model=model)
-        print("cvzone(MediaPipe) DNN model loaded successfully.")
+    def __init__(self, model=1, backend="mediapipe"):
+        if isinstance(backend, str):
+            if backend == "mediapipe":
+                backend = f"mediapipe:{model}"
+            backend = make_seg_backend(backend)
+        self.backend = backend
+        print(f"Segmentation model loaded: {self.backend.describe()}")
 
     def create_layer1_background(self, frame_shape, color=(0, 0, 0)):
         """(Layer 1) Create virtual blackboard background"""
         return np.full(frame_shape, color, dtype=np.uint8)
 
-    def create_layer3_mask(self, frame, threshold=0.62):
+    def create_layer3_mask(self, frame, threshold=0.62, rgb=None):
         """
         Creates a person (foreground) mask from the input frame (BGR) and
         returns it as an 8-bit single-channel (0/255) C-contiguous memory.
+        rgb: RGB version of the frame if already available (e.g. from FramePrep)
         """
-        # MediaPipe expects RGB input
-        img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.segmentor.selfieSegmentation.process(img_rgb)
+        # Models expect RGB input
+        img_rgb = rgb if rgb is not None else cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        mask_float = self.backend.process(img_rgb)
 
         # If no segmentation result, return a zero mask immediately
-        if results.segmentation_mask is None:
+        if mask_float is None:
             h, w = frame.shape[:2]
             return np.zeros((h, w), dtype=np.uint8)
 
         # float(0~1) -> binary(0/255)
-        mask_float = results.segmentation_mask
         user_mask = (mask_float > threshold).astype(np.uint8) * 255
 
         # Ensure single-channel/continuity/dtype
@@ -47,6 +51,5 @@ class UserMaskManager:
 
     def close(self):
         """Release resources"""
-        if hasattr(self.segmentor, "selfieSegmentation"):
-            self.segmentor.selfieSegmentation.close()
-        print("UserMaskManager(cvzone) resources released.")
+        self.backend.close()
+        print("UserMaskManager resources released.")
@@ -0,0 +1,135 @@
+# batch.py
+"""
+Offline processing of pre-recorded lectures (pass 1: inference).
+The video is split into frame chunks that are processed in parallel by a process pool.
+Each chunk's HandTracker/UserMaskManager results are stored as a landmark trace, so the
+order-dependent render pass (main.run_batch) can replay them without running the models.
+Traces are cached by video hash + inference settings: re-rendering with other pen or
+background settings skips inference entirely.
+"""
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from .frame_source import VideoFileSource
+from .frame_prep import FramePrep
+from .landmark_trace import TraceWriter, TraceReader
+from .session_store import file_digest
+
+
+# Profile keys that change inference results (part of the cache key)
+INFERENCE_KEYS = ("width", "height", "mirror", "proc_width", "mask_threshold",
+                  "draw_thresh", "erase_thresh", "hand_backend", "seg_backend")
+
+DEFAULT_PROFILE = {
+    # Inference
+    "width": 1280,
+    "height": 720,
+    "mirror": True,
+    "proc_width": 320,
+    "mask_threshold": 0.62,
+    "draw_thresh": 30,
+    "erase_thresh": 120,
+    "hand_backend": "mediapipe",
+    "seg_backend": "mediapipe",
+    # Rendering
+    "pen_color": [255, 255, 255],
+    "thickness": 8,
+    "shape_mode": False,
+    "smooth_ink": False,
+    "user_mask": True,
+    "view": "normal",
+    "background_color": [0, 0, 0],
+}
+
+
+def load_profile(path=None):
+    """Settings profile (JSON) merged over DEFAULT_PROFILE."""
+    profile = dict(DEFAULT_PROFILE)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            profile.update(json.load(f))
+    return profile
+
+
+def _infer_chunk(video_path, start, count, profile, out_path):
+    """Worker: run both models over frames [start, start + count) and write a trace."""
+    # Imported here so that only worker processes load MediaPipe
+    from .handTracker import HandTracker
+    from .UserMaskManager import UserMaskManager
+
+    width, height = profile["width"], profile["height"]
+    proc_w = profile["proc_width"]
+    proc_h = int(proc_w * (height / width))
+
+    src = VideoFileSource(video_path, width, height, mirror=profile["mirror"])
+    src.seek(start)
+    tracker = HandTracker(draw_thresh=profile["draw_thresh"], erase_thresh=profile["erase_thresh"],
+                          backend=profile["hand_backend"])
+    segmenter = UserMaskManager(backend=profile["seg_backend"])
+    writer = TraceWriter(out_path + ".tmp")
+    try:
+        for _ in range(count):
+            ret, frame, _ = src.read()
+            if not ret:
+                break
+            prep = FramePrep(frame)
+            mode, point, _ = tracker.get_gesture(frame, rgb=prep.rgb())
+            writer.write_gesture(mode, point, tracker.last_landmarks)
+            proc_size = (proc_w, proc_h)
+            writer.write_mask(segmenter.create_layer3_mask(
+                prep.get("bgr", proc_size), profile["mask_threshold"], rgb=prep.rgb(proc_size)
+            ))
+            writer.next_frame()
+    finally:
+        writer.close()
+        tracker.close()
+        segmenter.close()
+        src.release()
+    os.replace(out_path + ".tmp", out_path)
+    return out_path
+
+
+def run_inference_pass(video_path, profile, cache_root="batch_cache", workers=None, chunk_frames=300):
+    """
+    Pass 1: parallel inference over chunks of `video_path`.
+    Returns a TraceReader over all chunks (in frame order). Finished chunks are reused.
+    Note: hand tracking and point smoothing restart at each chunk boundary.
+    """
+    settings = {k: profile[k] for k in INFERENCE_KEYS}
+    digest = file_digest(video_path)
+    key = hashlib.sha1(
+        (digest + json.dumps(settings, sort_keys=True)).encode("utf-8")
+    ).hexdigest()[:16]
+    cache_dir = os.path.join(cache_root, key)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if total <= 0:
+        raise ValueError(f"could not read frame count of '{video_path}'")
+
+    chunks = [
+        (start, min(chunk_frames, total - start),
+         os.path.join(cache_dir, f"chunk_{start // chunk_frames:05d}.vbt"))
+        for start in range(0, total, chunk_frames)
+    ]
+    todo = [c for c in chunks if not os.path.exists(c[2])]
+    print(f"[BATCH] {total} frames, {len(chunks)} chunks ({len(chunks) - len(todo)} cached) in {cache_dir}")
+
+    if todo:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_infer_chunk, video_path, start, count, profile, path)
+                for start, count, path in todo
+            ]
+            for done, future in enumerate(as_completed(futures), 1):
+                future.result()
+                print(f"[BATCH] inference {done}/{len(todo)} chunks")
+
+    return TraceReader.concat([path for _, _, path in chunks])
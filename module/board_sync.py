@@ -0,0 +1,451 @@
+# board_sync.py
+"""
+Stroke-delta sync for remote viewers.
+Instead of streaming video, the blackboard publishes what changed on the ink canvas
+as a compact binary stream over TCP; viewers rebuild the board locally.
+Bandwidth follows ink activity (about 14 bytes per drawn segment), not resolution or frame rate.
+
+Stream: batches, one per rendered frame with changes: <u32 length><messages...>
+Messages (little endian, positions in board pixels):
+    'L' line      3B color (BGR), u16 thickness, i16 x0, y0, x1, y1
+    'P' polyline  3B color, u16 thickness, u16 n, n * (i16 x, i16 y)
+    'R' patch     i16 x, y, u32 size, PNG (shape corrections, pages restored from the session)
+    'G' page      u32 index (PDF page / paused video frame)
+    'C' clear     (current page)
+    'V' view      f32 zoom, i32 offset_x, i32 offset_y (pages are in document space)
+    'S' snapshot  u16 width, height, u32 current page, u16 n, n * (u32 page, u32 size, PNG)
+                  (sent to late joiners and after a background switch: replaces all pages)
+Highlighter (translucent) ink, a separate layer under the opaque ink of each page:
+    'H' line      3B color, u8 alpha, u16 thickness, i16 x0, y0, x1, y1
+    'Q' polyline  3B color, u8 alpha, u16 thickness, u16 n, n * (i16 x, i16 y)
+    'E' erase     u16 thickness, i16 x0, y0, x1, y1
+    'K' page      u32 page, u32 size, PNG (BGRA: color + alpha; replaces the layer of that page,
+                  follows 'S' for every page with highlight, or a page restored from the session)
+    'C' clears both layers of the current page.
+A viewer that meets an unknown message type skips the rest of that batch.
+"""
+import queue
+import socket
+import struct
+import threading
+
+import cv2
+import numpy as np
+
+from .BackgroundManager import view_matrix
+from .highlight_ink import HighlightLayer
+
+
+_LINE = struct.Struct("<c3BH4h")
+_POLY = struct.Struct("<c3BHH")
+_PATCH = struct.Struct("<chhI")
+_PAGE = struct.Struct("<cI")
+_VIEW = struct.Struct("<cfii")
+_SNAP = struct.Struct("<cHHIH")
+_SNAP_PAGE = struct.Struct("<II")
+_BATCH = struct.Struct("<I")
+_HL_LINE = struct.Struct("<c4BH4h")
+_HL_POLY = struct.Struct("<c4BHH")
+_HL_ERASE = struct.Struct("<cH4h")
+_HL_PAGE = struct.Struct("<cII")
+
+
+def _png(img):
+    ok, buf = cv2.imencode(".png", img, [cv2.IMWRITE_PNG_COMPRESSION, 6])
+    return buf.tobytes() if ok else b""
+
+
+def _alpha8(alpha):
+    return min(max(int(round(alpha * 255)), 1), 255)
+
+
+# =======================================================
+#  Publisher (blackboard side)
+# =======================================================
+class _Client:
+    """One viewer connection: own send queue and thread, so a slow viewer never blocks rendering."""
+
+    def __init__(self, sock, addr, on_event):
+        self.sock = sock
+        self.addr = addr
+        self.alive = True
+        self._on_event = on_event  # on_event(client, bytes_sent); 0 bytes = disconnected
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name="BoardSyncClient", daemon=True).start()
+
+    def send(self, item):
+        self._queue.put(item)
+
+    def _run(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                if isinstance(item, tuple):  # Snapshot: pages are read and PNG-encoded here, not in the render loop
+                    item = BoardSyncServer.encode_snapshot(*item)
+                self.sock.sendall(_BATCH.pack(len(item)) + item)
+                self._on_event(self, len(item) + _BATCH.size)
+        except OSError:
+            pass
+        self.alive = False
+        self.sock.close()
+        self._on_event(self, 0)
+
+    def close(self):
+        self._queue.put(None)
+
+
+class BoardSyncServer:
+    """
+    Publishes canvas deltas to connected viewers.
+    The blackboard calls the event methods while drawing and flush() once per frame.
+    Listens on localhost by default; pass host="0.0.0.0" to accept viewers from other machines.
+    """
+
+    def __init__(self, width, height, host="127.0.0.1", port=8765):
+        self.width = width
+        self.height = height
+        self.bytes_sent = 0
+
+        self._buf = bytearray()
+        self._view = None
+        self._clients = []
+        self._joined = queue.Queue()   # Accepted sockets waiting for their snapshot
+        self._lock = threading.Lock()
+
+        self._sock = socket.create_server((host, port))
+        self._thread = threading.Thread(target=self._accept_loop, name="BoardSync", daemon=True)
+        self._thread.start()
+        print(f"[SYNC] Listening on {host}:{port}")
+
+    @property
+    def client_count(self):
+        return len(self._clients)
+
+    # =======================================================
+    #  Events (render thread)
+    # =======================================================
+    def line(self, p0, p1, color, thickness):
+        self._buf += _LINE.pack(b"L", *color, thickness, p0[0], p0[1], p1[0], p1[1])
+
+    def polyline(self, pts, color, thickness):
+        self._buf += _POLY.pack(b"P", *color, thickness, len(pts))
+        self._buf += np.asarray(pts, dtype="<i2").tobytes()
+
+    def patch(self, canvas, x, y, w, h):
+        """Region of the current page that changed in a way that is not a stroke."""
+        x, y = max(x, 0), max(y, 0)
+        region = canvas[y:y + h, x:x + w]
+        if region.size == 0:
+            return
+        data = _png(region)
+        self._buf += _PATCH.pack(b"R", x, y, len(data)) + data
+
+    def page(self, index):
+        self._buf += _PAGE.pack(b"G", index)
+
+    def highlight_line(self, p0, p1, color, alpha, thickness):
+        self._buf += _HL_LINE.pack(b"H", *color, _alpha8(alpha), thickness, p0[0], p0[1], p1[0], p1[1])
+
+    def highlight_polyline(self, pts, color, alpha, thickness):
+        self._buf += _HL_POLY.pack(b"Q", *color, _alpha8(alpha), thickness, len(pts))
+        self._buf += np.asarray(pts, dtype="<i2").tobytes()
+
+    def highlight_erase(self, p0, p1, thickness):
+        self._buf += _HL_ERASE.pack(b"E", thickness, p0[0], p0[1], p1[0], p1[1])
+
+    def highlight_page(self, index, layer):
+        """Whole highlight layer of a page (e.g. restored from the session)."""
+        data = _png(layer.to_bgra())
+        self._buf += _HL_PAGE.pack(b"K", index, len(data)) + data
+
+    def clear(self):
+        self._buf += b"C"
+
+    def view(self, zoom, offset_x, offset_y):
+        """Zoom/pan state; only changes are sent."""
+        state = (float(zoom), int(offset_x), int(offset_y))
+        if state != self._view:
+            self._view = state
+            self._buf += _VIEW.pack(b"V", *state)
+
+    @property
+    def joining(self):
+        """True while accepted viewers are waiting for their snapshot."""
+        return not self._joined.empty()
+
+    def flush(self, current_page, snapshot):
+        """
+        Send this frame's deltas, then snapshots to viewers that joined meanwhile.
+        snapshot() returns the read-only page set of the board (SessionStore.snapshot); it is only
+        called when a viewer joined, and read by the viewer's send thread.
+        """
+        if self._buf and self._clients:
+            data = bytes(self._buf)
+            for client in list(self._clients):
+                client.send(data)
+        self._buf.clear()
+
+        pages = None
+        while not self._joined.empty():
+            client = self._joined.get()
+            if pages is None:
+                pages = snapshot()
+            client.send(self._snapshot_job(pages, current_page))
+            with self._lock:
+                self._clients.append(client)
+            print(f"[SYNC] Viewer joined: {client.addr[0]}:{client.addr[1]}")
+
+    def resync(self, pages, current_page):
+        """Replace the viewers' pages (e.g. after switching to another background)."""
+        self._buf.clear()
+        for client in list(self._clients):
+            client.send(self._snapshot_job(pages, current_page))
+
+    def close(self):
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+        for client in list(self._clients):
+            client.close()
+        print(f"[SYNC] Closed ({self.bytes_sent / 1024:.1f} KiB sent)")
+
+    # =======================================================
+    #  Internals
+    # =======================================================
+    def _snapshot_job(self, pages, current_page):
+        # The page set is read (one page at a time) and encoded by the client's send thread
+        return (self.width, self.height, current_page, pages, self._view)
+
+    @staticmethod
+    def encode_snapshot(width, height, current_page, pages, view=None):
+        """
+        'S' message of a page set: pages.indices() lists the pages with ink,
+        pages.load(i) returns (canvas, HighlightLayer) of page i (see SessionStore.snapshot).
+        """
+        body = bytearray()
+        highlights = bytearray()
+        n = 0
+        for index in pages.indices():
+            canvas, layer = pages.load(index)
+            if canvas is not None and canvas.any():
+                data = _png(canvas)
+                body += _SNAP_PAGE.pack(index, len(data)) + data
+                n += 1
+            if layer is not None and layer.any():
+                data = _png(layer.to_bgra())
+                highlights += _HL_PAGE.pack(b"K", index, len(data)) + data
+        out = bytearray(_SNAP.pack(b"S", width, height, current_page, n)) + body + highlights
+        if view is not None:
+            out += _VIEW.pack(b"V", *view)
+        return bytes(out)
+
+    def _accept_loop(self):
+        while True:
+            try:
+                sock, addr = self._sock.accept()
+            except OSError:
+                break
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._joined.put(_Client(sock, addr, self._on_client_event))
+
+    def _on_client_event(self, client, sent):
+        if sent:
+            self.bytes_sent += sent
+        elif not client.alive:
+            with self._lock:
+                if client in self._clients:
+                    self._clients.remove(client)
+            print(f"[SYNC] Viewer left: {client.addr[0]}:{client.addr[1]}")
+
+
+# =======================================================
+#  Viewer side
+# =======================================================
+class BoardState:
+    """Rebuilds the board (ink pages, current page, view) from the message stream."""
+
+    def __init__(self):
+        self.width = self.height = 0
+        self.pages = {}
+        self.highlights = {}        # page -> HighlightLayer
+        self.current_page = 0
+        self.zoom, self.offset_x, self.offset_y = 1.0, 0, 0
+        self.skipped = 0            # Batches cut short by an unknown message
+
+    @property
+    def canvas(self):
+        canvas = self.pages.get(self.current_page)
+        if canvas is None:
+            canvas = np.zeros((max(self.height, 1), max(self.width, 1), 3), dtype=np.uint8)
+            self.pages[self.current_page] = canvas
+        return canvas
+
+    @property
+    def highlight(self):
+        layer = self.highlights.get(self.current_page)
+        if layer is None:
+            layer = HighlightLayer(max(self.width, 1), max(self.height, 1))
+            self.highlights[self.current_page] = layer
+        return layer
+
+    def composite(self):
+        """Current page as shown on the board: highlight blended under the opaque ink."""
+        frame = self.canvas.copy()
+        layer = self.highlights.get(self.current_page)
+        if layer is not None and layer.any():
+            ink = cv2.inRange(frame, (0, 0, 0), (0, 0, 0))   # 255 where there is no opaque ink
+            layer.blend(frame, keep=ink)
+        return frame
+
+    def apply(self, batch):
+        view = memoryview(batch)
+        pos = 0
+        while pos < len(view):
+            kind = bytes(view[pos:pos + 1])
+            if kind == b"L":
+                _, b, g, r, t, x0, y0, x1, y1 = _LINE.unpack_from(view, pos)
+                cv2.line(self.canvas, (x0, y0), (x1, y1), (b, g, r), t)
+                pos += _LINE.size
+            elif kind == b"P":
+                _, b, g, r, t, n = _POLY.unpack_from(view, pos)
+                pos += _POLY.size
+                pts = np.frombuffer(view[pos:pos + 4 * n], dtype="<i2").reshape(-1, 2).astype(np.int32)
+                pos += 4 * n
+                if n == 1:
+                    cv2.line(self.canvas, tuple(pts[0]), tuple(pts[0]), (b, g, r), t)
+                elif n > 1:
+                    cv2.polylines(self.canvas, [pts], False, (b, g, r), t)
+            elif kind == b"R":
+                _, x, y, size = _PATCH.unpack_from(view, pos)
+                pos += _PATCH.size
+                region = cv2.imdecode(np.frombuffer(view[pos:pos + size], np.uint8), cv2.IMREAD_COLOR)
+                pos += size
+                if region is not None:
+                    h, w = region.shape[:2]
+                    self.canvas[y:y + h, x:x + w] = region
+            elif kind == b"G":
+                _, self.current_page = _PAGE.unpack_from(view, pos)
+                pos += _PAGE.size
+            elif kind == b"C":
+                self.canvas.fill(0)
+                if self.current_page in self.highlights:
+                    self.highlights[self.current_page].clear()
+                pos += 1
+            elif kind == b"H":
+                _, b, g, r, a, t, x0, y0, x1, y1 = _HL_LINE.unpack_from(view, pos)
+                self.highlight.line((x0, y0), (x1, y1), (b, g, r), a / 255, t)
+                pos += _HL_LINE.size
+            elif kind == b"Q":
+                _, b, g, r, a, t, n = _HL_POLY.unpack_from(view, pos)
+                pos += _HL_POLY.size
+                pts = np.frombuffer(view[pos:pos + 4 * n], dtype="<i2").reshape(-1, 2)
+                pos += 4 * n
+                self.highlight.polyline([tuple(int(v) for v in p) for p in pts], (b, g, r), a / 255, t)
+            elif kind == b"E":
+                _, t, x0, y0, x1, y1 = _HL_ERASE.unpack_from(view, pos)
+                if self.current_page in self.highlights:
+                    self.highlights[self.current_page].erase_line((x0, y0), (x1, y1), t)
+                pos += _HL_ERASE.size
+            elif kind == b"K":
+                _, index, size = _HL_PAGE.unpack_from(view, pos)
+                pos += _HL_PAGE.size
+                bgra = cv2.imdecode(np.frombuffer(view[pos:pos + size], np.uint8), cv2.IMREAD_UNCHANGED)
+                pos += size
+                if bgra is not None and bgra.ndim == 3 and bgra.shape[2] == 4:
+                    self.highlights[index] = HighlightLayer.from_bgra(bgra)
+            elif kind == b"V":
+                _, self.zoom, self.offset_x, self.offset_y = _VIEW.unpack_from(view, pos)
+                pos += _VIEW.size
+            elif kind == b"S":
+                _, self.width, self.height, self.current_page, n = _SNAP.unpack_from(view, pos)
+                pos += _SNAP.size
+                self.pages = {}
+                self.highlights = {}
+                for _ in range(n):
+                    index, size = _SNAP_PAGE.unpack_from(view, pos)
+                    pos += _SNAP_PAGE.size
+                    self.pages[index] = cv2.imdecode(
+                        np.frombuffer(view[pos:pos + size], np.uint8), cv2.IMREAD_COLOR
+                    )
+                    pos += size
+            else:
+                # E.g. a message added by a newer publisher: its length is unknown, so the rest of
+                # this batch is dropped (batches are length-prefixed, the next one is read normally)
+                self.skipped += 1
+                if self.skipped == 1:
+                    print(f"[SYNC] Unknown message {kind!r}, rest of the batch skipped")
+                return
+
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("stream closed")
+        buf += chunk
+    return bytes(buf)
+
+
+def read_batches(sock):
+    """Yield the batches of a sync stream until the connection closes."""
+    try:
+        while True:
+            (size,) = _BATCH.unpack(_recv_exact(sock, _BATCH.size))
+            yield _recv_exact(sock, size)
+    except (ConnectionError, OSError):
+        return
+
+
+def run_viewer(address, window_name="Board Viewer"):
+    """Reference viewer: connect to a blackboard and show its ink (q to quit)."""
+    host, _, port = address.rpartition(":")
+    sock = socket.create_connection((host or "127.0.0.1", int(port or 8765)))
+    print(f"[SYNC] Connected to {address}")
+
+    state = BoardState()
+    batches = queue.Queue()
+
+    def _receive():
+        for batch in read_batches(sock):
+            batches.put(batch)
+        batches.put(None)
+
+    threading.Thread(target=_receive, name="BoardViewer", daemon=True).start()
+
+    received = 0
+    closed = False
+    while not closed:
+        # Apply everything received since the last displayed frame
+        try:
+            batch = batches.get(timeout=0.03)
+            while True:
+                if batch is None:
+                    closed = True
+                    print("[SYNC] Stream closed")
+                    break
+                state.apply(batch)
+                received += len(batch) + _BATCH.size
+                batch = batches.get_nowait()
+        except queue.Empty:
+            pass
+
+        if state.width:
+            # Pages are in document space: show them with the presenter's zoom/pan
+            frame = state.composite()
+            if state.zoom != 1.0 or state.offset_x != 0 or state.offset_y != 0:
+                m = view_matrix(state.width, state.height, state.zoom, state.offset_x, state.offset_y)
+                frame = cv2.warpAffine(frame, m, (state.width, state.height), flags=cv2.INTER_NEAREST)
+            cv2.putText(
+                frame, f"page {state.current_page + 1}  zoom {state.zoom:.2f}  {received / 1024:.1f} KiB",
+                (10, frame.shape[0] - 12), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 1,
+            )
+            cv2.imshow(window_name, frame)
+        if cv2.waitKey(1) & 0xFF == ord("q"):
+            break
+
+    sock.close()
+    cv2.destroyAllWindows()
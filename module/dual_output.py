@@ -0,0 +1,113 @@
+# dual_output.py
+"""
+Presenter / audience outputs fed from one composite (ViewManager.scene()).
+
+- Audience outputs get the composite as is: no HUD, no finger pointer.
+- Presenter outputs get the same composite with the presenter overlays drawn in place through a
+  RoiOverlay (only the regions the HUD/pointer touch are saved and restored afterwards),
+  so no full-frame copy is made for the presenter.
+- Each output has its own size. The composite is scaled once per distinct size per frame and that
+  image is shared by every output of that size (presenter and audience alike).
+
+Output specs (optional "@WxH" suffix for the output size, default: composite size):
+    window[:NAME]   OpenCV window
+    mjpeg:PORT      local HTTP MJPEG stream
+    PATH            video file (e.g. out/audience.mp4)
+"""
+import re
+
+import cv2
+
+from .overlay_hud import RoiOverlay
+from .session_server import open_output
+
+
+class WindowOutput:
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+        cv2.namedWindow(name)
+
+    def write(self, frame):
+        cv2.imshow(self.name, frame)
+
+    def close(self):
+        try:
+            cv2.destroyWindow(self.name)
+        except cv2.error:
+            pass
+
+
+def parse_size(text):
+    """'1920x1080' -> (1920, 1080)"""
+    m = re.fullmatch(r"(\d+)x(\d+)", text.strip())
+    if not m:
+        raise ValueError(f"invalid size '{text}' (expected WxH)")
+    return int(m.group(1)), int(m.group(2))
+
+
+def open_view_output(spec, fps, default_size, default_window):
+    """Output for a presenter/audience spec (see module docstring); the output keeps its .size"""
+    size = default_size
+    base, sep, tail = spec.rpartition("@")
+    if sep and re.fullmatch(r"\d+x\d+", tail):
+        spec, size = base, parse_size(tail)
+    if spec == "window" or spec.startswith("window:"):
+        out = WindowOutput(spec.split(":", 1)[1] if ":" in spec else default_window, size)
+    else:
+        out = open_output(spec, fps, size)
+        out.size = size
+    return out
+
+
+class DualOutput:
+    """Publishes one composite per frame to presenter outputs (with overlays) and audience outputs (clean)."""
+
+    def __init__(self, presenter, audience):
+        self.presenter = list(presenter)
+        self.audience = list(audience)
+        self.scaled = 0             # Resizes done in the last frame (one per distinct output size)
+        self.overlay_area = 0       # Pixels saved/restored for the presenter overlays in the last frame
+
+    def publish(self, scene, draw_overlays):
+        """
+        scene: shared composite (not modified once publish() returns).
+        draw_overlays(img, roi, scale): draws the presenter overlays into img
+            (roi: RoiOverlay, scale: (sx, sy) of img relative to the scene).
+        """
+        h, w = scene.shape[:2]
+        sizes = []
+        for out in self.presenter + self.audience:
+            size = tuple(out.size) if out.size else (w, h)
+            if size not in sizes:
+                sizes.append(size)
+
+        self.scaled = 0
+        self.overlay_area = 0
+        for size in sizes:
+            presenters = [o for o in self.presenter if (tuple(o.size) if o.size else (w, h)) == size]
+            audience = [o for o in self.audience if (tuple(o.size) if o.size else (w, h)) == size]
+            if size == (w, h):
+                img = scene
+            else:
+                img = cv2.resize(scene, size, interpolation=cv2.INTER_AREA if size[0] < w else cv2.INTER_LINEAR)
+                self.scaled += 1
+
+            if presenters:
+                # The scene and scaled images shared with the audience get their pixels back afterwards
+                shared = img is scene or bool(audience)
+                roi = RoiOverlay(img)
+                draw_overlays(img, roi, (size[0] / w, size[1] / h))
+                self.overlay_area += roi.area
+                for out in presenters:
+                    # Outputs that keep the frame (streams) need their own copy if img is restored
+                    out.write(img.copy() if shared and getattr(out, "keeps_frame", False) else img)
+                if shared:
+                    roi.restore()
+
+            for out in audience:
+                out.write(img)
+
+    def close(self):
+        for out in self.presenter + self.audience:
+            out.close()
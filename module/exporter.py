@@ -0,0 +1,233 @@
+# exporter.py
+import os
+import queue
+import threading
+
+import cv2
+import numpy as np
+import fitz  # PyMuPDF (for PDF)
+
+from .video_background import VIDEO_EXTS
+
+
+class ExportWorker:
+    """
+    Runs snapshot encoding and whole-deck exports on a background thread,
+    so the render loop never waits for PNG/PDF encoding.
+    - save_snapshot(): encode a single frame (PNG)
+    - export_deck():   ink of every page composited over the background at source resolution,
+                       loaded and composited one page at a time on the worker
+    - status:          progress text for the HUD ("" when idle)
+    """
+
+    IMAGE_EXTS = (".jpg", ".jpeg", ".png")
+
+    def __init__(self, dpi=150, jpeg_quality=92):
+        self.dpi = dpi
+        self.jpeg_quality = jpeg_quality
+        self.status = ""
+        self.last_result = ""
+
+        self._jobs = queue.Queue()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="ExportWorker", daemon=True)
+        self._thread.start()
+
+    # =======================================================
+    #  Public API (called from the render thread)
+    # =======================================================
+    @property
+    def busy(self):
+        return self._pending > 0
+
+    def save_snapshot(self, frame_bgr, out_path):
+        """Queue a PNG snapshot. The frame is copied so the caller may keep drawing into it."""
+        self._submit(self._write_snapshot, frame_bgr.copy(), out_path)
+
+    def export_deck(self, source, pages, out_path, bg_color=(0, 0, 0), fmt="pdf"):
+        """
+        Queue an export of all pages.
+        - source: background file path (PDF/image/video) or None for a solid color board
+          (video: one page per paused frame with ink, over that frame)
+        - pages: read-only page set taken at submit time (SessionStore.snapshot()):
+          pages.indices() lists the pages with ink, pages.load(i) returns (canvas, HighlightLayer)
+          of page i; the highlight is blended under the opaque ink
+        - fmt: "pdf" (single multi-page file) or "png"/"jpg" (one file per page in out_path directory)
+        """
+        self._submit(self._write_deck, source, pages, out_path, bg_color, fmt)
+
+    def close(self, wait=True):
+        """Stop the worker (waits for queued jobs by default)."""
+        self._jobs.put(None)
+        if wait:
+            self._thread.join()
+
+    # =======================================================
+    #  Worker thread
+    # =======================================================
+    def _submit(self, fn, *args):
+        with self._lock:
+            self._pending += 1
+        self._jobs.put((fn, args))
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            fn, args = job
+            try:
+                fn(*args)
+            except Exception as e:
+                self.last_result = f"[EXPORT] Failed: {e}"
+                print(self.last_result)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                self.status = ""
+
+    def _write_snapshot(self, frame_bgr, out_path):
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        if not cv2.imwrite(out_path, frame_bgr):
+            raise IOError(f"could not write {out_path}")
+        self.last_result = f"[SNAP] saved to {out_path}"
+        print(self.last_result)
+
+    def _write_deck(self, source, saved, out_path, bg_color, fmt):
+        src_doc = None
+        ext = os.path.splitext(source)[1].lower() if source else ""
+        if ext == ".pdf":
+            # Separate document handle: fitz documents must not be shared across threads
+            src_doc = fitz.open(source)
+            pages = list(range(len(src_doc)))
+        elif ext in VIDEO_EXTS:
+            # Video ink pages are keyed by paused frame: export only the annotated ones
+            pages = saved.indices() or [0]
+        else:
+            pages = [0]
+
+        try:
+            if fmt == "pdf":
+                self._write_pdf(src_doc, source, ext, saved, pages, out_path, bg_color)
+            else:
+                self._write_images(src_doc, source, ext, saved, pages, out_path, bg_color, fmt)
+        finally:
+            if src_doc is not None:
+                src_doc.close()
+
+        self.last_result = f"[EXPORT] {len(pages)} page(s) saved to {out_path}"
+        print(self.last_result)
+
+    def _progress(self, index, total):
+        self.status = f"Exporting {index + 1}/{total}"
+
+    # ---- PDF output: original pages are kept as-is, ink is overlaid as a transparent image ----
+    def _write_pdf(self, src_doc, source, ext, saved, pages, out_path, bg_color):
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        out = fitz.open()
+        try:
+            for n, i in enumerate(pages):
+                self._progress(n, len(pages))
+                canvas, layer = saved.load(i)
+
+                if src_doc is not None:
+                    out.insert_pdf(src_doc, from_page=i, to_page=i)
+                    page = out[-1]
+                else:
+                    bg = self._load_background(source, ext, canvas, bg_color, i)
+                    h, w = bg.shape[:2]
+                    page = out.new_page(width=w, height=h)
+                    page.insert_image(page.rect, stream=self._encode(bg, ".png"))
+
+                # Highlight as a translucent image under the ink (the PDF text stays vector)
+                if layer is not None and layer.any():
+                    page.insert_image(
+                        page.rect, stream=self._encode(layer.to_bgra(), ".png"), keep_proportion=False
+                    )
+                if canvas is not None and np.any(canvas):
+                    page.insert_image(
+                        page.rect, stream=self._ink_png(canvas), keep_proportion=False
+                    )
+            out.save(out_path, garbage=3, deflate=True)
+        finally:
+            out.close()
+
+    # ---- Image set output: one raster per page at source resolution ----
+    def _write_images(self, src_doc, source, ext, saved, pages, out_dir, bg_color, fmt):
+        os.makedirs(out_dir, exist_ok=True)
+        suffix = ".jpg" if fmt in ("jpg", "jpeg") else ".png"
+        for n, i in enumerate(pages):
+            self._progress(n, len(pages))
+            canvas, layer = saved.load(i)
+
+            if src_doc is not None:
+                bg = self._render_pdf_page(src_doc, i)
+            else:
+                bg = self._load_background(source, ext, canvas, bg_color, i)
+
+            if layer is not None:
+                self._composite_highlight(bg, layer)
+            if canvas is not None:
+                self._composite_ink(bg, canvas)
+
+            path = os.path.join(out_dir, f"page_{n + 1:03d}{suffix}")
+            with open(path, "wb") as f:
+                f.write(self._encode(bg, suffix))
+
+    # =======================================================
+    #  Helpers
+    # =======================================================
+    def _render_pdf_page(self, doc, index):
+        pix = doc.load_page(index).get_pixmap(dpi=self.dpi)
+        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+        code = cv2.COLOR_RGBA2BGR if pix.n == 4 else cv2.COLOR_RGB2BGR
+        return cv2.cvtColor(img, code)
+
+    def _load_background(self, source, ext, canvas, bg_color, page=0):
+        if ext in self.IMAGE_EXTS:
+            img = cv2.imread(source)
+            if img is not None:
+                return img
+        if ext in VIDEO_EXTS:
+            # Page k > 0 is paused frame k - 1 (page 0: ink drawn during playback, over frame 0)
+            cap = cv2.VideoCapture(source)
+            cap.set(cv2.CAP_PROP_POS_FRAMES, max(page - 1, 0))
+            ok, img = cap.read()
+            cap.release()
+            if ok:
+                return img
+        if canvas is not None:
+            h, w = canvas.shape[:2]
+        else:
+            h, w = 720, 1280
+        return np.full((h, w, 3), bg_color, dtype=np.uint8)
+
+    def _composite_ink(self, bg, canvas):
+        """Draw the (screen resolution) canvas over bg in place, scaled to bg's size."""
+        h, w = bg.shape[:2]
+        if canvas.shape[:2] != (h, w):
+            canvas = cv2.resize(canvas, (w, h), interpolation=cv2.INTER_NEAREST)
+        mask_ink = cv2.bitwise_not(cv2.inRange(canvas, (0, 0, 0), (0, 0, 0)))
+        cv2.copyTo(canvas, mask_ink, bg)
+
+    def _composite_highlight(self, bg, layer):
+        """Blend the (screen resolution) highlight over bg in place, scaled to bg's size."""
+        h, w = bg.shape[:2]
+        index = layer.index
+        if index.shape != (h, w):
+            index = cv2.resize(index, (w, h), interpolation=cv2.INTER_NEAREST)
+        layer.blend(bg, index)
+
+    def _ink_png(self, canvas):
+        """Canvas as BGRA PNG: black (empty) pixels become fully transparent."""
+        alpha = cv2.bitwise_not(cv2.inRange(canvas, (0, 0, 0), (0, 0, 0)))
+        bgra = cv2.merge((*cv2.split(canvas), alpha))
+        return self._encode(bgra, ".png")
+
+    def _encode(self, img, suffix):
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality] if suffix == ".jpg" else []
+        ok, buf = cv2.imencode(suffix, img, params)
+        if not ok:
+            raise IOError(f"could not encode {suffix}")
+        return buf.tobytes()
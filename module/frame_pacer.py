@@ -0,0 +1,179 @@
+# frame_pacer.py
+import time
+import threading
+from collections import deque
+
+import cv2
+import numpy as np
+
+from .frame_source import WebcamSource
+
+
+class FramePacer:
+    """
+    Paces the main loop to the capture rate (or a target FPS) instead of spinning.
+    - Live cameras are read on a capture thread; the loop only processes frames it has not seen yet.
+      Files/sequences/synthetic are read on demand, one frame per interval.
+    - Duplicate frames (some drivers/virtual cameras repeat the last buffer) are detected on a
+      sparse pixel sample and never processed.
+    - wait_key() idles inside cv2.waitKeyEx until the next frame is due, in short slices,
+      so keys and mouse events are still handled within a few ms.
+    stats() / status expose processed FPS, work time per frame, idle ratio and skipped frames.
+    """
+
+    def __init__(self, source, target_fps=None, live=None, poll_ms=4, window=60):
+        self.source = source
+        self.live = isinstance(source, WebcamSource) if live is None else live
+        fps = target_fps or (None if self.live else source.fps) or (0 if self.live else 30.0)
+        self.interval = 1.0 / fps if fps else 0.0    # 0: every new camera frame
+        self.poll_ms = poll_ms
+
+        self.duplicates = 0         # Frames identical to the previous one (not processed)
+        self.skipped = 0            # New camera frames dropped to stay at the target rate
+        self._next_due = 0.0
+        self._last = (False, None, 0.0)
+        self._sample = None
+        self._work = deque(maxlen=window)   # Processing time per frame (s)
+        self._idle = deque(maxlen=window)   # Idle time per frame (s)
+        self._frame_t = deque(maxlen=window)
+        self._t_work = None
+        self._idle_acc = 0.0
+
+        # Live capture thread state
+        self._lock = threading.Condition()
+        self._latest = None         # (ok, frame, ts, seq)
+        self._seq = 0
+        self._seen = 0
+        self._stop = False
+        if self.live:
+            self._thread = threading.Thread(target=self._capture, name="FramePacer", daemon=True)
+            self._thread.start()
+
+    # =======================================================
+    #  Capture
+    # =======================================================
+    def _is_duplicate(self, frame):
+        sample = frame[::16, ::16]
+        dup = self._sample is not None and self._sample.shape == sample.shape and np.array_equal(sample, self._sample)
+        self._sample = sample.copy()
+        if dup:
+            self.duplicates += 1
+        return dup
+
+    def _capture(self):
+        while not self._stop:
+            ok, frame, ts = self.source.read()
+            if ok and self._is_duplicate(frame):
+                continue
+            with self._lock:
+                if ok and self._seq > self._seen:
+                    self.skipped += 1   # Previous frame was never picked up
+                self._seq += 1
+                self._latest = (ok, frame, ts, self._seq)
+                self._lock.notify_all()
+            if not ok:
+                break
+
+    def _due(self, now):
+        if now < self._next_due:
+            return False
+        if self.live:
+            return self._latest is not None and self._latest[3] != self._seen
+        return True
+
+    # =======================================================
+    #  Main loop interface
+    # =======================================================
+    def read(self):
+        """
+        (ok, frame, timestamp, fresh). fresh is False when no new frame is due yet:
+        the caller skips processing and keeps showing the last output.
+        """
+        now = time.perf_counter()
+        if self.live:
+            with self._lock:
+                if self._latest is None:
+                    self._lock.wait_for(lambda: self._latest is not None)
+                if not self._due(time.perf_counter()):
+                    return (*self._last, False)
+                ok, frame, ts, self._seen = self._latest
+        elif self._due(now):
+            while True:
+                ok, frame, ts = self.source.read()
+                if not ok or not self._is_duplicate(frame):
+                    break
+        else:
+            return (*self._last, False)
+
+        self._last = (ok, frame, ts)
+        if ok:
+            t = time.perf_counter()
+            # Stay on the source's grid; after an overrun, restart from now instead of catching up
+            self._next_due = max(self._next_due + self.interval, t - self.interval * 0.5) if self.interval else t
+            self._frame_t.append(t)
+            self._idle.append(self._idle_acc)
+            self._idle_acc = 0.0
+            self._t_work = t
+        return ok, frame, ts, True
+
+    def wait_key(self):
+        """Wait until the next frame is due; returns a key pressed meanwhile (or -1)."""
+        t0 = time.perf_counter()
+        if self._t_work is not None:
+            self._work.append(t0 - self._t_work)
+            self._t_work = None
+        key = -1
+        while True:
+            now = time.perf_counter()
+            if self.live:
+                with self._lock:
+                    due = self._due(now) or (self._latest is not None and not self._latest[0])
+            else:
+                due = self._due(now)
+            if due:
+                # Minimal wait so the window still redraws / handles events
+                key = cv2.waitKeyEx(1)
+                break
+            wait_ms = max((self._next_due - now) * 1000, 1)
+            if self.live:
+                # Camera frames arrive on their own schedule: check for one every poll_ms
+                wait_ms = min(wait_ms, self.poll_ms) if now < self._next_due else self.poll_ms
+            wait_ms = int(wait_ms)
+            key = cv2.waitKeyEx(wait_ms)
+            if key != -1:
+                break
+            # Without a window (or in headless builds) waitKeyEx returns at once: sleep the rest
+            rest = wait_ms / 1000 - (time.perf_counter() - now)
+            if rest > 0.0005:
+                time.sleep(rest)
+        self._idle_acc += time.perf_counter() - t0
+        return key
+
+    # =======================================================
+    #  Stats
+    # =======================================================
+    def stats(self):
+        span = self._frame_t[-1] - self._frame_t[0] if len(self._frame_t) > 1 else 0.0
+        work = float(np.mean(self._work)) if self._work else 0.0
+        idle = float(np.sum(self._idle))
+        busy = float(np.sum(self._work))
+        return {
+            "fps": (len(self._frame_t) - 1) / span if span else 0.0,
+            "target_fps": 1.0 / self.interval if self.interval else 0.0,
+            "work_ms": work * 1000,
+            "idle_ratio": idle / max(idle + busy, 1e-9),
+            "duplicates": self.duplicates,
+            "skipped": self.skipped,
+        }
+
+    @property
+    def status(self):
+        s = self.stats()
+        return (f"{s['fps']:.1f} fps  work {s['work_ms']:.1f} ms  idle {s['idle_ratio'] * 100:.0f}%  "
+                f"dup {s['duplicates']}  skip {s['skipped']}")
+
+    def close(self):
+        self._stop = True
+        if self.live:
+            self._thread.join(timeout=1)
+        print(f"[PACER] {self.status}")
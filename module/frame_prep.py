@@ -0,0 +1,58 @@
+# frame_prep.py
+import cv2
+
+
+class FramePrep:
+    """
+    Per-frame preprocessing shared by all consumers (hand tracking, segmentation, PIP, motion).
+    Color conversions and downscaled versions are built lazily, at most once per frame:
+    - get(kind, size): "bgr" / "rgb" / "gray" image at size (w, h) (default: full resolution)
+    - pyramid(level):  size halved `level` times
+    Downscaled BGR images are resized from the smallest cached BGR image that is still
+    large enough; RGB/gray are converted from the BGR image of the same size, so a small
+    RGB version never needs a full resolution conversion.
+    """
+
+    _CONVERT = {"rgb": cv2.COLOR_BGR2RGB, "gray": cv2.COLOR_BGR2GRAY}
+
+    def __init__(self, frame):
+        self.frame = frame
+        h, w = frame.shape[:2]
+        self.size = (w, h)
+        self._cache = {("bgr", self.size): frame}
+
+    def get(self, kind="bgr", size=None):
+        size = tuple(size) if size is not None else self.size
+        img = self._cache.get((kind, size))
+        if img is None:
+            img = self._build(kind, size)
+            self._cache[(kind, size)] = img
+        return img
+
+    def rgb(self, size=None):
+        return self.get("rgb", size)
+
+    def gray(self, size=None):
+        return self.get("gray", size)
+
+    def pyramid_size(self, level):
+        w, h = self.size
+        return (max(w >> level, 1), max(h >> level, 1))
+
+    def pyramid(self, level, kind="bgr"):
+        return self.get(kind, self.pyramid_size(level))
+
+    def nearest(self, kind, size):
+        """Smallest already computed image of `kind` at least `size` (w, h), or None."""
+        best = None
+        for (k, (w, h)), img in self._cache.items():
+            if k == kind and w >= size[0] and h >= size[1]:
+                if best is None or w * h < best.shape[0] * best.shape[1]:
+                    best = img
+        return best
+
+    def _build(self, kind, size):
+        if kind == "bgr":
+            return cv2.resize(self.nearest("bgr", size), size, interpolation=cv2.INTER_LINEAR)
+        # Convert at the target size (resize first, convert the smaller image)
+        return cv2.cvtColor(self.get("bgr", size), self._CONVERT[kind])
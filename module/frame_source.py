@@ -0,0 +1,204 @@
+# frame_source.py
+import os
+import glob
+import time
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+
+class FrameSource(ABC):
+    """
+    Base class for camera/video/test inputs.
+    read() returns (ok, frame, timestamp):
+        - frame: BGR uint8 image of exactly (height, width), mirrored if requested
+        - timestamp: capture time in seconds (monotonic clock for live sources,
+          media time for files/sequences/synthetic)
+    Mirroring and scaling are done in a single pass (or skipped when not needed).
+    """
+
+    def __init__(self, width, height, mirror=True):
+        self.width = width
+        self.height = height
+        self.mirror = mirror
+        self.native_size = None   # (w, h) delivered by the source
+        self.fps = 0.0
+        self._map = None          # Cached warp for (native size -> output size)
+
+    def is_opened(self):
+        return True
+
+    @abstractmethod
+    def read(self):
+        """Returns (ok, frame, timestamp)."""
+
+    def release(self):
+        pass
+
+    # ---- Shared flip/resize ----
+    def _prepare(self, frame):
+        """Mirror and scale `frame` to the output size with at most one full-frame pass."""
+        h, w = frame.shape[:2]
+        if (w, h) != self.native_size:
+            self.native_size = (w, h)
+            self._map = None
+            if (w, h) != (self.width, self.height):
+                print(f"[SRC] native {w}x{h} -> {self.width}x{self.height}")
+
+        if (w, h) == (self.width, self.height):
+            return cv2.flip(frame, 1) if self.mirror else frame
+
+        if not self.mirror:
+            return cv2.resize(frame, (self.width, self.height))
+
+        if self._map is None:
+            # Mirror + scale as one affine map (pixel-center aligned, like cv2.resize)
+            sx, sy = self.width / w, self.height / h
+            self._map = np.float32([
+                [-sx, 0, (w - 0.5) * sx - 0.5],
+                [0, sy, 0.5 * sy - 0.5],
+            ])
+        return cv2.warpAffine(
+            frame, self._map, (self.width, self.height),
+            flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE,
+        )
+
+
+class WebcamSource(FrameSource):
+    """Live camera. Requests the output resolution and uses what the driver actually delivers."""
+
+    def __init__(self, index=0, width=1280, height=720, mirror=True):
+        super().__init__(width, height, mirror)
+        self.cap = cv2.VideoCapture(index)
+        if self.cap.isOpened():
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            self.native_size = (
+                int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            )
+            self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+            print(f"[SRC] camera {index}: {self.native_size[0]}x{self.native_size[1]} @ {self.fps:.0f}fps")
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        ret, frame = self.cap.read()
+        ts = time.monotonic()
+        if not ret:
+            return False, None, ts
+        return True, self._prepare(frame), ts
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    """Pre-recorded video file. Timestamps are the media position."""
+
+    def __init__(self, path, width=1280, height=720, mirror=True):
+        super().__init__(width, height, mirror)
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self._index = 0
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        ret, frame = self.cap.read()
+        ts = self._index / self.fps
+        if not ret:
+            return False, None, ts
+        self._index += 1
+        return True, self._prepare(frame), ts
+
+    def seek(self, index):
+        """Jump to frame `index` (used to split a file into chunks)."""
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        self._index = index
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageSequenceSource(FrameSource):
+    """Directory (or glob pattern) of images, read in name order at a nominal fps."""
+
+    IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+    def __init__(self, pattern, width=1280, height=720, mirror=True, fps=30.0):
+        super().__init__(width, height, mirror)
+        if os.path.isdir(pattern):
+            files = [os.path.join(pattern, f) for f in os.listdir(pattern)]
+        else:
+            files = glob.glob(pattern)
+        self.files = sorted(f for f in files if f.lower().endswith(self.IMAGE_EXTS))
+        self.fps = fps
+        self._index = 0
+
+    def is_opened(self):
+        return len(self.files) > 0
+
+    def read(self):
+        ts = self._index / self.fps
+        if self._index >= len(self.files):
+            return False, None, ts
+        frame = cv2.imread(self.files[self._index])
+        self._index += 1
+        if frame is None:
+            return False, None, ts
+        return True, self._prepare(frame), ts
+
+
+class SyntheticSource(FrameSource):
+    """
+    Deterministic generated frames (no camera needed): a gradient backdrop
+    with a moving bright disc. `frames` limits the length (None = endless).
+    """
+
+    def __init__(self, width=1280, height=720, mirror=False, fps=30.0, frames=None):
+        super().__init__(width, height, mirror)
+        self.fps = fps
+        self.frames = frames
+        self._index = 0
+        ramp = np.linspace(40, 200, width, dtype=np.float32).astype(np.uint8)
+        self._backdrop = np.dstack([
+            np.broadcast_to(ramp, (height, width)),
+            np.full((height, width), 60, np.uint8),
+            np.broadcast_to(ramp[::-1], (height, width)),
+        ])
+        self.native_size = (width, height)
+
+    def read(self):
+        ts = self._index / self.fps
+        if self.frames is not None and self._index >= self.frames:
+            return False, None, ts
+        frame = self._backdrop.copy()
+        t = self._index / self.fps
+        cx = int(self.width * (0.5 + 0.35 * np.cos(t)))
+        cy = int(self.height * (0.5 + 0.35 * np.sin(2 * t)))
+        cv2.circle(frame, (cx, cy), max(self.height // 20, 4), (230, 230, 230), -1)
+        self._index += 1
+        return True, self._prepare(frame), ts
+
+
+def open_source(spec=0, width=1280, height=720, mirror=True):
+    """
+    Create a FrameSource from a spec:
+        int / digit string  -> webcam index
+        "synthetic"         -> SyntheticSource
+        directory / glob    -> ImageSequenceSource
+        anything else       -> VideoFileSource
+    """
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return WebcamSource(int(spec), width, height, mirror)
+    if spec == "synthetic":
+        return SyntheticSource(width, height, mirror=False)
+    if os.path.isdir(spec) or any(ch in spec for ch in "*?["):
+        return ImageSequenceSource(spec, width, height, mirror)
+    return VideoFileSource(spec, width, height, mirror)
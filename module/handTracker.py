@@ -1,39 +1,115 @@
 import cv2
-import mediapipe as mp
 import math
+import itertools
 import numpy as np
 from collections import deque
 
+from .inference_backends import make_hand_backend
+
+# Landmark indices (MediaPipe hand model)
+THUMB_TIP = 4
+INDEX_FINGER_TIP = 8
+
+
+class HandIdentities:
+    """
+    Stable hand slots across frames (multi-hand tracking: each slot has its own pen and stroke).
+    Detections are matched to slots by the distance of the hand center (wrist / middle finger base,
+    normalized coordinates) to the slot's last position; a free slot costs `max_jump`, so a hand
+    that moved further than that is treated as a new hand. The handedness label reported by the
+    model adds `label_cost` on a mismatch, which keeps the identities when both hands cross.
+    A slot is kept for `keep_frames` frames after its hand was last seen (short dropouts).
+    """
+
+    def __init__(self, max_hands=2, keep_frames=10, max_jump=0.3, label_cost=0.15):
+        self.max_hands = max_hands
+        self.keep_frames = keep_frames
+        self.max_jump = max_jump
+        self.label_cost = label_cost
+        self._pos = [None] * max_hands
+        self._label = [None] * max_hands
+        self._missing = [0] * max_hands
+
+    def _cost(self, slot, center, label):
+        pos = self._pos[slot]
+        if pos is None:
+            return self.max_jump + slot * 1e-3      # Free slot (lower slots first)
+        cost = math.hypot(center[0] - pos[0], center[1] - pos[1])
+        if label is not None and self._label[slot] is not None and label != self._label[slot]:
+            cost += self.label_cost
+        return cost
+
+    def assign(self, hands, labels=None):
+        """hands: list of (21, 3) landmarks, labels: handedness per hand (or None) -> slot per hand"""
+        hands = hands[:self.max_hands]
+        labels = list(labels or [])[:len(hands)]
+        labels += [None] * (len(hands) - len(labels))
+        centers = [(float(h[[0, 9], 0].mean()), float(h[[0, 9], 1].mean())) for h in hands]
+
+        # At most 2 hands: trying every assignment is cheaper than anything clever
+        best, best_cost = (), math.inf
+        for slots in itertools.permutations(range(self.max_hands), len(hands)):
+            cost = sum(self._cost(s, c, l) for s, c, l in zip(slots, centers, labels))
+            if cost < best_cost:
+                best, best_cost = slots, cost
+
+        for slot in range(self.max_hands):
+            if slot in best:
+                i = best.index(slot)
+                self._pos[slot] = centers[i]
+                self._label[slot] = labels[i] or self._label[slot]
+                self._missing[slot] = 0
+            elif self._pos[slot] is not None:
+                self._missing[slot] += 1
+                if self._missing[slot] > self.keep_frames:
+                    self._pos[slot] = self._label[slot] = None
+        return list(best)
+
 
 class HandTracker:
     """
     Detects fingers and returns the current mode and coordinates.
+    max_hands > 1: one inference tracks several hands; get_gestures() returns a result per stable
+    hand slot (HandIdentities), each with its own coordinate smoothing.
     """
 
-    def __init__(self, history_len=5, draw_thresh=30, erase_thresh=150):
-        # Initialize MediaPipe Hands
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            model_complexity=1,
-            max_num_hands=1,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5,
-        )
+    def __init__(self, history_len=5, draw_thresh=30, erase_thresh=150, backend="mediapipe", max_hands=1):
+        # Landmark backend (default: MediaPipe Hands, model_complexity=1); spec string or instance
+        self.backend = make_hand_backend(backend, max_hands) if isinstance(backend, str) else backend
+        self.max_hands = max_hands
+        self.identities = HandIdentities(max_hands)
 
-        self.point_history = deque(maxlen=history_len)
+        self.histories = [deque(maxlen=history_len) for _ in range(max_hands)]
+        self.point_history = self.histories[0]
         self.draw_threshold = draw_thresh
         self.erase_threshold = erase_thresh
         self.frame_width = 0
         self.frame_height = 0
+        self.last_landmarks = None  # (21, 3) normalized landmarks of the first tracked hand
+        self.last_hands = []        # (slot, landmarks) of every tracked hand
 
-    def get_gesture(self, frame):
+    def get_gesture(self, frame, rgb=None):
         """
         Takes a frame as input and returns mode, coordinates, and a debug frame.
+        rgb: RGB version of the frame if already available (e.g. from FramePrep)
+        (first tracked hand only, see get_gestures)
+        """
+        results, debug_frame = self.get_gestures(frame, rgb)
+        for mode, point in results:
+            if mode != "none":
+                return mode, point, debug_frame
+        return "none", (-1, -1), debug_frame
+
+    def get_gestures(self, frame, rgb=None):
+        """
+        All hands of one inference.
+        Returns ([(mode, point)] per hand slot ("none", (-1, -1) if that hand is not seen), debug frame)
         """
 
         # Process frame
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(rgb)
+        if rgb is None:
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        hands = self.backend.process(rgb)[:self.max_hands]
 
         # Copy frame for debugging
         debug_frame = frame.copy()
@@ -42,56 +118,62 @@ class HandTracker:
         if self.frame_width == 0:
             self.frame_height, self.frame_width, _ = frame.shape
 
-        # Hand detection
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                # Extract landmarks (thumb tip, index finger tip)
-                lm_4 = hand_landmarks.landmark[self.mp_hands.HandLandmark.THUMB_TIP]
-                lm_8 = hand_landmarks.landmark[
-                    self.mp_hands.HandLandmark.INDEX_FINGER_TIP
-                ]
-
-                # Generate coordinates (based on original frame)
-                lm_4_x = int(lm_4.x * self.frame_width)
-                lm_4_y = int(lm_4.y * self.frame_height)
-                lm_8_x = int(lm_8.x * self.frame_width)
-                lm_8_y = int(lm_8.y * self.frame_height)
-
-                # Calculate distance
-                distance = math.hypot(lm_8_x - lm_4_x, lm_8_y - lm_4_y)
-
-                # Coordinate smoothing (based on index finger)
-                self.point_history.append((lm_8_x, lm_8_y))
-                smooth_x = int(np.mean([pt[0] for pt in self.point_history]))
-                smooth_y = int(np.mean([pt[1] for pt in self.point_history]))
-                current_pt = (smooth_x, smooth_y)
-
-                # Visualization for debugging
-                cv2.circle(
-                    debug_frame, (smooth_x, smooth_y), 12, (255, 100, 0), 2
-                )  # Cursor
-                cv2.putText(
-                    debug_frame,
-                    f"{distance:.0f}",
-                    (lm_8_x, lm_8_y - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.7,
-                    (0, 255, 0),
-                    2,
-                )
-
-                # Return mode
-                if distance >= self.erase_threshold:
-                    return "erase", current_pt, debug_frame
-                elif distance <= self.draw_threshold:
-                    return "draw", current_pt, debug_frame
-                else:
-                    return "move", current_pt, debug_frame  # 'move' is for cursor movement
-
-        # Hand not detected
-        self.point_history.clear()
-        return "none", (-1, -1), debug_frame
+        results = [("none", (-1, -1))] * self.max_hands
+        slots = self.identities.assign(hands, getattr(self.backend, "last_handedness", None))
+        self.last_hands = sorted(zip(slots, hands), key=lambda sh: sh[0])
+        for slot, hand_landmarks in self.last_hands:
+            results[slot] = self._hand_gesture(hand_landmarks, self.histories[slot], debug_frame)
+
+        # Hand not detected: its smoothing starts over
+        for slot in range(self.max_hands):
+            if results[slot][0] == "none":
+                self.histories[slot].clear()
+        self.last_landmarks = self.last_hands[0][1] if self.last_hands else None
+        return results, debug_frame
+
+    def _hand_gesture(self, hand_landmarks, point_history, debug_frame):
+        """Mode and smoothed index finger point of one hand"""
+        # Extract landmarks (thumb tip, index finger tip)
+        lm_4 = hand_landmarks[THUMB_TIP]
+        lm_8 = hand_landmarks[INDEX_FINGER_TIP]
+
+        # Generate coordinates (based on original frame)
+        lm_4_x = int(lm_4[0] * self.frame_width)
+        lm_4_y = int(lm_4[1] * self.frame_height)
+        lm_8_x = int(lm_8[0] * self.frame_width)
+        lm_8_y = int(lm_8[1] * self.frame_height)
+
+        # Calculate distance
+        distance = math.hypot(lm_8_x - lm_4_x, lm_8_y - lm_4_y)
+
+        # Coordinate smoothing (based on index finger)
+        point_history.append((lm_8_x, lm_8_y))
+        smooth_x = int(np.mean([pt[0] for pt in point_history]))
+        smooth_y = int(np.mean([pt[1] for pt in point_history]))
+        current_pt = (smooth_x, smooth_y)
+
+        # Visualization for debugging
+        cv2.circle(
+            debug_frame, (smooth_x, smooth_y), 12, (255, 100, 0), 2
+        )  # Cursor
+        cv2.putText(
+            debug_frame,
+            f"{distance:.0f}",
+            (lm_8_x, lm_8_y - 10),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.7,
+            (0, 255, 0),
+            2,
+        )
+
+        # Return mode
+        if distance >= self.erase_threshold:
+            return "erase", current_pt
+        elif distance <= self.draw_threshold:
+            return "draw", current_pt
+        else:
+            return "move", current_pt  # 'move' is for cursor movement
 
     def close(self):
-        self.hands.close()
+        self.backend.close()
         print("HandTracker resources released.")
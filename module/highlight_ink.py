@@ -0,0 +1,179 @@
+# highlight_ink.py
+import cv2
+import numpy as np
+
+
+class HighlightLayer:
+    """
+    Translucent (highlighter) ink of one page, kept next to its opaque canvas.
+    - index: (h, w) uint8 plane, 0 = no highlight, k = palette entry k (1 byte per pixel)
+    - palette: up to 255 (B, G, R, alpha) entries. Crossing strokes of one pen keep its alpha
+      (no darkening, like a real highlighter); where different pens cross, the last one wins.
+    - blend(): 8-bit fixed-point alpha blend, only in the TILE x TILE tiles that contain highlight
+      (runs of occupied tiles in a tile row are blended as one slab). With a constant color and
+      alpha, the blend of each entry is a per-channel function of the pixel value, so it is
+      precomputed as an integer 256-entry table and applied with cv2.LUT + a masked copy.
+    Highlight is drawn under the opaque ink of the page.
+    """
+
+    TILE = 64
+
+    def __init__(self, width, height):
+        self.index = np.zeros((height, width), np.uint8)
+        self.palette = []
+        self.version = 0
+        self._luts = [None]         # Per entry: (256, 1, 3) uint8 blend table
+        self._occ = np.zeros(self._grid(width, height), bool)
+        self._occ_stale = False
+        self._view_key = None
+        self._view = None
+
+    @classmethod
+    def _grid(cls, width, height):
+        return (-(-height // cls.TILE), -(-width // cls.TILE))
+
+    # =======================================================
+    #  Drawing
+    # =======================================================
+    def entry(self, color, alpha):
+        """Palette index of (color, alpha); the closest entry when the palette is full."""
+        a = min(max(int(round(alpha * 255)), 1), 255)
+        key = (*(int(c) for c in color), a)
+        if key in self.palette:
+            return self.palette.index(key) + 1
+        if len(self.palette) >= 255:
+            dist = [sum((p - k) ** 2 for p, k in zip(e, key)) for e in self.palette]
+            return int(np.argmin(dist)) + 1
+        self.palette.append(key)
+        # out = (v * (256 - a) + color * a + 128) >> 8, alpha scaled to 0..256
+        a256 = a + (a >> 7)
+        v = np.arange(256, dtype=np.uint32)[:, None]
+        table = (v * (256 - a256) + np.array(key[:3], np.uint32) * a256 + 128) >> 8
+        self._luts.append(table.astype(np.uint8).reshape(256, 1, 3))
+        return len(self.palette)
+
+    def line(self, p0, p1, color, alpha, thickness):
+        cv2.line(self.index, p0, p1, self.entry(color, alpha), thickness)
+        self._mark(np.array([p0, p1]), thickness)
+
+    def polyline(self, pts, color, alpha, thickness):
+        if not pts:
+            return
+        k = self.entry(color, alpha)
+        if len(pts) == 1:
+            cv2.line(self.index, pts[0], pts[0], k, thickness)
+        else:
+            cv2.polylines(self.index, [np.array(pts, np.int32)], False, k, thickness)
+        self._mark(np.array(pts), thickness)
+
+    def erase_line(self, p0, p1, thickness):
+        cv2.line(self.index, p0, p1, 0, thickness)
+        self.version += 1
+        self._occ_stale = True
+
+    def clear(self):
+        self.index.fill(0)
+        self.palette.clear()
+        del self._luts[1:]
+        self._occ[:] = False
+        self._occ_stale = False
+        self.version += 1
+
+    def _mark(self, pts, thickness):
+        """Tiles touched by a stroke become occupied (the exact grid is rebuilt after erasing)."""
+        r = thickness // 2 + 1
+        t = self.TILE
+        x0, y0 = (np.maximum(pts.min(axis=0) - r, 0) // t)
+        x1, y1 = (pts.max(axis=0) + r) // t
+        self._occ[y0:y1 + 1, x0:x1 + 1] = True
+        self.version += 1
+
+    # =======================================================
+    #  Compositing
+    # =======================================================
+    @classmethod
+    def occupancy(cls, index):
+        """Tiles of `index` with any highlight (bool grid)."""
+        h, w = index.shape
+        rows = np.maximum.reduceat(index, np.arange(0, h, cls.TILE), axis=0)
+        return np.maximum.reduceat(rows, np.arange(0, w, cls.TILE), axis=1) > 0
+
+    def tiles(self):
+        if self._occ_stale:
+            self._occ = self.occupancy(self.index)
+            self._occ_stale = False
+        return self._occ
+
+    def any(self):
+        return bool(self.tiles().any())
+
+    def copy(self):
+        """Independent snapshot of the layer (e.g. for a background export)."""
+        h, w = self.index.shape
+        layer = HighlightLayer(w, h)
+        layer.index = self.index.copy()
+        layer.palette = list(self.palette)
+        layer._luts = list(self._luts)
+        layer._occ = self.tiles().copy()
+        return layer
+
+    def for_view(self, m, size, view_key):
+        """(index, occupancy) as seen through the view affine `m` (None = identity), cached per view."""
+        if m is None:
+            return self.index, self.tiles()
+        key = (self.version, view_key, size)
+        if key != self._view_key:
+            self._view_key = key
+            # Palette indices must not be interpolated
+            index = cv2.warpAffine(self.index, m, size, flags=cv2.INTER_NEAREST,
+                                   borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+            self._view = (index, self.occupancy(index))
+        return self._view
+
+    def blend(self, out, index=None, occ=None, keep=None):
+        """
+        Blend the highlight over `out` (BGR, same size as index) in place.
+        keep: optional uint8 mask, 0 where out must not change (opaque ink on top of the highlight).
+        """
+        if index is None:
+            index, occ = self.index, self.tiles()
+        elif occ is None:
+            occ = self.occupancy(index)
+        t = self.TILE
+        for ty in np.flatnonzero(occ.any(axis=1)):
+            row = occ[ty]
+            # Runs of consecutive occupied tiles -> one slab each
+            edges = np.flatnonzero(np.diff(np.concatenate(([False], row, [False])).astype(np.int8)))
+            for tx0, tx1 in zip(edges[::2], edges[1::2]):
+                ys, xs = slice(ty * t, (ty + 1) * t), slice(tx0 * t, tx1 * t)
+                idx = index[ys, xs]
+                dst = out[ys, xs]
+                for k in range(1, len(self._luts)):
+                    mask = cv2.compare(idx, k, cv2.CMP_EQ)
+                    if keep is not None:
+                        cv2.bitwise_and(mask, keep[ys, xs], dst=mask)
+                    if cv2.countNonZero(mask):
+                        cv2.copyTo(cv2.LUT(dst, self._luts[k]), mask, dst)
+
+    # =======================================================
+    #  Storage (BGRA: palette color + alpha, 0 alpha = no highlight)
+    # =======================================================
+    def to_bgra(self):
+        table = np.zeros((256, 4), np.uint8)
+        if self.palette:
+            table[1:len(self.palette) + 1] = self.palette
+        return table[self.index]
+
+    @classmethod
+    def from_bgra(cls, bgra):
+        h, w = bgra.shape[:2]
+        layer = cls(w, h)
+        packed = bgra.astype(np.uint32)
+        packed = packed[..., 0] << 24 | packed[..., 1] << 16 | packed[..., 2] << 8 | packed[..., 3]
+        has = bgra[..., 3] > 0
+        keys, inverse = np.unique(packed[has], return_inverse=True)
+        for k in keys[:255]:
+            layer.entry(((k >> 24) & 255, (k >> 16) & 255, (k >> 8) & 255), (k & 255) / 255)
+        layer.index[has] = np.minimum(inverse + 1, 255).astype(np.uint8)
+        layer._occ = cls.occupancy(layer.index)
+        return layer
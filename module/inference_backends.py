@@ -0,0 +1,280 @@
+# inference_backends.py
+"""
+CPU inference backends behind HandTracker (hand landmarks) and UserMaskManager (person segmentation).
+
+Hand backends:        process(rgb) -> list of (21, 3) float32 arrays, normalized (x, y, z)
+                      (optional .last_handedness: "Left"/"Right" per hand of the last call)
+Segmentation backends: process(rgb) -> float32 (h, w) foreground probability in [0, 1]
+
+Specs (used by --hand-backend / --seg-backend):
+    mediapipe[:complexity]                 Hands, model_complexity 0 or 1 (default 1)
+    onnx:<model.onnx>[:threads]            ONNX Runtime
+    opencv:<model.onnx>[:threads]          OpenCV DNN
+    mediapipe[:model]                      Selfie Segmentation, 0 = general (256x256), 1 = landscape (144x256)
+
+ONNX models are expected in MediaPipe's layout (NHWC float input in [0, 1]):
+    segmentation: 1 output, foreground probability map
+    hand landmarks: 224x224 crop input, output 0 = 63 coordinates in input pixels,
+                    output 1 = hand presence score. Detection (no hand tracked yet) uses
+                    MediaPipe Hands (complexity 0); the ONNX model then tracks the hand crop.
+"""
+import time
+
+import cv2
+import numpy as np
+import mediapipe as mp
+
+
+# =======================================================
+#  Model runners (ONNX Runtime / OpenCV DNN)
+# =======================================================
+class _OnnxRunner:
+    def __init__(self, model_path, runtime="onnx", threads=0):
+        self.runtime = runtime
+        if runtime == "onnx":
+            try:
+                import onnxruntime as ort
+            except ImportError:
+                raise ImportError("onnx backend requires 'onnxruntime' (pip install onnxruntime)")
+            opts = ort.SessionOptions()
+            if threads:
+                opts.intra_op_num_threads = threads
+            self.session = ort.InferenceSession(
+                model_path, sess_options=opts, providers=["CPUExecutionProvider"]
+            )
+            inp = self.session.get_inputs()[0]
+            self.input_name = inp.name
+            shape = inp.shape
+        else:
+            if threads:
+                cv2.setNumThreads(threads)  # Note: process-wide setting in OpenCV
+            self.net = cv2.dnn.readNet(model_path)
+            self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+            self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+            shape = None
+
+        # NHWC input size (h, w) if the model declares it
+        self.input_hw = None
+        if shape is not None and len(shape) == 4 and all(isinstance(d, int) for d in shape[1:3]):
+            self.input_hw = (shape[1], shape[2])
+
+    def run(self, nhwc):
+        """nhwc: float32 (1, h, w, 3) -> list of outputs"""
+        if self.runtime == "onnx":
+            return self.session.run(None, {self.input_name: nhwc})
+        self.net.setInput(nhwc)
+        return self.net.forward(self.net.getUnconnectedOutLayersNames())
+
+
+# =======================================================
+#  Hand landmark backends
+# =======================================================
+class MediaPipeHandsBackend:
+    name = "mediapipe"
+
+    def __init__(self, model_complexity=1, max_num_hands=1,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5):
+        self.model_complexity = model_complexity
+        self.hands = mp.solutions.hands.Hands(
+            model_complexity=model_complexity,
+            max_num_hands=max_num_hands,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+        )
+        self.max_num_hands = max_num_hands
+        self.last_handedness = []
+
+    def describe(self):
+        hands = f", {self.max_num_hands} hands" if self.max_num_hands > 1 else ""
+        return f"mediapipe hands (complexity {self.model_complexity}{hands})"
+
+    def process(self, rgb):
+        results = self.hands.process(rgb)
+        if not results.multi_hand_landmarks:
+            self.last_handedness = []
+            return []
+        self.last_handedness = [h.classification[0].label for h in results.multi_handedness or []]
+        return [
+            np.array([(lm.x, lm.y, lm.z) for lm in hand.landmark], dtype=np.float32)
+            for hand in results.multi_hand_landmarks
+        ]
+
+    def close(self):
+        self.hands.close()
+
+
+class OnnxHandsBackend:
+    """ONNX hand landmark model tracking a crop around the previous hand (MediaPipe re-detects)."""
+    name = "onnx"
+
+    def __init__(self, model_path, runtime="onnx", threads=0, presence_threshold=0.5):
+        self.model_path = model_path
+        self.runner = _OnnxRunner(model_path, runtime, threads)
+        self.input_hw = self.runner.input_hw or (224, 224)
+        self.presence_threshold = presence_threshold
+        self.detector = MediaPipeHandsBackend(model_complexity=0)
+        self.threads = threads
+        self._roi = None  # (x, y, size) in frame pixels
+
+    def describe(self):
+        return f"{self.runner.runtime} hands ({self.model_path}, threads={self.threads or 'auto'})"
+
+    def _roi_from(self, lm, w, h):
+        xs, ys = lm[:, 0] * w, lm[:, 1] * h
+        cx, cy = (xs.min() + xs.max()) / 2, (ys.min() + ys.max()) / 2
+        size = max(xs.max() - xs.min(), ys.max() - ys.min()) * 2.0
+        return (cx - size / 2, cy - size / 2, max(size, 32))
+
+    def process(self, rgb):
+        h, w = rgb.shape[:2]
+        if self._roi is None:
+            hands = self.detector.process(rgb)
+            if not hands:
+                return []
+            self._roi = self._roi_from(hands[0], w, h)
+            return hands
+
+        x, y, size = self._roi
+        ih, iw = self.input_hw
+        # Affine crop (handles ROIs partly outside the frame)
+        m = np.float32([[iw / size, 0, -x * iw / size], [0, ih / size, -y * ih / size]])
+        crop = cv2.warpAffine(rgb, m, (iw, ih), borderMode=cv2.BORDER_CONSTANT)
+        outputs = self.runner.run(crop[None].astype(np.float32) / 255.0)
+
+        presence = float(np.ravel(outputs[1])[0]) if len(outputs) > 1 else 1.0
+        if presence < self.presence_threshold:
+            self._roi = None
+            return []
+
+        pts = np.ravel(outputs[0])[:63].reshape(21, 3).astype(np.float32)
+        lm = np.empty_like(pts)
+        lm[:, 0] = (pts[:, 0] * size / iw + x) / w
+        lm[:, 1] = (pts[:, 1] * size / ih + y) / h
+        lm[:, 2] = pts[:, 2] / iw
+        self._roi = self._roi_from(lm, w, h)
+        return [lm]
+
+    def close(self):
+        self.detector.close()
+
+
+# =======================================================
+#  Segmentation backends
+# =======================================================
+class MediaPipeSegmentationBackend:
+    name = "mediapipe"
+
+    def __init__(self, model=1):
+        # cvzone wrapper around MediaPipe Selfie Segmentation
+        from cvzone.SelfiSegmentationModule import SelfiSegmentation
+        self.model = model
+        self.segmentor = SelfiSegmentation(model=model)
+
+    def describe(self):
+        return f"mediapipe selfie ({'landscape' if self.model == 1 else 'general'})"
+
+    def process(self, rgb):
+        results = self.segmentor.selfieSegmentation.process(rgb)
+        return results.segmentation_mask
+
+    def close(self):
+        if hasattr(self.segmentor, "selfieSegmentation"):
+            self.segmentor.selfieSegmentation.close()
+
+
+class OnnxSegmentationBackend:
+    name = "onnx"
+
+    def __init__(self, model_path, runtime="onnx", threads=0, input_hw=(144, 256)):
+        self.model_path = model_path
+        self.runner = _OnnxRunner(model_path, runtime, threads)
+        self.input_hw = self.runner.input_hw or input_hw
+        self.threads = threads
+
+    def describe(self):
+        return f"{self.runner.runtime} segmentation ({self.model_path}, threads={self.threads or 'auto'})"
+
+    def process(self, rgb):
+        h, w = rgb.shape[:2]
+        ih, iw = self.input_hw
+        blob = cv2.resize(rgb, (iw, ih), interpolation=cv2.INTER_AREA)
+        out = self.runner.run(blob[None].astype(np.float32) / 255.0)[0]
+        prob = np.squeeze(out).astype(np.float32)
+        if prob.ndim == 3:  # (h, w, 2) background/foreground scores
+            prob = prob[..., -1]
+        return cv2.resize(prob, (w, h), interpolation=cv2.INTER_LINEAR)
+
+    def close(self):
+        pass
+
+
+# =======================================================
+#  Factories and benchmark
+# =======================================================
+def _parse(spec):
+    parts = spec.split(":")
+    kind = parts[0]
+    if kind in ("onnx", "opencv"):
+        if len(parts) < 2:
+            raise ValueError(f"'{spec}': model path required ({kind}:<model.onnx>[:threads])")
+        threads = 0
+        if len(parts) > 2 and parts[-1].isdigit():
+            threads = int(parts.pop())
+        return kind, ":".join(parts[1:]), threads  # Model path may contain ':' (drive letters)
+    if kind == "mediapipe":
+        return kind, int(parts[1]) if len(parts) > 1 else None, 0
+    raise ValueError(f"unknown backend '{spec}'")
+
+
+def make_hand_backend(spec="mediapipe", max_hands=1):
+    kind, arg, threads = _parse(spec)
+    if kind == "mediapipe":
+        return MediaPipeHandsBackend(model_complexity=1 if arg is None else arg, max_num_hands=max_hands)
+    if max_hands > 1:
+        print(f"[HAND] '{spec}' tracks one hand (crop tracking); use mediapipe for {max_hands} hands")
+    return OnnxHandsBackend(arg, runtime=kind, threads=threads)
+
+
+def make_seg_backend(spec="mediapipe"):
+    kind, arg, threads = _parse(spec)
+    if kind == "mediapipe":
+        return MediaPipeSegmentationBackend(model=1 if arg is None else arg)
+    return OnnxSegmentationBackend(arg, runtime=kind, threads=threads)
+
+
+def benchmark_backends(frames, hand_specs, seg_specs, seg_size=(320, 180)):
+    """
+    Time every backend on the same frames and print them ranked by mean latency.
+    Hand backends get full resolution frames, segmentation backends seg_size frames
+    (as in VirtualBlackboard.update).
+    """
+    rgb_full = [cv2.cvtColor(f, cv2.COLOR_BGR2RGB) for f in frames]
+    rgb_small = [cv2.resize(f, seg_size) for f in rgb_full]
+    rows = []
+    for kind, specs, factory, inputs in (
+        ("hand", hand_specs, make_hand_backend, rgb_full),
+        ("seg", seg_specs, make_seg_backend, rgb_small),
+    ):
+        for spec in specs:
+            try:
+                backend = factory(spec)
+            except Exception as e:
+                print(f"[BENCH] {kind} '{spec}' skipped: {e}")
+                continue
+            backend.process(inputs[0])  # Warm-up
+            times = []
+            for img in inputs:
+                t0 = time.perf_counter()
+                backend.process(img)
+                times.append((time.perf_counter() - t0) * 1000)
+            rows.append((kind, backend.describe(), float(np.mean(times)), float(np.percentile(times, 95))))
+            backend.close()
+
+    for kind in ("hand", "seg"):
+        ranked = sorted((r for r in rows if r[0] == kind), key=lambda r: r[2])
+        if not ranked:
+            continue
+        print(f"\n[BENCH] {kind} backends ({len(frames)} frames)")
+        for rank, (_, desc, mean, p95) in enumerate(ranked, 1):
+            print(f"  {rank}. {desc:<60s} mean {mean:7.2f} ms   p95 {p95:7.2f} ms")
+    return rows
@@ -0,0 +1,590 @@
+# inference_workers.py
+"""
+Hand tracking and segmentation in separate worker processes (no GIL contention with rendering).
+
+Frames travel through a shared-memory ring buffer (RGB, one slot per frame in flight), and results
+come back through shared memory as well; the pipes only carry small job/result headers
+(slot, sequence number, hand count), never images or landmark arrays.
+
+    frames   (slots, height, width, 3)         uint8    written by the render process
+    hands    (slots, max_hands, 21, 3)         float32  written by the hand worker
+    masks    (slots, proc_height, proc_width)  uint8    written by the segmentation worker (0/255)
+
+Workers are supervised: a worker that dies or does not answer within `timeout` is restarted
+(the job is retried once on the new worker; the frame result is empty if that fails too).
+
+SessionInferencePool hosts the models of many blackboards (headless server) on a fixed number of
+processes instead: each session is pinned to one process (its tracking state stays there) and
+gets a PooledInference client with the same submit()/result() interface as InferenceWorkers,
+and its own frame ring of the same layout.
+"""
+import time
+import itertools
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+import numpy as np
+
+from .UserMaskManager import UserMaskManager
+
+
+class _SharedArray:
+    """numpy array backed by a named shared memory block"""
+
+    def __init__(self, shape, dtype, name=None):
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.owner = name is None
+        self.spec = (self.shm.name, shape, np.dtype(dtype).str)
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf)
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, dtype = spec
+        # Workers share the creator's resource tracker, so attaching does not add another owner
+        return cls(shape, dtype, name=name)
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# =======================================================
+#  Worker processes
+# =======================================================
+def _worker_main(kind, backend_spec, frames_spec, out_spec, proc_size, conn):
+    """Worker loop: job (slot, seq, threshold) -> result written to shared memory, header (seq, n) sent back"""
+    from .inference_backends import make_hand_backend, make_seg_backend
+
+    frames = _SharedArray.attach(frames_spec)
+    out = _SharedArray.attach(out_spec)
+    if kind == "hand":
+        # One inference for all hands the result array has room for
+        backend = make_hand_backend(backend_spec, max_hands=out.array.shape[1])
+    else:
+        backend = make_seg_backend(backend_spec)
+    conn.send(("ready", backend.describe()))
+    try:
+        while True:
+            job = conn.recv()
+            if job is None:
+                break
+            slot, seq, threshold = job
+            rgb = frames.array[slot]
+            if kind == "hand":
+                hands = backend.process(rgb)[:out.array.shape[1]]
+                for i, lm in enumerate(hands):
+                    out.array[slot, i] = lm
+                conn.send((seq, len(hands)))
+            else:
+                small = cv2.resize(rgb, proc_size, interpolation=cv2.INTER_LINEAR)
+                mask_float = backend.process(small)
+                if mask_float is None:
+                    out.array[slot] = 0
+                else:
+                    # Thresholding happens here, off the render process
+                    np.greater(mask_float, threshold, out=out.array[slot].view(bool))
+                    out.array[slot] *= 255
+                conn.send((seq, 1))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        backend.close()
+        frames.close()
+        out.close()
+
+
+class _Worker:
+    """One supervised worker process and its pipe"""
+
+    def __init__(self, ctx, kind, args):
+        self.ctx = ctx
+        self.kind = kind
+        self.args = args
+        self.restarts = 0
+        self.pending = None     # (slot, seq, threshold) of the job whose result will be collected
+        self.stale = {}         # seq -> slot of jobs whose results are no longer wanted (still running)
+        self._start()
+
+    def _start(self):
+        self.conn, child = self.ctx.Pipe()
+        self.proc = self.ctx.Process(
+            target=_worker_main, args=(self.kind, *self.args, child),
+            name=f"inference-{self.kind}", daemon=True,
+        )
+        self.proc.start()
+        child.close()
+        # Model loading can take a while on the first start
+        if not self.conn.poll(60):
+            raise RuntimeError(f"{self.kind} worker did not start")
+        _, desc = self.conn.recv()
+        print(f"[WORKERS] {self.kind} worker pid {self.proc.pid}: {desc}")
+
+    def restart(self, reason):
+        self.restarts += 1
+        print(f"[WORKERS] {self.kind} worker {reason}, restarting ({self.restarts})")
+        self.proc.kill()
+        self.proc.join(timeout=5)
+        self.conn.close()
+        self.stale.clear()
+        self._start()
+
+    def busy_slots(self):
+        slots = set(self.stale.values())
+        if self.pending is not None:
+            slots.add(self.pending[0])
+        return slots
+
+    def submit(self, slot, seq, threshold):
+        self.pending = (slot, seq, threshold)
+        self.conn.send(self.pending)
+
+    def abandon(self):
+        """The pending result is not needed anymore (the worker finishes it in the background)."""
+        if self.pending is not None:
+            self.stale[self.pending[1]] = self.pending[0]
+            self.pending = None
+
+    def _failure(self):
+        if self.proc.is_alive():
+            return "timed out"
+        self.proc.join(timeout=1)
+        return f"exited ({self.proc.exitcode})"
+
+    def _recv(self, timeout):
+        """Next result header, skipping abandoned jobs. Returns (seq, n) or None on timeout."""
+        deadline = time.perf_counter() + timeout
+        while self.conn.poll(max(deadline - time.perf_counter(), 0)):
+            seq, n = self.conn.recv()
+            if self.stale.pop(seq, None) is None:
+                return seq, n
+        return None
+
+    def drain(self, timeout):
+        """Wait for the abandoned jobs (their slots are needed again)."""
+        while self.stale:
+            try:
+                if not self.conn.poll(timeout):
+                    self.restart(self._failure())
+                    continue
+                seq, _ = self.conn.recv()
+                self.stale.pop(seq, None)
+            except (EOFError, OSError):
+                self.restart(self._failure())
+
+    def collect(self, timeout):
+        """Wait for the pending job; returns the result header count, or None if the worker failed twice."""
+        for attempt in range(2):
+            try:
+                header = self._recv(timeout)
+                if header is not None and header[0] == self.pending[1]:
+                    self.pending = None
+                    return header[1]
+            except (EOFError, OSError):
+                pass
+            self.restart(self._failure())
+            if attempt == 0:
+                self.conn.send(self.pending)
+        self.pending = None
+        return None
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.proc.join(timeout=2)
+        if self.proc.is_alive():
+            self.proc.kill()
+        self.conn.close()
+
+
+# =======================================================
+#  Pool (render process)
+# =======================================================
+class InferenceWorkers:
+    """
+    Supervised hand + segmentation worker processes fed from a shared-memory frame ring.
+    submit(rgb, hand, mask) starts both models on a frame (call it once per frame, before using
+    the proxies); the proxies returned by hand_backend() / mask_manager() collect the results.
+    A result that is never collected (e.g. tracking toggled off) does not block the next frame:
+    the worker finishes it into its own slot while the next frame goes into a free slot.
+    """
+
+    def __init__(self, width, height, proc_size, hand_backend="mediapipe", seg_backend="mediapipe",
+                 slots=3, max_hands=1, timeout=5.0):
+        self.width = width
+        self.height = height
+        self.proc_size = tuple(proc_size)
+        self.timeout = timeout
+        self.slots = slots
+
+        self.frames = _SharedArray((slots, height, width, 3), np.uint8)
+        self.hands = _SharedArray((slots, max_hands, 21, 3), np.float32)
+        self.masks = _SharedArray((slots, self.proc_size[1], self.proc_size[0]), np.uint8)
+
+        # spawn: workers must not inherit the render process' model/GUI state
+        ctx = mp.get_context("spawn")
+        self.workers = {
+            "hand": _Worker(ctx, "hand", (hand_backend, self.frames.spec, self.hands.spec, self.proc_size)),
+            "mask": _Worker(ctx, "seg", (seg_backend, self.frames.spec, self.masks.spec, self.proc_size)),
+        }
+        self._seq = itertools.count()
+        self._slot = -1
+        self.current_frame = None   # RGB frame in the current slot (identity, to detect a new frame)
+        self.wait_ms = {"hand": 0.0, "mask": 0.0}
+
+    def _write_frame(self, rgb):
+        if rgb is self.current_frame:
+            return
+        for worker in self.workers.values():
+            worker.abandon()
+        busy = set().union(*(w.busy_slots() for w in self.workers.values()))
+        free = [s for s in range(self.slots) if s not in busy]
+        if not free:
+            for worker in self.workers.values():
+                worker.drain(self.timeout)
+            free = list(range(self.slots))
+        # Next free slot after the current one (round robin)
+        self._slot = min(free, key=lambda s: (s - self._slot - 1) % self.slots)
+        dst = self.frames.array[self._slot]
+        if rgb.shape[:2] != (self.height, self.width):
+            cv2.resize(rgb, (self.width, self.height), dst=dst, interpolation=cv2.INTER_LINEAR)
+        else:
+            np.copyto(dst, rgb)
+        self.current_frame = rgb
+
+    def submit(self, rgb, hand=True, mask=True, threshold=0.62):
+        """Start the models on this frame (both run in parallel while the caller continues)."""
+        self._write_frame(rgb)
+        for kind, wanted in (("hand", hand), ("mask", mask)):
+            if wanted and self.workers[kind].pending is None:
+                self.workers[kind].submit(self._slot, next(self._seq), threshold)
+
+    def result(self, kind, rgb=None, threshold=0.62):
+        """Result of `kind` ("hand" / "mask") for the current frame; submits the job if it is not running yet."""
+        worker = self.workers[kind]
+        if rgb is not None and rgb is not self.current_frame:
+            self.submit(rgb, hand=False, mask=False)
+        if worker.pending is None:
+            if self.current_frame is None:
+                raise RuntimeError("InferenceWorkers: submit() a frame first")
+            worker.submit(self._slot, next(self._seq), threshold)
+        slot = worker.pending[0]
+        t0 = time.perf_counter()
+        n = worker.collect(self.timeout)
+        self.wait_ms[kind] = (time.perf_counter() - t0) * 1000
+        if kind == "hand":
+            return [self.hands.array[slot, i].copy() for i in range(n or 0)]
+        if n is None:
+            return np.zeros(self.masks.array.shape[1:], np.uint8)
+        return self.masks.array[slot].copy()
+
+    def hand_backend(self):
+        return _WorkerHandsBackend(self)
+
+    def mask_manager(self):
+        return WorkerUserMaskManager(self)
+
+    @property
+    def restarts(self):
+        return sum(w.restarts for w in self.workers.values())
+
+    def close(self):
+        for worker in self.workers.values():
+            worker.close()
+        self.frames.close()
+        self.hands.close()
+        self.masks.close()
+        print(f"[WORKERS] Closed ({self.restarts} restart(s))")
+
+
+# =======================================================
+#  Shared pool (many sessions, fixed number of processes)
+# =======================================================
+_pool_backends = {}     # (session key, kind) -> backend, in each pool process
+_pool_buffers = {}      # session key -> (frames, hands, masks) shared arrays, attached in each pool process
+
+
+def _pool_infer(key, kind, spec, buffers, slot, threshold):
+    """
+    Pool process: run the session's hand or segmentation model on frame `slot` of its shared ring
+    (models and attachments are created on first use). Like _worker_main, the result is written to
+    shared memory and only the hand count is returned.
+    """
+    from .inference_backends import make_hand_backend, make_seg_backend
+
+    shared = _pool_buffers.get(key)
+    if shared is None:
+        shared = _pool_buffers[key] = tuple(_SharedArray.attach(b) for b in buffers)
+    frames, hands, masks = shared
+    backend = _pool_backends.get((key, kind))
+    if backend is None:
+        if kind == "hand":
+            backend = make_hand_backend(spec, max_hands=hands.array.shape[1])
+        else:
+            backend = make_seg_backend(spec)
+        _pool_backends[(key, kind)] = backend
+
+    rgb = frames.array[slot]
+    if kind == "hand":
+        found = backend.process(rgb)[:hands.array.shape[1]]
+        for i, lm in enumerate(found):
+            hands.array[slot, i] = lm
+        return len(found)
+    small = cv2.resize(rgb, (masks.array.shape[2], masks.array.shape[1]), interpolation=cv2.INTER_LINEAR)
+    mask_float = backend.process(small)
+    if mask_float is None:
+        masks.array[slot] = 0
+    else:
+        # Thresholding happens here, off the server's compositing threads
+        np.greater(mask_float, threshold, out=masks.array[slot].view(bool))
+        masks.array[slot] *= 255
+    return 1
+
+
+def _pool_release(key):
+    """Pool process: close the models and shared arrays of a session that ended."""
+    for kind in ("hand", "seg"):
+        backend = _pool_backends.pop((key, kind), None)
+        if backend is not None:
+            backend.close()
+    for shared in _pool_buffers.pop(key, ()):
+        shared.close()
+
+
+class SessionInferencePool:
+    """
+    Fixed set of inference processes shared by all sessions of the headless server.
+    Each process is a single-worker ProcessPoolExecutor; sessions are assigned round robin
+    and stay on their process, so a session's jobs run in order on the same models.
+    Frames and results go through each session's shared-memory ring (see PooledInference);
+    the executor only carries the job arguments and the hand count.
+    """
+
+    def __init__(self, processes, timeout=5.0):
+        self.processes = max(int(processes), 1)
+        self.timeout = timeout
+        self.restarts = 0
+        # spawn: workers must not inherit the server's model/GUI state
+        self._ctx = mp.get_context("spawn")
+        self._executors = [self._new_executor() for _ in range(self.processes)]
+        self._generation = [0] * self.processes    # Bumped on restart (session threads fail together)
+        self._lock = threading.Lock()
+        self._next = 0
+        print(f"[WORKERS] Shared inference pool: {self.processes} process(es)")
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(max_workers=1, mp_context=self._ctx)
+
+    def client(self, key, size, proc_size, hand_backend="mediapipe", seg_backend="mediapipe", max_hands=1):
+        """PooledInference of one session (frames of `size` (w, h)), pinned to the next process"""
+        index = self._next
+        self._next = (self._next + 1) % self.processes
+        return PooledInference(self, index, key, size, proc_size, hand_backend, seg_backend, max_hands)
+
+    def submit(self, index, fn, *args):
+        """Returns (future, generation of the process it was queued on)"""
+        with self._lock:
+            try:
+                return self._executors[index].submit(fn, *args), self._generation[index]
+            except BrokenProcessPool:
+                self._generation[index] += 1
+                self._restart(index, "exited")
+                return self._executors[index].submit(fn, *args), self._generation[index]
+
+    def restart(self, index, generation, reason):
+        """Replace a broken process (its sessions' models are created again on the next job)"""
+        with self._lock:
+            if self._generation[index] != generation:
+                return      # Another session already restarted it
+            self._generation[index] += 1
+            self._restart(index, reason)
+
+    def _restart(self, index, reason):
+        self.restarts += 1
+        print(f"[WORKERS] pool process {index} {reason}, restarting ({self.restarts})")
+        executor = self._executors[index]
+        # A hung process would never pick up the shutdown: stop it directly
+        for proc in list((getattr(executor, "_processes", None) or {}).values()):
+            proc.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+        self._executors[index] = self._new_executor()
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+        print(f"[WORKERS] Pool closed ({self.restarts} restart(s))")
+
+
+class PooledInference:
+    """
+    One session's view of a SessionInferencePool (same interface as InferenceWorkers).
+    Like InferenceWorkers, the session owns a shared-memory ring of `slots` frames plus result arrays;
+    a job only names its slot. A slot is reused once no job that reads it is still running
+    (a job of an earlier frame that was not collected finishes in its own slot).
+    """
+
+    def __init__(self, pool, index, key, size, proc_size, hand_backend, seg_backend, max_hands, slots=3):
+        self.pool = pool
+        self.index = index
+        self.key = key
+        self.width, self.height = size
+        self.proc_size = tuple(proc_size)
+        self.specs = {"hand": hand_backend, "mask": seg_backend}
+        self.slots = slots
+
+        self.frames = _SharedArray((slots, self.height, self.width, 3), np.uint8)
+        self.hands = _SharedArray((slots, max_hands, 21, 3), np.float32)
+        self.masks = _SharedArray((slots, self.proc_size[1], self.proc_size[0]), np.uint8)
+        self._buffers = (self.frames.spec, self.hands.spec, self.masks.spec)
+        self._slot = -1
+        self._running = []         # (Future, slot, process generation) of every job not finished yet
+
+        self.current_frame = None
+        self.pending = {}           # kind -> (Future, slot, process generation) of the current frame
+        self.loaded = {}            # kind -> process generation its model was loaded in
+        self.wait_ms = {"hand": 0.0, "mask": 0.0}
+
+    def _write_frame(self, rgb):
+        """Copy the frame into a slot no running job reads from."""
+        while True:
+            self._running = [job for job in self._running if not job[0].done()]
+            busy = {slot for _, slot, _ in self._running}
+            free = [s for s in range(self.slots) if s not in busy]
+            if free:
+                break
+            # Every slot is read by an abandoned job: wait for the oldest
+            future, _, generation = self._running[0]
+            done, _ = wait([future], timeout=self.pool.timeout)
+            if not done:
+                self.pool.restart(self.index, generation, "timed out")
+        self._slot = min(free, key=lambda s: (s - self._slot - 1) % self.slots)
+        dst = self.frames.array[self._slot]
+        if rgb.shape[:2] != (self.height, self.width):
+            cv2.resize(rgb, (self.width, self.height), dst=dst, interpolation=cv2.INTER_LINEAR)
+        else:
+            np.copyto(dst, rgb)
+        self.current_frame = rgb
+
+    def _start(self, kind, threshold):
+        future, generation = self.pool.submit(
+            self.index, _pool_infer, self.key, "hand" if kind == "hand" else "seg",
+            self.specs[kind], self._buffers, self._slot, threshold,
+        )
+        job = (future, self._slot, generation)
+        self.pending[kind] = job
+        self._running.append(job)
+
+    def submit(self, rgb, hand=True, mask=True, threshold=0.62):
+        """Start the models on this frame (they run in the pool process while the caller continues)."""
+        if rgb is not self.current_frame:
+            # Results of the previous frame are not needed anymore (running jobs keep their slot)
+            for future, _, _ in self.pending.values():
+                future.cancel()
+            self.pending.clear()
+            self._write_frame(rgb)
+        for kind, wanted in (("hand", hand), ("mask", mask)):
+            if wanted and kind not in self.pending:
+                self._start(kind, threshold)
+
+    def result(self, kind, rgb=None, threshold=0.62):
+        """Result of `kind` ("hand" / "mask") for the current frame; submits the job if it is not running yet."""
+        if rgb is not None and rgb is not self.current_frame:
+            self.submit(rgb, hand=False, mask=False)
+        if kind not in self.pending:
+            if self.current_frame is None:
+                raise RuntimeError("PooledInference: submit() a frame first")
+            self._start(kind, threshold)
+        future, slot, generation = self.pending.pop(kind)
+        t0 = time.perf_counter()
+        # The first job of a model also loads it in the pool process
+        timeout = self.pool.timeout if self.loaded.get(kind) == generation else max(self.pool.timeout, 60)
+        try:
+            n = future.result(timeout=timeout)
+            self.loaded[kind] = generation
+        except BrokenProcessPool:
+            self.pool.restart(self.index, generation, "exited")
+            n = None
+        except FutureTimeout:
+            self.pool.restart(self.index, generation, "timed out")
+            n = None
+        except Exception as e:
+            print(f"[WORKERS] {self.key}: {kind} inference failed: {e}")
+            n = None
+        self.wait_ms[kind] = (time.perf_counter() - t0) * 1000
+        if kind == "hand":
+            return [self.hands.array[slot, i].copy() for i in range(n or 0)]
+        if n is None:
+            return np.zeros(self.masks.array.shape[1:], np.uint8)
+        return self.masks.array[slot].copy()
+
+    def hand_backend(self):
+        return _WorkerHandsBackend(self)
+
+    def mask_manager(self):
+        return WorkerUserMaskManager(self)
+
+    @property
+    def restarts(self):
+        return self.pool.restarts
+
+    def close(self):
+        for future, _, _ in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        # Jobs already running still read the ring
+        wait([future for future, _, _ in self._running], timeout=self.pool.timeout)
+        try:
+            self.pool.submit(self.index, _pool_release, self.key)
+        except RuntimeError:
+            pass    # Pool already shut down
+        self.frames.close()
+        self.hands.close()
+        self.masks.close()
+
+
+class _WorkerHandsBackend:
+    """Hand backend for HandTracker: landmarks come from the hand worker (no handedness, hands are told apart by position)"""
+    name = "workers"
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def describe(self):
+        return "hand worker process"
+
+    def process(self, rgb):
+        return self.pool.result("hand", rgb)
+
+    def close(self):
+        pass
+
+
+class WorkerUserMaskManager(UserMaskManager):
+    """UserMaskManager whose masks (already thresholded) come from the segmentation worker"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def create_layer3_mask(self, frame, threshold=0.62, rgb=None):
+        # `frame` only gives the size
+        h, w = frame.shape[:2]
+        return self.mask_of_size((w, h), threshold)
+
+    def mask_of_size(self, size, threshold=0.62):
+        """Mask of the current frame at size (w, h); the worker downsizes the frame itself."""
+        mask = self.pool.result("mask", threshold=threshold)
+        w, h = size
+        if mask.shape != (h, w):
+            mask = cv2.resize(mask, (w, h), interpolation=cv2.INTER_NEAREST)
+        return mask
+
+    def close(self):
+        self.pool.close()
@@ -3,6 +3,7 @@ import cv2
 import time
 import datetime
 import numpy as np
+from .exporter import ExportWorker
 
 class KeyboardInputManager:
     """
@@ -13,6 +14,12 @@ class KeyboardInputManager:
         # Drawing state (reflected on the blackboard)
         self.pen_color = (255, 255, 255)  # Default white
         self.thickness = 8
+        self.pen_alpha = 1.0              # < 1.0: translucent highlighter ink ('l' / preset 5)
+        self.highlight_alpha = 0.4
+        # Two-hand tracking: the pen keys change the pen of hand `pen_hand` ('n' switches);
+        # the pens of the other hands are kept here as (color, thickness, alpha)
+        self.pen_hand = 0
+        self.hand_pens = {1: ((0, 255, 255), 8, 1.0)}  # Second hand: yellow
         self.last_msg = ""                # HUD message (short feedback)
         
         # Help/HUD toggle
@@ -31,9 +38,13 @@ class KeyboardInputManager:
         self.rec_fps = 30  # Adjust if necessary
         self.rec_path_dir = "recordings"
         self.cap_path_dir = "captures"
+        self.export_path_dir = "exports"
         os.makedirs(self.rec_path_dir, exist_ok=True)
         os.makedirs(self.cap_path_dir, exist_ok=True)
 
+        # Snapshot/export encoding runs off the render thread
+        self.exporter = ExportWorker()
+
     # ---- Utils ----
     def _ts(self) -> str:
         # Filename-safe timestamp
@@ -55,8 +66,27 @@ class KeyboardInputManager:
 
     def _save_snapshot(self, frame_bgr):
         out_path = os.path.join(self.cap_path_dir, f"CAP_{self._ts()}.png")
-        cv2.imwrite(out_path, frame_bgr)
-        self.last_msg = f"[SNAP] saved to {out_path}"
+        self.exporter.save_snapshot(frame_bgr, out_path)
+        self.last_msg = f"[SNAP] saving to {out_path}"
+
+    def _start_export(self, blackboard, fmt):
+        if self.exporter.busy:
+            self.last_msg = "[EXPORT] Busy, try again later"
+            return
+        name = f"LECTURE_{self._ts()}"
+        if fmt == "pdf":
+            name += ".pdf"
+        out_path = os.path.join(self.export_path_dir, name)
+        # Only the pages changed since the last autosave are copied here; the worker reads
+        # the others (including pages not visited yet) from the session files
+        self.exporter.export_deck(
+            blackboard.background_path,
+            blackboard.session.snapshot(),
+            out_path,
+            bg_color=blackboard.bg_manager.color,
+            fmt=fmt,
+        )
+        self.last_msg = f"[EXPORT] {out_path}"
 
     # ---- Called from outside ----
     def after_render(self, output_image):
@@ -73,9 +103,12 @@ class KeyboardInputManager:
     def apply_to_blackboard(self, blackboard):
         """
         Applies the current manager state (pen_color, thickness) to the blackboard.
+        Hand 0 draws with blackboard.draw_*, the other hands with blackboard.hand_pens.
         """
-        blackboard.draw_color = self.pen_color
-        blackboard.draw_thickness = self.thickness
+        pens = dict(self.hand_pens)
+        pens[self.pen_hand] = (self.pen_color, self.thickness, self.pen_alpha)
+        blackboard.draw_color, blackboard.draw_thickness, blackboard.draw_alpha = pens.pop(0)
+        blackboard.hand_pens = pens
 
     def handle_key(self, key, blackboard, current_frame_for_snapshot=None):
         """
@@ -108,14 +141,36 @@ class KeyboardInputManager:
         # Presets 1-5
         elif key == ord('1'):
             self.pen_color, self.thickness = (255,255,255), 6;  self.last_msg = "Preset1: chalk"
+            self.pen_alpha = 1.0
         elif key == ord('2'):
             self.pen_color, self.thickness = (0,0,255), 10;    self.last_msg = "Preset2: red marker"
+            self.pen_alpha = 1.0
         elif key == ord('3'):
             self.pen_color, self.thickness = (0,255,0), 12;    self.last_msg = "Preset3: green marker"
+            self.pen_alpha = 1.0
         elif key == ord('4'):
             self.pen_color, self.thickness = (255,0,0), 12;    self.last_msg = "Preset4: blue marker"
+            self.pen_alpha = 1.0
         elif key == ord('5'):
             self.pen_color, self.thickness = (0,255,255), 18;  self.last_msg = "Preset5: highlighter"
+            self.pen_alpha = self.highlight_alpha
+
+        # Translucent (highlighter) ink for the current pen: L
+        elif key == ord('l'):
+            self.pen_alpha = self.highlight_alpha if self.pen_alpha >= 1.0 else 1.0
+            self.last_msg = "Highlighter ON" if self.pen_alpha < 1.0 else "Highlighter OFF"
+
+        # Pen of the other hand (two-hand tracking): N
+        elif key == ord('n'):
+            hands = getattr(blackboard, "max_hands", 1)
+            if hands > 1:
+                self.hand_pens[self.pen_hand] = (self.pen_color, self.thickness, self.pen_alpha)
+                self.pen_hand = (self.pen_hand + 1) % hands
+                self.pen_color, self.thickness, self.pen_alpha = self.hand_pens.pop(
+                    self.pen_hand, ((255, 255, 255), 8, 1.0))
+                self.last_msg = f"Pen keys: hand {self.pen_hand + 1}"
+            else:
+                self.last_msg = "One hand tracked (start with --hands 2)"
 
         # Toggle recording: V
         elif key == ord('v'):
@@ -129,6 +184,12 @@ class KeyboardInputManager:
             if current_frame_for_snapshot is not None:
                 self._save_snapshot(current_frame_for_snapshot)
 
+        # Export all pages with ink: E (PDF) / Shift+E (PNG set)
+        elif key == ord('e'):
+            self._start_export(blackboard, "pdf")
+        elif key == ord('E'):
+            self._start_export(blackboard, "png")
+
         # Help: H
         elif key == ord('h'):
             self.help_on = not self.help_on
@@ -155,29 +216,62 @@ class KeyboardInputManager:
         elif key == ord('`'):
             self.hud_on = not self.hud_on
             self.last_msg = "HUD ON" if self.hud_on else "HUD OFF"
+
+        # Video background: space play/pause, ',' / '.' frame step, '[' / ']' seek -/+5s
+        elif key in (ord(' '), ord(','), ord('.'), ord('['), ord(']')):
+            self._video_key(key, blackboard.bg_manager.video)
         # ==============================
 
+    def _video_key(self, key, video):
+        if video is None:
+            return
+        if key == ord(' '):
+            video.toggle()
+        elif key == ord(','):
+            video.step(-1)
+        elif key == ord('.'):
+            video.step(1)
+        elif key == ord('['):
+            video.seek_seconds(-5)
+        elif key == ord(']'):
+            video.seek_seconds(5)
+        self.last_msg = f"Video: {video.status}"
+
+    def close(self):
+        """Stop recording and wait for pending snapshots/exports"""
+        if self.is_recording:
+            self._stop_recording()
+        self.exporter.close()
+
     # Simple help string
     def help_lines(self):
         return [
             "Shortcuts (KeyboardInputManager):",
             "  w/r/g/b/y : pen color (white/red/green/blue/yellow)",
             "  +/-       : pen thickness up/down",
-            "  1..5      : presets",
+            "  1..5      : presets (5: translucent highlighter)",
+            "  l         : toggle translucent highlighter ink",
+            "  n         : pen keys change the other hand's pen (--hands 2)",
             "  v         : start/stop recording (MP4)",
             "  p         : snapshot (PNG)",
+            "  e / E     : export all pages with ink (PDF / PNG set)",
             "  h         : toggle help",
             "  t         : toggle hand tracking (Draw ON/OFF)", 
             "  u         : toggle user mask (Show/Hide User)", 
             "  `         : toggle HUD (Show/Hide this info)",
+            "  space     : video play/pause (ink is kept per paused frame)",
+            "  , / .     : video frame step back/forward",
+            "  [ / ]     : video seek -5s/+5s",
             "",
             "Existing keys (main.py):",
             "  s         : toggle shape mode",
+            "  i         : toggle smooth ink (spline, half-rate tracking)",
             "  c         : clear canvas",
             "  f         : open background file",
             "  x         : close background file",
             "  z         : toggle view mode (PIP)",
             "  arrow L/R : prev/next page(or use a/d)",
+            "  o         : page overview grid (arrows + Enter, or point + pinch)",
             "  arrow U/D : zoom in/out",
             "  q         : quit",
         ]
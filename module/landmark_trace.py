@@ -0,0 +1,222 @@
+# landmark_trace.py
+"""
+Landmark/mask trace: records what HandTracker.get_gesture and
+UserMaskManager.create_layer3_mask returned, so rendering can be replayed
+deterministically without running the models.
+
+File layout (little endian):
+    b"VBTRACE1"
+    records...
+        'G' gesture: <I frame> <B mode> <hh point> <B n> [n*3 float32 landmarks (x, y, z normalized)]
+        'M' mask:    <I frame> <HH h w> <I size> [zlib(packbits(mask > 0))]
+
+Replay is aligned by frame number: TraceReader.next_frame() advances the replay position once per
+rendered frame (like TraceWriter.next_frame() while recording), and the replay trackers return the
+record of that frame, or the last one before it if the recording did not run the model on it
+(smooth ink, tracking toggled off). Skipped or extra calls therefore do not shift gestures against masks.
+"""
+import bisect
+import struct
+import zlib
+
+import numpy as np
+
+MAGIC = b"VBTRACE1"
+MODES = ("none", "draw", "erase", "move")
+
+_GESTURE = struct.Struct("<IBhhB")
+_MASK = struct.Struct("<IHHI")
+
+
+class TraceWriter:
+    """Appends gesture/mask records to a trace file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.frame = 0
+        self._f = open(path, "wb")
+        self._f.write(MAGIC)
+
+    def next_frame(self):
+        self.frame += 1
+
+    def write_gesture(self, mode, point, landmarks=None):
+        lm = np.zeros((0, 3), np.float32) if landmarks is None else np.asarray(landmarks, np.float32)
+        self._f.write(b"G")
+        self._f.write(_GESTURE.pack(self.frame, MODES.index(mode), point[0], point[1], len(lm)))
+        self._f.write(lm.tobytes())
+
+    def write_mask(self, mask):
+        h, w = mask.shape[:2]
+        packed = zlib.compress(np.packbits(mask.reshape(h, w) > 0).tobytes(), 1)
+        self._f.write(b"M")
+        self._f.write(_MASK.pack(self.frame, h, w, len(packed)))
+        self._f.write(packed)
+
+    def close(self):
+        if not self._f.closed:
+            self._f.close()
+            print(f"[TRACE] {self.frame} frames written to {self.path}")
+
+
+class TraceReader:
+    """
+    Loads a whole trace; masks stay bit-packed until they are replayed.
+    frame is the replay position shared by the replay trackers of this reader.
+    """
+
+    def __init__(self, path):
+        self.gestures = []   # (frame, mode, point, landmarks)
+        self.masks = []      # (frame, h, w, packed)
+        self.frame = 0
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"'{path}' is not a trace file")
+
+        pos = len(MAGIC)
+        while pos < len(data):
+            kind = data[pos:pos + 1]
+            pos += 1
+            if kind == b"G":
+                frame, mode, x, y, n = _GESTURE.unpack_from(data, pos)
+                pos += _GESTURE.size
+                lm = np.frombuffer(data, np.float32, n * 3, pos).reshape(n, 3) if n else None
+                pos += n * 12
+                self.gestures.append((frame, MODES[mode], (x, y), lm))
+            elif kind == b"M":
+                frame, h, w, size = _MASK.unpack_from(data, pos)
+                pos += _MASK.size
+                self.masks.append((frame, h, w, data[pos:pos + size]))
+                pos += size
+            else:
+                raise ValueError(f"corrupt trace record at byte {pos - 1}")
+
+    @classmethod
+    def concat(cls, paths):
+        """One reader over several trace files, in order (e.g. chunks of a batch job)."""
+        merged = cls.__new__(cls)
+        merged.gestures, merged.masks = [], []
+        merged.frame = 0
+        for path in paths:
+            part = cls(path)
+            # Each file counts its frames from 0: continue after the previous one
+            offset = merged.length
+            merged.gestures.extend((f + offset, *rest) for f, *rest in part.gestures)
+            merged.masks.extend((f + offset, *rest) for f, *rest in part.masks)
+        return merged
+
+    @property
+    def length(self):
+        """Number of frames the trace spans."""
+        last = [records[-1][0] for records in (self.gestures, self.masks) if records]
+        return max(last) + 1 if last else 0
+
+    def next_frame(self):
+        self.frame += 1
+
+    def record_index(self, frames, loop):
+        """
+        Index (into the records whose frame numbers are `frames`) to replay at the current frame:
+        the last record at or before it, or -1 (before the first record, or past the end without loop).
+        """
+        length = self.length
+        if not frames or length == 0:
+            return -1
+        frame = self.frame % length if loop else self.frame
+        if frame >= length:
+            return -1
+        return bisect.bisect_right(frames, frame) - 1
+
+    @staticmethod
+    def unpack_mask(h, w, packed):
+        bits = np.unpackbits(np.frombuffer(zlib.decompress(packed), np.uint8), count=h * w)
+        return (bits.reshape(h, w) * 255).astype(np.uint8)
+
+
+# =======================================================
+#  Recording proxies (wrap the real trackers)
+# =======================================================
+class RecordingHandTracker:
+    """Delegates to a HandTracker and records every result."""
+
+    def __init__(self, tracker, writer):
+        self.tracker = tracker
+        self.writer = writer
+
+    def get_gesture(self, frame, rgb=None):
+        mode, point, debug_frame = self.tracker.get_gesture(frame, rgb=rgb)
+        self.writer.write_gesture(mode, point, getattr(self.tracker, "last_landmarks", None))
+        return mode, point, debug_frame
+
+    def close(self):
+        self.tracker.close()
+
+
+class RecordingUserMaskManager:
+    """Delegates to a UserMaskManager and records every mask."""
+
+    def __init__(self, manager, writer):
+        self.manager = manager
+        self.writer = writer
+
+    def create_layer1_background(self, frame_shape, color=(0, 0, 0)):
+        return self.manager.create_layer1_background(frame_shape, color)
+
+    def create_layer3_mask(self, frame, threshold=0.62, rgb=None):
+        mask = self.manager.create_layer3_mask(frame, threshold, rgb=rgb)
+        self.writer.write_mask(mask)
+        return mask
+
+    def close(self):
+        self.manager.close()
+
+
+# =======================================================
+#  Replay implementations (drop-in for HandTracker / UserMaskManager)
+# =======================================================
+class ReplayHandTracker:
+    """Returns the gesture recorded at the reader's frame. loop=False returns 'none' after the end."""
+
+    def __init__(self, reader, loop=True):
+        self.reader = reader
+        self.gestures = reader.gestures
+        self._frames = [g[0] for g in self.gestures]
+        self.loop = loop
+        self.last_landmarks = None
+
+    def get_gesture(self, frame, rgb=None):
+        index = self.reader.record_index(self._frames, self.loop)
+        if index < 0:
+            self.last_landmarks = None
+            return "none", (-1, -1), frame
+        _, mode, point, lm = self.gestures[index]
+        self.last_landmarks = lm
+        return mode, point, frame
+
+    def close(self):
+        pass
+
+
+class ReplayUserMaskManager:
+    """Returns the mask recorded at the reader's frame (unpacked on demand)."""
+
+    def __init__(self, reader, loop=True):
+        self.reader = reader
+        self.masks = reader.masks
+        self._frames = [m[0] for m in self.masks]
+        self.loop = loop
+
+    def create_layer1_background(self, frame_shape, color=(0, 0, 0)):
+        return np.full(frame_shape, color, dtype=np.uint8)
+
+    def create_layer3_mask(self, frame, threshold=0.62, rgb=None):
+        index = self.reader.record_index(self._frames, self.loop)
+        if index < 0:
+            h, w = frame.shape[:2]
+            return np.zeros((h, w), dtype=np.uint8)
+        _, h, w, packed = self.masks[index]
+        return TraceReader.unpack_mask(h, w, packed)
+
+    def close(self):
+        pass
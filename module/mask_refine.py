@@ -0,0 +1,92 @@
+# mask_refine.py
+import cv2
+import numpy as np
+
+
+class MaskRefiner:
+    """
+    Upsamples a low resolution user mask to full resolution and refines only a narrow
+    band around the mask boundary with a guided filter (guide = full resolution frame).
+    - Outside the band the bilinear-upscaled mask is simply thresholded.
+    - The band is processed in small blocks (runs of edge columns per tile row),
+      so the filter cost follows the length of the silhouette, not the frame size.
+    Returns a binary (0/255) mask, or a soft matte when soft=True.
+    """
+
+    def __init__(self, radius=8, eps=1e-3, band=6, tile=64, soft=False):
+        self.radius = radius      # Guided filter window radius (full resolution px)
+        self.eps = eps            # Regularization: smaller follows image edges more closely
+        self.band = band          # Extra band width around the upscaled transition (px)
+        self.tile = tile          # Strip height / horizontal granularity (px)
+        self.soft = soft
+        self._band_kernel = cv2.getStructuringElement(
+            cv2.MORPH_ELLIPSE, (2 * band + 1, 2 * band + 1)
+        )
+        self._edge_kernel = np.ones((3, 3), np.uint8)
+
+    def refine(self, mask_small, frame_bgr):
+        if mask_small.ndim == 3:
+            mask_small = cv2.cvtColor(mask_small, cv2.COLOR_BGR2GRAY)
+        h, w = frame_bgr.shape[:2]
+        hs, ws = mask_small.shape[:2]
+
+        up = cv2.resize(mask_small, (w, h), interpolation=cv2.INTER_LINEAR)
+        if self.soft:
+            out = up.copy()
+        else:
+            _, out = cv2.threshold(up, 127, 255, cv2.THRESH_BINARY)
+
+        # Boundary pixels at low resolution decide which strips need refinement
+        edges = cv2.morphologyEx(mask_small, cv2.MORPH_GRADIENT, self._edge_kernel)
+        if not edges.any():
+            return out
+
+        sx, sy = w / ws, h / hs
+        pad = self.radius + self.band + int(np.ceil(max(sx, sy)))
+        for y0 in range(0, h, self.tile):
+            y1 = min(y0 + self.tile, h)
+            rows = edges[int(y0 / sy):max(int(np.ceil(y1 / sy)), int(y0 / sy) + 1)]
+            cols = np.flatnonzero(rows.any(axis=0))
+            if cols.size == 0:
+                continue
+            # Split the row into runs of edge columns (e.g. left and right side of the body)
+            gaps = np.flatnonzero(np.diff(cols) * sx > self.tile) + 1
+            for run in np.split(cols, gaps):
+                x0 = max(int(run[0] * sx) - pad, 0)
+                x1 = min(int((run[-1] + 1) * sx) + pad, w)
+                self._refine_strip(frame_bgr, up, out, x0, x1, y0, y1, pad)
+        return out
+
+    def _refine_strip(self, frame_bgr, up, out, x0, x1, y0, y1, pad):
+        h = up.shape[0]
+        # Filter over the padded strip, write back only the inner rows
+        py0, py1 = max(y0 - pad, 0), min(y1 + pad, h)
+        guide = cv2.cvtColor(frame_bgr[py0:py1, x0:x1], cv2.COLOR_BGR2GRAY)
+        p_u8 = up[py0:py1, x0:x1]
+
+        # Band = bilinear transition zone, widened by `band` px
+        trans = cv2.inRange(p_u8, 1, 254)
+        band = cv2.dilate(trans, self._band_kernel)
+
+        q = self._guided_filter(guide.astype(np.float32) / 255.0, p_u8.astype(np.float32) / 255.0)
+
+        iy0, iy1 = y0 - py0, y1 - py0
+        band = band[iy0:iy1] > 0
+        q = q[iy0:iy1]
+        dst = out[y0:y1, x0:x1]
+        if self.soft:
+            dst[band] = np.clip(q[band] * 255.0, 0, 255).astype(np.uint8)
+        else:
+            dst[band] = np.where(q[band] > 0.5, 255, 0).astype(np.uint8)
+
+    def _guided_filter(self, I, p):
+        """Gray-guide guided filter (He et al.) with box filters."""
+        ksize = (2 * self.radius + 1, 2 * self.radius + 1)
+        box = lambda x: cv2.boxFilter(x, -1, ksize, borderType=cv2.BORDER_REFLECT)
+        mean_I = box(I)
+        mean_p = box(p)
+        cov_Ip = box(I * p) - mean_I * mean_p
+        var_I = box(I * I) - mean_I * mean_I
+        a = cov_Ip / (var_I + self.eps)
+        b = mean_p - a * mean_I
+        return box(a) * I + box(b)
@@ -0,0 +1,308 @@
+# microbench.py
+"""
+Micro-benchmarks with stored baselines and golden images for the hot-path functions.
+Each case is timed (median / p95 over `repeat` calls), its peak allocation is measured with
+tracemalloc in a separate call, and its output is compared with a golden output.
+
+    <bench_dir>/baseline.json       {case: {"min_ms": .., "median_ms": .., "p95_ms": .., "peak_kb": .., "sha1": ..}}
+    <bench_dir>/golden/<case>.png   expected output of the cases with a pixel tolerance
+    <bench_dir>/failed/<case>.png   output of a case that did not match (for inspection)
+
+Exact cases (tol=0) keep only the SHA-1 of their output, so the goldens stay small enough to commit.
+Missing baselines/goldens are written on the first run (or with update=True); afterwards a case
+fails if its median call is slower / it allocates more than baseline * (1 + threshold), or if its output differs
+from the golden output by more than its tolerance.
+The baselines in benchmarks/ were recorded on a single-core machine; rerun with --update-baseline on new hardware.
+"""
+import os
+import json
+import time
+import hashlib
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from .highlight_ink import HighlightLayer
+from .overlay_hud import draw_hud
+from .view_manager import ViewManager
+
+
+class BenchCase:
+    """
+    fn(*setup(i)) is timed; setup runs untimed before every call (fresh copies for in-place functions).
+    i is -1 for the warm-up call and 0..repeat-1 for the timed calls.
+    fn must return the image that is checked against the golden image.
+    tol: max abs pixel difference, max_diff_ratio: allowed fraction of pixels above tol.
+    """
+
+    def __init__(self, name, fn, setup=None, repeat=60, tol=0, max_diff_ratio=0.0):
+        self.name = name
+        self.fn = fn
+        self.setup = setup or (lambda i: ())
+        self.repeat = repeat
+        self.tol = tol
+        self.max_diff_ratio = max_diff_ratio
+
+
+# =======================================================
+#  Synthetic inputs
+# =======================================================
+def synthetic_frame(w, h, seed=0):
+    """Camera-like frame: gradient + shapes + mild noise (deterministic)."""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, w, dtype=np.float32)
+    y = np.linspace(0, 255, h, dtype=np.float32)[:, None]
+    frame = np.dstack([
+        x * 0.6 + y * 0.2, x * 0.3 + y * 0.5, np.broadcast_to(255 - x * 0.5, (h, w))
+    ]).astype(np.uint8)
+    cv2.circle(frame, (w // 2, h // 3), h // 6, (60, 140, 200), -1)
+    cv2.rectangle(frame, (w // 2 - h // 6, h // 2), (w // 2 + h // 6, h), (80, 80, 160), -1)
+    noise = rng.integers(0, 8, frame.shape, dtype=np.uint8)
+    return cv2.add(frame, noise)
+
+
+def synthetic_mask(w, h):
+    """Person-like foreground mask (head + torso), 0/255."""
+    mask = np.zeros((h, w), np.uint8)
+    cv2.circle(mask, (w // 2, h // 3), h // 6, 255, -1)
+    cv2.ellipse(mask, (w // 2, h), (h // 3, h // 2), 0, 180, 360, 255, -1)
+    return mask
+
+
+def synthetic_canvas(w, h, strokes=40, seed=1):
+    """Black canvas with random colored polylines (ink)."""
+    rng = np.random.default_rng(seed)
+    canvas = np.zeros((h, w, 3), np.uint8)
+    for _ in range(strokes):
+        pts = np.cumsum(rng.integers(-25, 26, (30, 2)), axis=0) + rng.integers(0, [w, h])
+        color = tuple(int(c) for c in rng.integers(64, 256, 3))
+        cv2.polylines(canvas, [pts.astype(np.int32)], False, color, int(rng.integers(3, 12)))
+    return canvas
+
+
+def circle_stroke(cx, cy, r, n=72, wobble=4, seed=2):
+    """Hand-drawn looking closed circle stroke (list of points)."""
+    rng = np.random.default_rng(seed)
+    a = np.linspace(0, 2 * np.pi, n)
+    rr = r + rng.uniform(-wobble, wobble, n)
+    return [(int(cx + rr[i] * np.cos(a[i])), int(cy + rr[i] * np.sin(a[i]))) for i in range(n)]
+
+
+# =======================================================
+#  Measurement
+# =======================================================
+def measure(case):
+    """Returns (stats, output): median/p95 ms over case.repeat calls and peak KB of one traced call."""
+    case.fn(*case.setup(-1))  # Warm-up (lazy caches, first-call allocations)
+    times = []
+    for i in range(case.repeat):
+        args = case.setup(i)
+        t0 = time.perf_counter()
+        case.fn(*args)
+        times.append((time.perf_counter() - t0) * 1000)
+
+    args = case.setup(0)
+    tracemalloc.start()
+    output = case.fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = {
+        "min_ms": float(np.min(times)),
+        "median_ms": float(np.median(times)),
+        "p95_ms": float(np.percentile(times, 95)),
+        "peak_kb": peak / 1024,
+    }
+    return stats, output
+
+
+def compare_golden(path, output, tol=0, max_diff_ratio=0.0):
+    """Returns (status, detail); writes the golden image if it does not exist yet."""
+    expected = cv2.imread(path, cv2.IMREAD_UNCHANGED) if os.path.exists(path) else None
+    if expected is None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        cv2.imwrite(path, output)
+        return "new", ""
+    if expected.shape != output.shape:
+        return "FAIL", f"shape {output.shape} != {expected.shape}"
+    diff = cv2.absdiff(expected, output)
+    if diff.ndim == 3:
+        diff = diff.max(axis=2)
+    bad = int(np.count_nonzero(diff > tol))
+    ratio = bad / diff.size
+    if ratio > max_diff_ratio:
+        return "FAIL", f"{bad} px differ (max {int(diff.max())})"
+    return "ok", f"max diff {int(diff.max())}" if diff.any() else ""
+
+
+def output_digest(output):
+    """SHA-1 of an output image (shape and dtype included)."""
+    h = hashlib.sha1(f"{output.shape}{output.dtype}".encode("ascii"))
+    h.update(np.ascontiguousarray(output).data)
+    return h.hexdigest()
+
+
+def run_suite(cases, bench_dir="benchmarks", threshold=0.5, update=False, slack_ms=1.0):
+    """Run all cases, compare with baselines and goldens, print a report. Returns True if all passed."""
+    golden_dir = os.path.join(bench_dir, "golden")
+    failed_dir = os.path.join(bench_dir, "failed")
+    os.makedirs(bench_dir, exist_ok=True)
+    baseline_path = os.path.join(bench_dir, "baseline.json")
+    baseline = {}
+    if os.path.exists(baseline_path) and not update:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    ok = True
+    results = {}
+    print(f"{'case':<28s} {'median':>9s} {'p95':>9s} {'min':>9s} {'base med':>9s} {'delta':>7s} {'peak KB':>9s}  golden")
+    for case in cases:
+        stats, output = measure(case)
+        results[case.name] = {k: round(v, 4) for k, v in stats.items()}
+
+        base = baseline.get(case.name)
+        if case.tol == 0 and case.max_diff_ratio == 0:
+            digest = output_digest(output)
+            results[case.name]["sha1"] = digest
+            if not base or "sha1" not in base:
+                status, detail = "new", ""
+            elif base["sha1"] == digest:
+                status, detail = "ok", ""
+            else:
+                status, detail = "FAIL", "output hash differs"
+        else:
+            golden_path = os.path.join(golden_dir, f"{case.name}.png")
+            if update and os.path.exists(golden_path):
+                os.remove(golden_path)
+            status, detail = compare_golden(golden_path, output, case.tol, case.max_diff_ratio)
+        if status == "FAIL":
+            os.makedirs(failed_dir, exist_ok=True)
+            cv2.imwrite(os.path.join(failed_dir, f"{case.name}.png"), output)
+
+        delta, flags, base_ms = "", [], "-"
+        if base:
+            # Regressions are judged on the median (a single cached or lucky call cannot hide one);
+            # slack_ms: cases of a few ms are dominated by timer and scheduling noise
+            key = "median_ms"
+            change = stats[key] / max(base[key], 1e-6) - 1
+            base_ms = f"{base[key]:.3f}"
+            delta = f"{change * 100:+.0f}%"
+            if change > threshold and stats[key] - base[key] > slack_ms:
+                flags.append("SLOWER")
+            # Small absolute slack: tracemalloc peaks vary by a few KB between runs
+            if stats["peak_kb"] > base["peak_kb"] * (1 + threshold) + 64:
+                flags.append("MORE MEMORY")
+        if status == "FAIL":
+            flags.append("GOLDEN")
+        ok = ok and not flags
+
+        print(f"{case.name:<28s} {stats['median_ms']:9.3f} {stats['p95_ms']:9.3f} {stats['min_ms']:9.3f} {base_ms:>9s} "
+              f"{delta:>7s} {stats['peak_kb']:9.0f}  {status} {detail} {' '.join(flags)}".rstrip())
+
+    # Cases without a baseline get one (all of them with update=True)
+    new = {k: v for k, v in results.items() if update or k not in baseline}
+    # Older baselines may lack the output hash: add it without touching their timings
+    hashed = {k: v["sha1"] for k, v in results.items()
+              if k not in new and "sha1" in v and "sha1" not in baseline[k]}
+    for k, digest in hashed.items():
+        baseline[k]["sha1"] = digest
+    if new or hashed:
+        baseline.update(new)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"[MICROBENCH] Baseline written for {len(new) + len(hashed)} case(s) -> {baseline_path}")
+
+    print(f"[MICROBENCH] {'PASS' if ok else 'FAIL'} (threshold {threshold * 100:.0f}%)")
+    return ok
+
+
+# =======================================================
+#  Hot-path cases
+# =======================================================
+def hot_path_cases(bb, kb):
+    """
+    render / get_view / draw_hud / compose / shape recognition cases at the size of blackboard `bb`
+    (synthetic frame, mask, canvas and background). kb: KeyboardInputManager for the HUD cases.
+    """
+    width, height = bb.width, bb.height
+    tag = f"{height}p"
+    frame = synthetic_frame(width, height)
+    mask = synthetic_mask(width, height)
+    canvas = synthetic_canvas(width, height)
+    background = synthetic_frame(width, height, seed=3)[:, ::-1].copy()
+
+    bg = bb.bg_manager
+    bg.background = background
+    bb.background_path = "<synthetic>"
+    view = ViewManager()
+
+    def with_view(zoom, offset_x=0):
+        bg.zoom, bg.offset_x, bg.offset_y = zoom, offset_x, 0
+        bb._view_m = None if bg.is_identity_view else bg.view_matrix()
+
+    def render(pip, zoom, highlight=None):
+        def setup(i):
+            bb.pip_mode = pip
+            with_view(zoom)
+            return frame, canvas, mask, highlight
+        return setup
+
+    # Highlighter strokes across a third of the page (translucent ink path)
+    highlight = HighlightLayer(width, height)
+    for k in range(3):
+        y = height // 4 + k * height // 5
+        highlight.line((width // 6, y), (width * 5 // 6, y + height // 20), (0, 255, 255), 0.4, height // 30)
+
+    def zoomed(i):
+        with_view(1.5)               # Same view every call (cached warp)
+        return ()
+
+    def pan(i):
+        # A view no earlier call used (warm-up included): every call is a cache miss
+        with_view(1.5, 41 + i)
+        return ()
+
+    def hud(help_on):
+        def setup(i):
+            kb.help_on = help_on
+            return frame.copy(), bb, kb
+        return setup
+
+    def compose(mode):
+        def setup(i):
+            view.view_mode = mode
+            bb.pip_mode = mode == "pip"
+            bb.last_frame, bb.last_prep = frame, None
+            bb.last_user_rect = (width // 2 - height // 4, height // 6, height // 2, height)
+            bb.last_combined_bg = canvas.copy() if mode == "pip" else None
+            kb.help_on = False
+            return frame.copy(), bb, kb
+        return setup
+
+    stroke = circle_stroke(width // 3, height // 2, height // 5)
+
+    def shape(i):
+        board = canvas.copy()
+        cv2.polylines(board, [np.array(stroke, np.int32)], False, (255, 255, 255), 8)
+        bb.shape_recognizer.current_drawing_pts.clear()
+        bb.shape_recognizer.current_drawing_pts.extend(stroke)
+        return (board,)
+
+    def recognize(board):
+        bb.shape_recognizer._recognize_and_draw_shape(board)
+        return board
+
+    return [
+        BenchCase(f"render_{tag}", bb.render, render(False, 1.0)),
+        BenchCase(f"render_pip_{tag}", bb.render, render(True, 1.0)),
+        BenchCase(f"render_zoom_{tag}", bb.render, render(False, 1.5)),
+        BenchCase(f"render_highlight_{tag}", bb.render, render(False, 1.0, highlight)),
+        BenchCase(f"get_view_{tag}", lambda: bg.get_view(), zoomed),
+        BenchCase(f"get_view_pan_{tag}", lambda: bg.get_view(), pan),
+        BenchCase(f"draw_hud_{tag}", draw_hud, hud(False)),
+        BenchCase(f"draw_hud_help_{tag}", draw_hud, hud(True)),
+        BenchCase(f"compose_{tag}", view.compose, compose("normal")),
+        BenchCase(f"compose_pip_{tag}", view.compose, compose("pip")),
+        BenchCase(f"shape_recognize_{tag}", recognize, shape),
+    ]
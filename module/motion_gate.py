@@ -0,0 +1,100 @@
+# motion_gate.py
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Cheap gate in front of hand detection.
+    While no hand is tracked and nothing moves near the presenter, hand detection only runs every
+    `idle_interval` frames. Motion is measured by differencing tiny grayscale frames
+    (FramePrep pyramid level `level`) inside the dilated presenter mask of the previous frame
+    (whole frame when the user mask is off) and around the last seen hand.
+    Motion wakes the gate on the same frame, and it stays at full rate for `hold` frames after
+    the last motion or the last detected hand.
+    """
+
+    def __init__(self, level=4, idle_interval=8, hold=15, diff_threshold=18, min_fraction=0.003, reach=9):
+        self.level = level
+        self.idle_interval = idle_interval
+        self.hold = hold
+        self.diff_threshold = diff_threshold
+        self.min_fraction = min_fraction
+        self._kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (reach, reach))
+
+        self._prev = None
+        self._roi = None            # Presenter region on the tiny grid (uint8 0/1), None = whole frame
+        self._hand = None           # Last detected hand point (full resolution)
+        self._active = 0            # Frames left at full rate
+        self._since_detect = 0
+
+        self.frames = 0
+        self.detections = 0
+
+    def check(self, gray):
+        """Tiny grayscale frame of this frame -> True if hand detection should run on it."""
+        gray = cv2.blur(gray, (3, 3))   # Sensor noise
+        prev, self._prev = self._prev, gray
+        self.frames += 1
+        self._since_detect += 1
+
+        if prev is not None and prev.shape == gray.shape and self._moved(prev, gray):
+            self._active = self.hold
+        elif self._active > 0:
+            self._active -= 1
+
+        run = self._active > 0 or prev is None or self._since_detect >= self.idle_interval
+        if run:
+            self._since_detect = 0
+            self.detections += 1
+        return run
+
+    def _moved(self, prev, gray):
+        diff = cv2.absdiff(prev, gray) > self.diff_threshold
+        roi = self._region(gray.shape)
+        if roi is not None:
+            diff &= roi
+        return np.count_nonzero(diff) >= max(int(gray.size * self.min_fraction), 2)
+
+    def _region(self, shape):
+        if self._roi is None or self._roi.shape != shape:
+            return None
+        if self._hand is None:
+            return self._roi
+        roi = self._roi.copy()
+        x, y = (c >> self.level for c in self._hand)
+        r = self._kernel.shape[0]
+        roi[max(y - r, 0):y + r + 1, max(x - r, 0):x + r + 1] = True
+        return roi
+
+    def observe(self, found, point=(-1, -1)):
+        """Result of a detection that ran: a tracked hand keeps the gate at full rate."""
+        if found:
+            self._active = self.hold
+            if point != (-1, -1):
+                self._hand = point
+
+    def set_presenter_mask(self, mask):
+        """Segmentation mask of the current frame (any size, 0/255), or None (no mask: whole frame)."""
+        if mask is None or self._prev is None:
+            self._roi = None
+            return
+        if mask.ndim == 3:
+            mask = mask[..., 0]
+        h, w = self._prev.shape
+        small = cv2.resize(mask, (w, h), interpolation=cv2.INTER_AREA)
+        self._roi = cv2.dilate(small, self._kernel) > 0
+
+    def reset(self):
+        """Back to full rate (e.g. drawing was re-enabled)."""
+        self._prev = None
+        self._active = self.hold
+
+    @property
+    def idle(self):
+        return self._active == 0
+
+    @property
+    def status(self):
+        skipped = 1 - self.detections / max(self.frames, 1)
+        return f"hand {'idle' if self.idle else 'active'}  skipped {skipped * 100:.0f}%"
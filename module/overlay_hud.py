@@ -2,14 +2,72 @@
 import cv2
 import numpy as np
 
-def _draw_text(img, text, org, color=(255,255,255), scale=0.7, thickness=2):
+class RoiOverlay:
+    """
+    Lets overlays be drawn temporarily into a shared frame: every region is saved (ROI copy only)
+    right before it is drawn into, and restore() puts the original pixels back.
+    """
+
+    def __init__(self, img):
+        self.img = img
+        self._saved = []
+
+    def save(self, x1, y1, x2, y2):
+        h, w = self.img.shape[:2]
+        x1, y1 = max(int(x1), 0), max(int(y1), 0)
+        x2, y2 = min(int(x2), w), min(int(y2), h)
+        if x2 > x1 and y2 > y1:
+            self._saved.append((y1, y2, x1, x2, self.img[y1:y2, x1:x2].copy()))
+
+    @property
+    def area(self):
+        return sum((y2 - y1) * (x2 - x1) for y1, y2, x1, x2, _ in self._saved)
+
+    def restore(self):
+        # Reverse order: regions saved later may lie inside regions drawn earlier
+        for y1, y2, x1, x2, patch in reversed(self._saved):
+            self.img[y1:y2, x1:x2] = patch
+        self._saved.clear()
+
+
+def _draw_text(img, text, org, color=(255,255,255), scale=0.7, thickness=2, roi=None):
+    if roi is not None:
+        (tw, th), base = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+        # Brackets, slashes and anti-aliased strokes reach past the reported text height
+        pad = thickness + int(th * 0.3) + 2
+        roi.save(org[0] - pad, org[1] - th - pad, org[0] + tw + pad, org[1] + base + pad)
     cv2.putText(img, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness, cv2.LINE_AA)
 
-def draw_hud(frame_bgr, blackboard, kb_manager, extra_msg=None):
+def _shade(img, x1, y1, x2, y2, color, alpha, roi=None):
+    """Translucent filled rectangle (corners inclusive), blended in its ROI only"""
+    h, w = img.shape[:2]
+    x1, y1, x2, y2 = max(x1, 0), max(y1, 0), min(x2 + 1, w), min(y2 + 1, h)
+    if x2 <= x1 or y2 <= y1:
+        return
+    if roi is not None:
+        roi.save(x1, y1, x2, y2)
+    region = img[y1:y2, x1:x2]
+    cv2.addWeighted(np.full_like(region, color), alpha, region, 1 - alpha, 0, dst=region)
+
+def draw_pointer(img, gesture_mode, point, roi=None):
+    """Finger pointer (debugging): magenta = draw, cyan = erase, yellow = move"""
+    if point == (-1, -1):
+        return
+    debug_color = (255, 0, 255) # Draw (Magenta)
+    if(gesture_mode == "erase"):
+        debug_color = (255, 255, 0) # Erase (Cyan)
+    elif(gesture_mode == "move"):
+        debug_color = (0, 255, 255) # Move (Yellow)
+    if roi is not None:
+        roi.save(point[0] - 13, point[1] - 13, point[0] + 14, point[1] + 14)
+    cv2.circle(img, point, 12, debug_color, cv2.FILLED)
+
+def draw_hud(frame_bgr, blackboard, kb_manager, extra_msg=None, roi=None):
     """
     Draws a status HUD in the top-left corner of the screen.
     - Displays mode, color, thickness, zoom, page, and rec status.
     - If kb_manager.help_on is true, displays a simple help panel.
+    - roi: RoiOverlay of a shared frame (saves every region before it is drawn into)
     """
     # HUD ON/OFF Toggle
     # If hud_on is False (toggled by '`' key), return the original frame without drawing anything.
@@ -21,9 +79,7 @@ def draw_hud(frame_bgr, blackboard, kb_manager, extra_msg=None):
 
     # Translucent panel
     panel_w, panel_h = min(710, w-40), 110
-    overlay = img.copy()
-    cv2.rectangle(overlay, (20, 20), (20+panel_w, 20+panel_h), (0,0,0), -1)
-    img[:] = cv2.addWeighted(overlay, 0.35, img, 0.65, 0)
+    _shade(img, 20, 20, 20+panel_w, 20+panel_h, (0,0,0), 0.35, roi)
 
     # ===== Recording ON/OFF indicator =====
     rec = "ON" if kb_manager.is_recording else "OFF"   # ← Changed
@@ -35,7 +91,8 @@ def draw_hud(frame_bgr, blackboard, kb_manager, extra_msg=None):
     thick = kb_manager.thickness
     zoom = getattr(blackboard.bg_manager, "zoom", 1.0)
 
-    # Display page only when PDF is active
+    # Display page only when PDF is active (video: play state and paused timestamp)
+    video = getattr(blackboard.bg_manager, "video", None)
     if blackboard.bg_manager.doc:
         total_pages = len(blackboard.bg_manager.doc)
         page = blackboard.bg_manager.page_index + 1
@@ -51,38 +108,58 @@ def draw_hud(frame_bgr, blackboard, kb_manager, extra_msg=None):
     gap = 20  # Gap between left/right columns
     x_left = 30
     y1 = 50
-    _draw_text(img, row1_left, (x_left, y1))
-    _draw_text(img, row1_right, (x_left + left_w1 + gap, y1))  # ← Dynamic x calculation to avoid overlap
+    _draw_text(img, row1_left, (x_left, y1), roi=roi)
+    _draw_text(img, row1_right, (x_left + left_w1 + gap, y1), roi=roi)  # ← Dynamic x calculation to avoid overlap
 
     # Row2: "Pen: (..).. Thick: .." | "Zoom: .. Page: .."
     row2_left  = f"Pen: {color}  Thick: {thick}"
+    if getattr(kb_manager, "pen_alpha", 1.0) < 1.0:
+        row2_left += f"  HL {kb_manager.pen_alpha:.0%}"
+    if getattr(blackboard, "max_hands", 1) > 1:
+        row2_left += f"  Hand {kb_manager.pen_hand + 1}"
     row2_right = f"Zoom: {zoom:.2f}  Page: {page}/{total_pages}"
+    if video is not None:
+        row2_right = f"Zoom: {zoom:.2f}  {video.status}"
     (left_w2, _), _ = cv2.getTextSize(row2_left, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
     y2 = 80
-    _draw_text(img, row2_left, (x_left, y2))
-    _draw_text(img, row2_right, (x_left + left_w2 + gap, y2))  # ← Dynamic x instead of fixed x(260)
+    _draw_text(img, row2_left, (x_left, y2), roi=roi)
+    _draw_text(img, row2_right, (x_left + left_w2 + gap, y2), roi=roi)  # ← Dynamic x instead of fixed x(260)
 
     # Short message (last action)
     if kb_manager.last_msg:
-        _draw_text(img, kb_manager.last_msg, (30, 108), (0,255,255), 0.6, 2)
+        _draw_text(img, kb_manager.last_msg, (30, 108), (0,255,255), 0.6, 2, roi=roi)
+
+    # Background export progress (right end of the panel)
+    exporter = getattr(kb_manager, "exporter", None)
+    if exporter is not None and exporter.status:
+        (sw, _), _ = cv2.getTextSize(exporter.status, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
+        _draw_text(img, exporter.status, (20 + panel_w - sw - 10, 108), (0,200,255), 0.6, 2, roi=roi)
 
     # Help panel
+    pacer_org = (30, 20 + panel_h + 20)
     if kb_manager.help_on:
         lines = kb_manager.help_lines()
         pad = 10
         box_w = 530
         box_h = 22*(len(lines)+1)
         y0 = 20 + panel_h + 10
-        overlay2 = img.copy()
-        cv2.rectangle(overlay2, (20, y0), (20+box_w, y0+box_h), (30,30,30), -1)
-        img[:] = cv2.addWeighted(overlay2, 0.70, img, 0.30, 0)
+        _shade(img, 20, y0, 20+box_w, y0+box_h, (30,30,30), 0.70, roi)
         y = y0 + 28
         for ln in lines:
-            _draw_text(img, ln, (30, y), (255,255,255), 0.6, 1)
+            _draw_text(img, ln, (30, y), (255,255,255), 0.6, 1, roi=roi)
             y += 22
+        # Below the help panel, or next to it when that is off screen
+        pacer_org = (30, y0 + box_h + 20) if y0 + box_h + 20 < h - 50 else (20 + box_w + 20, y0 + 28)
+
+    # Frame pacing stats (main loop only), just below the panel (or the help panel when shown)
+    pacer = getattr(blackboard, "pacer", None)
+    if pacer is not None:
+        gate = getattr(blackboard, "motion_gate", None)
+        status = pacer.status if gate is None else f"{pacer.status}  {gate.status}"
+        _draw_text(img, status, pacer_org, (200,200,200), 0.5, 1, roi=roi)
 
     # Additional message
     if extra_msg:
-        _draw_text(img, extra_msg, (30, h-30), (0,255,0), 0.7, 2)
+        _draw_text(img, extra_msg, (30, h-30), (0,255,0), 0.7, 2, roi=roi)
 
     return img
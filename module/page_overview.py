@@ -0,0 +1,320 @@
+# page_overview.py
+import queue
+import itertools
+import threading
+
+import cv2
+import numpy as np
+import fitz  # PyMuPDF (for PDF)
+
+from .highlight_ink import HighlightLayer
+
+
+class PageOverview:
+    """
+    Overview grid of all pages (background + ink) for jumping to any page.
+    - Thumbnails are built by a worker thread when the grid first shows their page: page
+      backgrounds are rasterized directly at thumbnail size (own document handle), ink thumbnails
+      are downscaled from the page canvases, and highlighter ink is blended between the two.
+      Opening or switching a deck costs nothing; pages that are never shown are never rendered.
+    - The render thread only marks pages whose ink changed and blits cached thumbnails,
+      so the grid opens in one frame even for long decks (missing thumbnails show as placeholders).
+    - Navigation: arrow keys (or a/d) move the selection, Enter jumps; with hand tracking,
+      pointing selects a page and a pinch (draw gesture) jumps to it.
+    """
+
+    GAP = 14
+    MARGIN = 40
+
+    def __init__(self, width, height, thumb_w=160):
+        self.width = width
+        self.height = height
+        self.thumb_size = (thumb_w, max(int(round(thumb_w * height / width)), 1))
+        self.visible = False
+        self.cursor = 0
+        self.n_pages = 1
+        self._scroll = 0            # First visible row
+
+        self._gen = 0               # Deck generation (results of older decks are dropped)
+        self._thumbs = {}           # page -> combined thumbnail (background + ink)
+        self._bg = {}               # page -> background thumbnail   (worker only)
+        self._ink = {}              # page -> ink thumbnail          (worker only)
+        self._hl = {}               # page -> (HighlightLayer, thumbnail-size index) (worker only)
+        self._worker_gen = 0
+        self._doc = None            # Document handle of the worker (PDF decks)
+        self._deck = (None, "solid", (0, 0, 0))
+        self._loaders = (None, None)
+        self._requested = set()     # Pages whose thumbnail jobs were queued (shown at least once)
+        self._stale_ink = set()     # Pages whose ink changed since their thumbnail was queued
+        self._prev_gesture = "none"
+
+        self._jobs = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._thread = threading.Thread(target=self._run, name="PageOverview", daemon=True)
+        self._thread.start()
+
+    # =======================================================
+    #  Deck / ink updates (render thread)
+    # =======================================================
+    def set_deck(self, source, mode, n_pages, ink_loader, bg_color=(0, 0, 0), highlight_loader=None):
+        """
+        New background deck: drop all thumbnails (they are built again as pages are shown).
+        ink_loader(page) returns the saved canvas of a page that is not loaded yet (or None),
+        highlight_loader(page) its saved highlighter ink as BGRA (or None).
+        """
+        self._gen += 1
+        self._thumbs = {}
+        self._requested.clear()
+        self._stale_ink.clear()
+        self._deck = (source, mode, bg_color)
+        self._loaders = (ink_loader, highlight_loader)
+        self.n_pages = max(n_pages, 1)
+        self.cursor = min(self.cursor, self.n_pages - 1)
+
+    def mark_ink(self, page):
+        """Ink of `page` changed (cheap; the thumbnail is refreshed when the grid is shown)."""
+        self._stale_ink.add(page)
+
+    def refresh(self, page_canvases, page_highlights=None):
+        """
+        Queue thumbnails of pages the grid shows for the first time, and ink thumbnails of changed
+        pages (called every frame while the grid is visible).
+        """
+        page_highlights = page_highlights or {}
+        gen = self._gen
+        for page in self._visible_pages():
+            if page in self._requested:
+                continue
+            self._requested.add(page)
+            self._stale_ink.discard(page)
+            # Ink first (loaded pages are cheap), then the background of the page
+            canvas = page_canvases.get(page)
+            if canvas is not None:
+                self._put(0, gen, "ink", page, self._ink_job(canvas, page_highlights.get(page)))
+            else:
+                self._put(2, gen, "saved_ink", page, self._loaders)
+            self._put(1, gen, "bg", page, self._deck)
+
+        for page in list(self._stale_ink):
+            if page not in self._requested:
+                continue
+            canvas = page_canvases.get(page)
+            if canvas is not None:
+                self._put(0, gen, "ink", page, self._ink_job(canvas, page_highlights.get(page)))
+            else:
+                # Page left blank (blank pages are not kept in memory)
+                self._put(0, gen, "ink", page, (None, None))
+        self._stale_ink.clear()
+
+    def toggle(self, page_canvases, current_page, page_highlights=None):
+        self.visible = not self.visible
+        if self.visible:
+            self.cursor = current_page
+            self._prev_gesture = "none"
+            self.refresh(page_canvases, page_highlights)
+        return self.visible
+
+    @staticmethod
+    def _ink_job(canvas, layer):
+        """Copies of a page's opaque and highlighter ink (the render thread keeps drawing)"""
+        return canvas.copy(), layer.copy() if layer is not None and layer.any() else None
+
+    def close(self):
+        self._jobs.put((-1, next(self._seq), None))
+
+    # =======================================================
+    #  Navigation
+    # =======================================================
+    def _grid(self):
+        tw, th = self.thumb_size
+        cols = max((self.width - 2 * self.MARGIN + self.GAP) // (tw + self.GAP), 1)
+        rows = max((self.height - 2 * self.MARGIN + self.GAP) // (th + self.GAP), 1)
+        return cols, rows
+
+    def move(self, step):
+        self.cursor = min(max(self.cursor + step, 0), self.n_pages - 1)
+
+    def handle_key(self, key, left, up, right, down):
+        """Grid navigation. Returns (consumed, page to jump to or None)."""
+        cols, _ = self._grid()
+        if key in (81, left, ord("a")):
+            self.move(-1)
+        elif key in (83, right, ord("d")):
+            self.move(1)
+        elif key in (82, up):
+            self.move(-cols)
+        elif key in (84, down):
+            self.move(cols)
+        elif key in (13, 10):
+            self.visible = False
+            return True, self.cursor
+        elif key == 27:
+            self.visible = False
+        else:
+            return False, None
+        return True, None
+
+    def handle_pointer(self, mode, point):
+        """Hand pointer over the grid: hover selects, a new pinch (draw) jumps. Returns page or None."""
+        pinch = mode == "draw" and self._prev_gesture != "draw"
+        self._prev_gesture = mode
+        page = self._page_at(point)
+        if page is None:
+            return None
+        self.cursor = page
+        if pinch:
+            self.visible = False
+            return page
+        return None
+
+    def _page_at(self, point):
+        if point == (-1, -1):
+            return None
+        tw, th = self.thumb_size
+        cols, _ = self._grid()
+        x, y = point[0] - self.MARGIN, point[1] - self.MARGIN
+        col, row = x // (tw + self.GAP), y // (th + self.GAP)
+        if x < 0 or y < 0 or col >= cols or x % (tw + self.GAP) >= tw or y % (th + self.GAP) >= th:
+            return None
+        page = (row + self._scroll) * cols + col
+        return page if page < self.n_pages else None
+
+    # =======================================================
+    #  Drawing (render thread, cached thumbnails only)
+    # =======================================================
+    def _visible_pages(self):
+        """Pages on screen (scrolls so that the cursor stays visible)."""
+        cols, rows = self._grid()
+        row = self.cursor // cols
+        if row < self._scroll:
+            self._scroll = row
+        elif row >= self._scroll + rows:
+            self._scroll = row - rows + 1
+        first = self._scroll * cols
+        return range(first, min(first + cols * rows, self.n_pages))
+
+    def draw(self, frame):
+        """Draw the grid over `frame` in place."""
+        tw, th = self.thumb_size
+        cols, _ = self._grid()
+        pages = self._visible_pages()
+
+        cv2.convertScaleAbs(frame, dst=frame, alpha=0.25)  # Dim the board behind the grid
+        for page in pages:
+            i = page - pages.start
+            x = self.MARGIN + (i % cols) * (tw + self.GAP)
+            y = self.MARGIN + (i // cols) * (th + self.GAP)
+            thumb = self._thumbs.get(page)
+            if thumb is not None:
+                frame[y:y + th, x:x + tw] = thumb
+            else:
+                cv2.rectangle(frame, (x, y), (x + tw - 1, y + th - 1), (70, 70, 70), 1)
+            selected = page == self.cursor
+            cv2.rectangle(frame, (x - 3, y - 3), (x + tw + 2, y + th + 2),
+                          (0, 255, 255) if selected else (110, 110, 110), 3 if selected else 1)
+            cv2.putText(frame, str(page + 1), (x + 4, y + th - 6),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 255), 1, cv2.LINE_AA)
+        cv2.putText(frame, f"Page {self.cursor + 1}/{self.n_pages}  (arrows + Enter, or point + pinch)",
+                    (self.MARGIN, self.height - 12), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1, cv2.LINE_AA)
+        return frame
+
+    # =======================================================
+    #  Worker
+    # =======================================================
+    def _put(self, priority, gen, kind, page, payload):
+        self._jobs.put((priority, next(self._seq), (gen, kind, page, payload)))
+
+    def _run(self):
+        while True:
+            _, _, job = self._jobs.get()
+            if job is None:
+                break
+            gen, kind, page, payload = job
+            if gen != self._gen:
+                continue
+            if gen != self._worker_gen:
+                self._worker_gen = gen
+                self._bg, self._ink, self._hl = {}, {}, {}
+                self._close_doc()
+            try:
+                if kind == "bg":
+                    self._render_background(gen, page, *payload)
+                elif kind == "ink":
+                    self._set_ink(gen, page, *payload)
+                elif kind == "saved_ink":
+                    ink_loader, highlight_loader = payload
+                    canvas = ink_loader(page) if ink_loader is not None else None
+                    bgra = highlight_loader(page) if highlight_loader is not None else None
+                    layer = HighlightLayer.from_bgra(bgra) if bgra is not None else None
+                    if canvas is not None or layer is not None:
+                        if canvas is None:
+                            canvas = np.zeros((self.height, self.width, 3), np.uint8)
+                        self._set_ink(gen, page, canvas, layer)
+            except Exception as e:
+                print(f"[OVERVIEW] Thumbnail failed: {e}")
+        self._close_doc()
+
+    def _close_doc(self):
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+
+    def _render_background(self, gen, page, source, mode, bg_color):
+        tw, th = self.thumb_size
+        if mode == "pdf":
+            if self._doc is None:
+                self._doc = fitz.open(source)   # Own handle: the render thread keeps using its document
+            pg = self._doc.load_page(page)
+            scale = tw / max(pg.rect.width, 1)
+            pix = pg.get_pixmap(matrix=fitz.Matrix(scale, scale))
+            img = np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.width, pix.n)
+            img = cv2.cvtColor(img, cv2.COLOR_RGBA2BGR if pix.n == 4 else cv2.COLOR_RGB2BGR)
+            self._set_bg(gen, page, cv2.resize(img, (tw, th), interpolation=cv2.INTER_AREA))
+        elif mode in ("image", "video"):
+            if page != 0:
+                return
+            if mode == "video":
+                cap = cv2.VideoCapture(source)
+                ok, img = cap.read()
+                cap.release()
+                img = img if ok else None
+            else:
+                img = cv2.imread(source, cv2.IMREAD_COLOR)
+            if img is not None:
+                self._set_bg(gen, 0, cv2.resize(img, (tw, th), interpolation=cv2.INTER_AREA))
+        elif page == 0:
+            self._set_bg(gen, 0, np.full((th, tw, 3), bg_color, np.uint8))
+
+    def _set_bg(self, gen, page, thumb):
+        if gen == self._gen:
+            self._bg[page] = thumb
+            self._compose(gen, page)
+
+    def _set_ink(self, gen, page, canvas, layer=None):
+        if gen == self._gen:
+            if canvas is None:
+                self._ink.pop(page, None)
+            else:
+                self._ink[page] = cv2.resize(canvas, self.thumb_size, interpolation=cv2.INTER_AREA)
+            if layer is not None:
+                # Palette indices must not be interpolated
+                self._hl[page] = (layer, cv2.resize(layer.index, self.thumb_size, interpolation=cv2.INTER_NEAREST))
+            else:
+                self._hl.pop(page, None)
+            self._compose(gen, page)
+
+    def _compose(self, gen, page):
+        bg = self._bg.get(page)
+        ink = self._ink.get(page)
+        if bg is None:
+            return
+        thumb = bg.copy()
+        hl = self._hl.get(page)
+        if hl is not None:
+            layer, index = hl
+            layer.blend(thumb, index)
+        if ink is not None:
+            mask = cv2.inRange(ink, (0, 0, 0), (0, 0, 0))
+            np.copyto(thumb, ink, where=(mask == 0)[:, :, None])
+        if gen == self._gen:
+            self._thumbs[page] = thumb
@@ -0,0 +1,333 @@
+# session_server.py
+"""
+Headless multi-session hosting: several blackboards (one per room camera/stream) in one process,
+with the hand/segmentation models of all sessions on a shared pool of inference processes
+(inference_workers.SessionInferencePool), so the threads below only draw and composite.
+
+- FrameFeeder:    reader thread per session with a bounded frame queue
+                  (live sources drop the oldest frame when full, files apply backpressure)
+- HeadlessSession: one blackboard + view + outputs; step() renders one queued frame
+- FairScheduler:  bounded pool of compositing threads shared by all sessions; the next idle session
+                  with a queued frame is picked round robin, so a busy room cannot starve the others
+                  (a session is never stepped by two workers at once, frames stay in order)
+- Outputs:        video file (VideoWriter) or "mjpeg:PORT" (local HTTP MJPEG endpoint)
+
+Per-session FPS, queue depth, dropped frames and step time are reported periodically, plus
+the pool utilization and the estimated cores per session at the source frame rate.
+"""
+import time
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+
+# =======================================================
+#  Inputs
+# =======================================================
+class FrameFeeder:
+    """Reads a FrameSource on its own thread into a bounded queue."""
+
+    def __init__(self, source, live=False, depth=4, realtime=False, on_frame=None):
+        self.source = source
+        self.live = live
+        self.realtime = realtime and not live   # Files paced to their fps (simulated camera)
+        self.frames = queue.Queue(maxsize=depth)
+        self.dropped = 0
+        self.finished = False
+        self._on_frame = on_frame or (lambda: None)
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="FrameFeeder", daemon=True)
+        self._thread.start()
+
+    @property
+    def depth(self):
+        return self.frames.qsize()
+
+    def _run(self):
+        interval = 1.0 / self.source.fps if self.realtime and self.source.fps else 0.0
+        next_t = time.perf_counter()
+        while not self._stop:
+            ret, frame, _ = self.source.read()
+            if not ret:
+                break
+            if self.live:
+                # Never fall behind a live camera: replace the oldest queued frame
+                while True:
+                    try:
+                        self.frames.put_nowait(frame)
+                        break
+                    except queue.Full:
+                        try:
+                            self.frames.get_nowait()
+                            self.dropped += 1
+                        except queue.Empty:
+                            pass
+            else:
+                while not self._stop:
+                    try:
+                        self.frames.put(frame, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+            self._on_frame()
+            if interval:
+                next_t += interval
+                time.sleep(max(next_t - time.perf_counter(), 0))
+        self.finished = True
+        self._on_frame()
+
+    def get(self):
+        try:
+            return self.frames.get_nowait()
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._stop = True
+        self._thread.join(timeout=2)
+        self.source.release()
+
+
+# =======================================================
+#  Outputs
+# =======================================================
+class VideoFileOutput:
+    def __init__(self, path, fps, size):
+        self.path = path
+        self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps or 30.0, size)
+
+    def write(self, frame):
+        self.writer.write(frame)
+
+    def close(self):
+        self.writer.release()
+
+
+class MjpegEndpoint:
+    """Latest frame as an MJPEG stream on http://host:port/ (encoded on the client threads, once per frame)."""
+
+    keeps_frame = True  # write() keeps a reference: the frame must not be modified afterwards
+
+    def __init__(self, port, host="127.0.0.1", quality=80):
+        self.port = port
+        self.quality = quality
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._jpeg = (0, b"")
+        endpoint = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                endpoint._serve(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="MjpegEndpoint", daemon=True).start()
+        print(f"[SERVER] MJPEG endpoint http://{host}:{port}/")
+
+    def write(self, frame):
+        with self._cond:
+            self._frame = frame
+            self._seq += 1
+            self._cond.notify_all()
+
+    def _encoded(self, seq, frame):
+        if self._jpeg[0] != seq:
+            ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            self._jpeg = (seq, buf.tobytes() if ok else b"")
+        return self._jpeg[1]
+
+    def _serve(self, handler):
+        handler.send_response(200)
+        handler.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+        handler.end_headers()
+        seen = 0
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._seq != seen, timeout=1.0)
+                    if self._seq == seen:
+                        continue
+                    seen, frame = self._seq, self._frame
+                    data = self._encoded(seen, frame)
+                handler.wfile.write(
+                    b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n" % len(data)
+                    + data + b"\r\n"
+                )
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def open_output(spec, fps, size):
+    """'mjpeg:PORT' -> MjpegEndpoint, anything else -> video file"""
+    if spec.startswith("mjpeg:"):
+        return MjpegEndpoint(int(spec.split(":", 1)[1]))
+    return VideoFileOutput(spec, fps, size)
+
+
+# =======================================================
+#  Sessions and scheduling
+# =======================================================
+class HeadlessSession:
+    """One hosted blackboard: frames from `feeder`, rendered frames to `outputs`."""
+
+    def __init__(self, name, blackboard, view, kb, feeder, outputs, user_mask=True):
+        self.name = name
+        self.blackboard = blackboard
+        self.view = view
+        self.kb = kb
+        self.feeder = feeder
+        self.outputs = outputs
+        self.user_mask = user_mask
+
+        self.busy = False
+        self.frames = 0
+        self.step_s = 0.0           # Total time spent in step()
+        self.max_depth = 0
+        self._report = (time.perf_counter(), 0)
+
+    @property
+    def done(self):
+        return self.feeder.finished and self.feeder.depth == 0
+
+    def ready(self):
+        return not self.busy and self.feeder.depth > 0
+
+    def step(self):
+        self.max_depth = max(self.max_depth, self.feeder.depth)
+        frame = self.feeder.get()
+        if frame is None:
+            return
+        t0 = time.perf_counter()
+        output_image, _, _ = self.blackboard.update(frame, True, self.user_mask)
+        final = self.view.compose(output_image, self.blackboard, self.kb)
+        for out in self.outputs:
+            out.write(final)
+        self.step_s += time.perf_counter() - t0
+        self.frames += 1
+
+    def interval_fps(self):
+        """FPS since the previous call"""
+        now = time.perf_counter()
+        t, n = self._report
+        self._report = (now, self.frames)
+        return (self.frames - n) / max(now - t, 1e-9)
+
+    def close(self):
+        self.feeder.close()
+        for out in self.outputs:
+            out.close()
+        self.kb.close()
+        self.blackboard.close()
+
+
+class FairScheduler:
+    """
+    Bounded thread pool shared by all sessions, round robin over sessions with queued frames.
+    A step waits on its session's inference process (GIL released) while other threads composite.
+    """
+
+    def __init__(self, sessions, workers=4):
+        self.sessions = sessions
+        self.workers = max(int(workers), 1)
+        self.busy_s = 0.0
+        self._cond = threading.Condition()
+        self._rr = 0
+        self._stop = False
+
+    def notify(self):
+        with self._cond:
+            self._cond.notify()
+
+    def _next(self):
+        n = len(self.sessions)
+        for i in range(n):
+            session = self.sessions[(self._rr + i) % n]
+            if session.ready():
+                self._rr = (self._rr + i + 1) % n
+                return session
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                session = None
+                while not self._stop:
+                    session = self._next()
+                    if session is not None:
+                        session.busy = True
+                        break
+                    self._cond.wait(timeout=0.05)
+                if session is None:
+                    return
+            t0 = time.perf_counter()
+            try:
+                session.step()
+            except Exception as e:
+                print(f"[SERVER] {session.name}: frame failed: {e}")
+            with self._cond:
+                self.busy_s += time.perf_counter() - t0
+                session.busy = False
+                self._cond.notify()
+
+    def run(self, duration=None, report_interval=5.0):
+        """Serve until every session's source ended, `duration` seconds passed or Ctrl+C."""
+        threads = [threading.Thread(target=self._worker, name=f"SessionWorker-{i}", daemon=True)
+                   for i in range(self.workers)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        last_report = t0
+        try:
+            while not all(s.done for s in self.sessions):
+                time.sleep(0.05)
+                now = time.perf_counter()
+                if duration and now - t0 >= duration:
+                    break
+                if now - last_report >= report_interval:
+                    self.report(now - t0)
+                    last_report = now
+        except KeyboardInterrupt:
+            print("[SERVER] Interrupted")
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        for t in threads:
+            t.join()
+        self.summary(time.perf_counter() - t0)
+
+    def report(self, elapsed):
+        print(f"[SERVER] t={elapsed:6.1f}s  pool {self.busy_s / max(elapsed * self.workers, 1e-9) * 100:5.1f}% "
+              f"of {self.workers} workers")
+        for s in self.sessions:
+            print(f"  {s.name:<16s} {s.interval_fps():6.1f} fps  queue {s.feeder.depth}/{s.feeder.frames.maxsize}"
+                  f"  dropped {s.feeder.dropped}")
+
+    def summary(self, elapsed):
+        print(f"\n[SERVER] {len(self.sessions)} session(s), {self.workers} worker(s), {elapsed:.1f}s")
+        print(f"  {'session':<16s} {'frames':>7s} {'fps':>7s} {'ms/frame':>9s} {'max queue':>9s} {'dropped':>8s} "
+              f"{'cores @src fps':>14s} {'hand det':>8s}")
+        total_cores = 0.0
+        for s in self.sessions:
+            ms = s.step_s / max(s.frames, 1) * 1000
+            src_fps = s.feeder.source.fps or 30.0
+            cores = ms / 1000 * src_fps   # Worker time needed to keep up with the source
+            total_cores += cores
+            # Share of frames the motion gate let through to hand detection
+            gate = s.blackboard.motion_gate
+            det = f"{gate.detections / max(gate.frames, 1) * 100:7.0f}%" if gate is not None else f"{'-':>8s}"
+            print(f"  {s.name:<16s} {s.frames:7d} {s.frames / max(elapsed, 1e-9):7.1f} {ms:9.2f} "
+                  f"{s.max_depth:9d} {s.feeder.dropped:8d} {cores:14.2f} {det}")
+        if self.sessions and total_cores:
+            print(f"  pool utilization {self.busy_s / max(elapsed * self.workers, 1e-9) * 100:.1f}%, "
+                  f"~{len(self.sessions) / total_cores:.2f} sessions per core at source fps")
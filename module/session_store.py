@@ -0,0 +1,339 @@
+# session_store.py
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+
+import cv2
+
+from .highlight_ink import HighlightLayer
+
+_PAGE_FILE = re.compile(r"page_(\d{4})(?:_hl)?\.png$")
+
+
+def file_digest(path, chunk=1 << 20):
+    """SHA-1 hex digest of a file's content (read in chunks)."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(chunk)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+
+def _page_path(session_dir, index, suffix=""):
+    return os.path.join(session_dir, f"page_{index:04d}{suffix}.png")
+
+
+def _read_canvas(path, width, height):
+    """Saved canvas at `path` (BGR, board size), or None."""
+    if not os.path.exists(path):
+        return None
+    canvas = cv2.imread(path, cv2.IMREAD_COLOR)
+    if canvas is None:
+        return None
+    if canvas.shape[:2] != (height, width):
+        canvas = cv2.resize(canvas, (width, height), interpolation=cv2.INTER_NEAREST)
+    return canvas
+
+
+def _read_highlight(path, width, height):
+    """Saved translucent ink at `path` (BGRA, board size), or None."""
+    if not os.path.exists(path):
+        return None
+    bgra = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if bgra is None or bgra.ndim != 3 or bgra.shape[2] != 4:
+        return None
+    if bgra.shape[:2] != (height, width):
+        bgra = cv2.resize(bgra, (width, height), interpolation=cv2.INTER_NEAREST)
+    return bgra
+
+
+class SessionStore:
+    """
+    Incremental autosave of per-page canvases.
+    - Sessions are keyed by the background document's path + content hash
+      (the solid blackboard has its own session).
+    - Pages are marked dirty by the blackboard; only dirty pages are written,
+      by a background thread, as PNG files (ink canvases are mostly black and compress well).
+    - On resume, nothing is read up front: load_page() restores a page when it is visited.
+
+    Layout:
+        <root>/last.json                  -> key of the last modified session
+        <root>/<key>/meta.json            -> source, hash, size, current page
+        <root>/<key>/page_0000.png ...    -> one file per non-empty page
+        <root>/<key>/page_0000_hl.png     -> translucent ink of the page (BGRA), if any
+    """
+
+    def __init__(self, root="sessions", interval=2.0):
+        self.root = root
+        self.interval = interval
+        os.makedirs(self.root, exist_ok=True)
+
+        self.key = None
+        self.dir = None
+        self.meta = {}
+        self._canvases = {}
+        self._highlights = {}
+        self._dirty = set()
+        self._meta_dirty = False
+        self._hash_cache = {}
+
+        self._lock = threading.Lock()       # Protects _dirty / meta
+        self._io_lock = threading.Lock()    # Serializes flushes (worker vs. open/close)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="SessionStore", daemon=True)
+        self._thread.start()
+
+    # =======================================================
+    #  Session selection
+    # =======================================================
+    def _file_hash(self, path):
+        """Content hash of `path`, cached by (path, mtime, size)."""
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        digest = self._hash_cache.get(key)
+        if digest is None:
+            digest = file_digest(path)
+            self._hash_cache[key] = digest
+        return digest
+
+    def warm(self, source):
+        """Precompute the hash of `source` (can be called from a loader thread)."""
+        if source is not None:
+            self._file_hash(source)
+
+    def open(self, source, page_canvases, width, height, page_highlights=None):
+        """
+        Switch to the session of `source` (None = solid blackboard).
+        Pending pages of the previous session are written first.
+        page_highlights: {page: HighlightLayer} saved along with the canvases
+        """
+        self.flush()
+
+        if source is None:
+            digest = ""
+            key = f"solid_{width}x{height}"
+        else:
+            digest = self._file_hash(source)
+            name = os.path.splitext(os.path.basename(source))[0]
+            key = f"{name}_{digest[:12]}"
+
+        session_dir = os.path.join(self.root, key)
+        os.makedirs(session_dir, exist_ok=True)
+
+        meta = {}
+        meta_path = os.path.join(session_dir, "meta.json")
+        if os.path.exists(meta_path):
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = {}
+
+        meta.update({
+            "source": os.path.abspath(source) if source else None,
+            "hash": digest,
+            "width": width,
+            "height": height,
+        })
+        meta.setdefault("page_index", 0)
+
+        with self._lock:
+            self.key = key
+            self.dir = session_dir
+            self.meta = meta
+            self._canvases = page_canvases
+            self._highlights = page_highlights if page_highlights is not None else {}
+            self._dirty.clear()
+            self._meta_dirty = False
+
+        print(f"[SESSION] '{key}' opened")
+
+    def last_source(self):
+        """
+        Background source of the last session, if it can be resumed.
+        Returns (found, source): source is None for the solid blackboard.
+        """
+        try:
+            with open(os.path.join(self.root, "last.json"), "r", encoding="utf-8") as f:
+                key = json.load(f)["key"]
+            with open(os.path.join(self.root, key, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError, KeyError):
+            return False, None
+
+        source = meta.get("source")
+        if source is None:
+            return True, None
+        if not os.path.exists(source) or self._file_hash(source) != meta.get("hash"):
+            print(f"[SESSION] '{source}' changed or missing, not resuming")
+            return False, None
+        return True, source
+
+    @property
+    def page_index(self):
+        return self.meta.get("page_index", 0)
+
+    def set_page_index(self, index):
+        with self._lock:
+            if self.meta.get("page_index") != index:
+                self.meta["page_index"] = index
+                self._meta_dirty = True
+
+    # =======================================================
+    #  Pages
+    # =======================================================
+    def _page_path(self, index, suffix=""):
+        return _page_path(self.dir, index, suffix)
+
+    def mark_dirty(self, index):
+        """Call after the canvas of page `index` was modified."""
+        if self.key is None:
+            return
+        with self._lock:
+            self._dirty.add(index)
+            self._meta_dirty = True
+
+    def load_page(self, index):
+        """Saved canvas of page `index`, or None if it was never drawn on."""
+        if self.dir is None:
+            return None
+        return _read_canvas(self._page_path(index), self.meta["width"], self.meta["height"])
+
+    def load_highlight(self, index):
+        """Saved translucent ink of page `index` as BGRA, or None."""
+        if self.dir is None:
+            return None
+        return _read_highlight(self._page_path(index, "_hl"), self.meta["width"], self.meta["height"])
+
+    def snapshot(self):
+        """
+        Read-only view of every page of this session as it is now, for worker threads
+        (export, viewer snapshots).
+        Only the pages changed since the last autosave are copied here; the others are
+        read from the session files by the worker, one page at a time.
+        """
+        with self._lock:
+            dirty = set(self._dirty)
+            canvases = self._canvases
+            highlights = self._highlights
+            session_dir = self.dir
+            size = (self.meta.get("width"), self.meta.get("height"))
+        changed = {}
+        for index in dirty:
+            canvas = canvases.get(index)
+            layer = highlights.get(index)
+            changed[index] = (
+                canvas.copy() if canvas is not None else None,
+                layer.copy() if layer is not None else None,
+            )
+        return SavedPages(session_dir, size, changed, self._io_lock)
+
+    # =======================================================
+    #  Writing
+    # =======================================================
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[SESSION] Autosave failed: {e}")
+
+    def flush(self):
+        """Write all dirty pages (and meta) of the current session."""
+        with self._io_lock:
+            with self._lock:
+                if self.dir is None:
+                    return
+                dirty, self._dirty = self._dirty, set()
+                meta = dict(self.meta) if self._meta_dirty else None
+                self._meta_dirty = False
+                canvases = self._canvases
+                highlights = self._highlights
+
+            for index in sorted(dirty):
+                # A page no longer in memory was left blank (its files are removed).
+                # Copy first: the render thread keeps drawing into the live canvas.
+                # A stroke drawn during the copy marks the page dirty again afterwards.
+                canvas = canvases.get(index)
+                self._write_page(self._page_path(index), canvas.copy() if canvas is not None else None)
+                layer = highlights.get(index)
+                self._write_page(self._page_path(index, "_hl"), layer.to_bgra() if layer is not None else None)
+
+            if meta is not None:
+                # A session becomes the one to resume once something in it changed
+                meta["updated"] = time.time()
+                self._write_json(os.path.join(self.dir, "meta.json"), meta)
+                self._write_json(os.path.join(self.root, "last.json"), {"key": self.key})
+
+    def _write_page(self, path, img):
+        """PNG of a page layer; an empty layer removes its file."""
+        if img is None or not img.any():
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        ok, buf = cv2.imencode(".png", img, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        if ok:
+            self._write_atomic(path, buf.tobytes())
+
+    def _write_atomic(self, path, data):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _write_json(self, path, obj):
+        self._write_atomic(path, json.dumps(obj, indent=2).encode("utf-8"))
+
+    def close(self):
+        """Stop the autosave thread and write remaining changes"""
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        print("SessionStore: all pages saved.")
+
+
+class SavedPages:
+    """
+    Pages of a session at the time SessionStore.snapshot() was taken.
+    - indices(): pages with ink, ascending
+    - load(i):   (canvas, HighlightLayer) of page i, either may be None
+    Pages that were not copied are decoded from the session directory on each load(), so
+    the caller holds one page at a time. Reads wait for an autosave in progress
+    (a page being written is still read whole).
+    """
+
+    def __init__(self, session_dir, size, changed, io_lock):
+        self.dir = session_dir
+        self.width, self.height = size
+        self._changed = changed     # page -> (canvas, HighlightLayer) copied at snapshot time
+        self._io_lock = io_lock
+
+    def indices(self):
+        pages = {
+            i for i, (canvas, layer) in self._changed.items()
+            if (canvas is not None and canvas.any()) or (layer is not None and layer.any())
+        }
+        if self.dir is not None and os.path.isdir(self.dir):
+            with self._io_lock:
+                names = os.listdir(self.dir)
+            for name in names:
+                m = _PAGE_FILE.match(name)
+                if m and int(m.group(1)) not in self._changed:
+                    pages.add(int(m.group(1)))
+        return sorted(pages)
+
+    def load(self, index):
+        if index in self._changed:
+            return self._changed[index]
+        if self.dir is None:
+            return None, None
+        with self._io_lock:
+            canvas = _read_canvas(_page_path(self.dir, index), self.width, self.height)
+            bgra = _read_highlight(_page_path(self.dir, index, "_hl"), self.width, self.height)
+        return canvas, HighlightLayer.from_bgra(bgra) if bgra is not None else None
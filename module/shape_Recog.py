@@ -59,14 +59,16 @@ class ShapeRecognizer:
         self.prev_mode = mode
         return False
 
-    def _recognize_and_draw_shape(self, canvas):
+    def classify(self, pts, canvas_shape):
         """
-        Finds a closed area based on saved coordinates and corrects it to a rectangle/triangle/circle.
+        Recognizes the shape of a stroke without touching the canvas.
+        - pts: (N, 2) int32 stroke points, canvas_shape: (h, w) of the canvas the stroke was drawn on
+        - Returns (shape_type, geometry): ("triangle" / "rectangle", approx polygon),
+          ("circle", (center, radius)) or ("unknown", None)
         """
 
         # 1. Create temporary mask with drawing coordinates and find contours (maintain existing logic)
-        pts = np.array(self.current_drawing_pts, dtype=np.int32)
-        temp_mask = np.zeros_like(canvas[:, :, 0])
+        temp_mask = np.zeros(canvas_shape[:2], dtype=np.uint8)
         cv2.polylines(temp_mask, [pts], isClosed=False, color=255, thickness=40)
 
         # Apply Closing morphological operation
@@ -78,30 +80,26 @@ class ShapeRecognizer:
         )
 
         if not contours:
-            return False
+            return "unknown", None
 
         c = max(contours, key=cv2.contourArea)
         area = cv2.contourArea(c)
 
         if area < self.MIN_CONTOUR_AREA:
-            return False
+            return "unknown", None
 
         # 2. Analyze and recognize shape
-        shape_type = "unknown"
-
         # Calculate the perimeter of the contour and set epsilon as a ratio of the perimeter
         peri = cv2.arcLength(c, True)
         approx = cv2.approxPolyDP(c, self.APPROX_EPSILON * peri, True)
 
         if len(approx) == 3:
             # 3 vertices: Triangle
-            shape_type = "triangle"
-            x, y, w, h = cv2.boundingRect(approx)
+            return "triangle", approx
 
         elif len(approx) == 4 and cv2.isContourConvex(approx):
             # 4 vertices: Rectangle (existing logic)
-            shape_type = "rectangle"
-            x, y, w, h = cv2.boundingRect(approx)
+            return "rectangle", approx
 
         else:
             # More than 4 vertices: Circle or other complex shape
@@ -120,17 +118,23 @@ class ShapeRecognizer:
                     area_ratio >= self.CIRCLE_MATCH_THRESHOLD
                     and 0.7 <= aspect_ratio <= 1.3  # Adjust value if needed (circle recognition range)
                 ):
-                    shape_type = "circle"
                     # Calculate center and radius of the circle
                     ((cx, cy), radius) = cv2.minEnclosingCircle(c)
-                    center = (int(cx), int(cy))
-                    radius = int(radius)
+                    return "circle", ((int(cx), int(cy)), int(radius))
+
+        return "unknown", None
+
+    def _recognize_and_draw_shape(self, canvas):
+        """
+        Finds a closed area based on saved coordinates and corrects it to a rectangle/triangle/circle.
+        """
+
+        pts = np.array(self.current_drawing_pts, dtype=np.int32)
+        shape_type, geometry = self.classify(pts, canvas.shape[:2])
 
         # 3. Draw corrected shape (including erasing)
         if shape_type != "unknown":
 
-            pts = np.array(self.current_drawing_pts, dtype=np.int32)
-
             if len(pts) > 1:
                 # Erase by redrawing the path with a black line.
                 # Set thickness slightly larger than the drawing thickness to ensure it's fully erased.
@@ -150,13 +154,14 @@ class ShapeRecognizer:
             # 2) Draw corrected shape
             if shape_type == "circle":
                 # Draw corrected circle
+                center, radius = geometry
                 cv2.circle(canvas, center, radius, self.draw_color, self.draw_thickness)
 
             elif shape_type in ("rectangle", "triangle"):
                 # Draw corrected rectangle or triangle outline (using approx)
                 cv2.polylines(
                     canvas,
-                    [approx],
+                    [geometry],
                     isClosed=True,
                     color=self.draw_color,
                     thickness=self.draw_thickness,
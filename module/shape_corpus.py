@@ -0,0 +1,300 @@
+# shape_corpus.py
+"""
+Labeled stroke corpus for ShapeRecognizer: recording, batch evaluation and threshold sweeps.
+
+File layout (little endian), records are appended while drawing in shape mode:
+    b"VBSHAPE1"
+    records...
+        <B label> <HH canvas w h> <H n> [n*2 int16 points (x, y)]
+
+Evaluation classifies every stroke with ShapeRecognizer.classify (the recognition step of shape
+mode, without the canvas correction) on a process pool. Each worker gets the corpus once (pool
+initializer) and runs chunks of strokes for one parameter set, so a sweep over a parameter grid
+reuses the same pool. Reported: confusion matrix, per-stroke latency percentiles and the peak
+allocation of one classify() call (tracemalloc, separate pass). Latencies are wall-clock, so
+more workers than cores inflates them.
+"""
+import os
+import time
+import struct
+import itertools
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from .shape_Recog import ShapeRecognizer
+
+MAGIC = b"VBSHAPE1"
+LABELS = ("unknown", "triangle", "rectangle", "circle")   # "unknown": strokes that must stay as drawn
+
+_RECORD = struct.Struct("<BHHH")
+
+# Recognizer parameters: key -> ShapeRecognizer attribute
+PARAMS = {
+    "approx_epsilon": "APPROX_EPSILON",
+    "circle_threshold": "CIRCLE_MATCH_THRESHOLD",
+    "min_contour_area": "MIN_CONTOUR_AREA",
+}
+
+DEFAULT_GRID = {
+    "approx_epsilon": [0.02, 0.03, 0.04, 0.05, 0.06],
+    "circle_threshold": [0.65, 0.7, 0.75, 0.8],
+    "min_contour_area": [250, 500, 1000],
+}
+
+
+# =======================================================
+#  Corpus file
+# =======================================================
+class CorpusWriter:
+    """Appends labeled strokes to a corpus file (created if missing)."""
+
+    def __init__(self, path, label="unknown"):
+        if label not in LABELS:
+            raise ValueError(f"unknown shape label '{label}' (expected one of {', '.join(LABELS)})")
+        self.path = path
+        self.label = label
+        self.count = 0
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._f = open(path, "ab")
+        if new:
+            self._f.write(MAGIC)
+
+    def write(self, pts, size, label=None):
+        """pts: stroke points, size: (w, h) of the canvas they were drawn on"""
+        pts = np.asarray(pts, np.int16).reshape(-1, 2)[:0xFFFF]
+        self._f.write(_RECORD.pack(LABELS.index(label or self.label), size[0], size[1], len(pts)))
+        self._f.write(pts.tobytes())
+        self._f.flush()
+        self.count += 1
+
+    def close(self):
+        if not self._f.closed:
+            self._f.close()
+            print(f"[SHAPES] {self.count} '{self.label}' stroke(s) appended to {self.path}")
+
+
+def read_corpus(path):
+    """-> list of (label, (w, h), (N, 2) int32 points)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"'{path}' is not a shape corpus file")
+    strokes = []
+    pos = len(MAGIC)
+    while pos + _RECORD.size <= len(data):
+        label, w, h, n = _RECORD.unpack_from(data, pos)
+        pos += _RECORD.size
+        pts = np.frombuffer(data, np.int16, n * 2, pos).reshape(n, 2).astype(np.int32)
+        pos += n * 4
+        strokes.append((LABELS[label], (w, h), pts))
+    return strokes
+
+
+def synthetic_corpus(per_label=50, size=(1280, 720), seed=0):
+    """Hand-drawn looking strokes of every label (deterministic), for runs without a recorded corpus."""
+    rng = np.random.default_rng(seed)
+    w, h = size
+    strokes = []
+    for i in range(per_label):
+        for label in LABELS:
+            r = rng.uniform(40, min(w, h) / 3)
+            c = rng.uniform([r + 20, r + 20], [w - r - 20, h - r - 20])
+            rot = rng.uniform(0, 2 * np.pi)
+            n = int(rng.integers(30, 120))
+            if label == "circle":
+                a = np.linspace(0, 2 * np.pi * rng.uniform(1.0, 1.1), n) + rot
+                pts = np.stack([np.cos(a), np.sin(a)], 1) * r
+            elif label in ("triangle", "rectangle"):
+                k = 3 if label == "triangle" else 4
+                corners = np.stack([np.cos(rot + np.arange(k + 1) * 2 * np.pi / k),
+                                    np.sin(rot + np.arange(k + 1) * 2 * np.pi / k)], 1) * r
+                if label == "rectangle":
+                    corners[:, 1] *= rng.uniform(0.5, 1.0)   # Not only squares
+                t = np.linspace(0, k, n)
+                j = np.minimum(t.astype(int), k - 1)
+                pts = corners[j] + (corners[j + 1] - corners[j]) * (t - j)[:, None]
+            else:
+                # Open strokes: arcs, zigzags (handwriting-like) and lines
+                kind = i % 3
+                t = np.linspace(0, 1, n)
+                if kind == 0:
+                    a = rot + t * np.pi * rng.uniform(0.5, 1.2)
+                    pts = np.stack([np.cos(a), np.sin(a)], 1) * r
+                elif kind == 1:
+                    pts = np.stack([(t - 0.5) * 2 * r, np.sign(np.sin(t * 2 * np.pi * rng.integers(2, 6))) * r * 0.2], 1)
+                else:
+                    pts = np.stack([(t - 0.5) * 2 * r, (t - 0.5) * r * rng.uniform(-1, 1)], 1)
+            pts = pts + c + rng.normal(0, max(r * 0.03, 1.5), pts.shape)
+            pts = np.clip(pts, 0, [w - 1, h - 1])
+            strokes.append((label, (w, h), np.rint(pts).astype(np.int32)))
+    return strokes
+
+
+def load_corpus(spec):
+    """'synthetic[:N]' (N strokes per label) or a corpus file path"""
+    if spec == "synthetic" or spec.startswith("synthetic:"):
+        per_label = int(spec.split(":", 1)[1]) if ":" in spec else 50
+        return synthetic_corpus(per_label)
+    return read_corpus(spec)
+
+
+def parse_grid(text):
+    """'approx_epsilon=0.03,0.04;min_contour_area=250,500' -> DEFAULT_GRID with those keys replaced"""
+    grid = dict(DEFAULT_GRID)
+    for part in filter(None, (p.strip() for p in (text or "").split(";"))):
+        key, _, values = part.partition("=")
+        key = key.strip()
+        if key not in PARAMS:
+            raise ValueError(f"unknown sweep parameter '{key}' (expected one of {', '.join(PARAMS)})")
+        grid[key] = [float(v) for v in values.split(",") if v.strip()]
+    return grid
+
+
+def default_params():
+    rec = ShapeRecognizer()
+    return {key: getattr(rec, attr) for key, attr in PARAMS.items()}
+
+
+# =======================================================
+#  Evaluation (process pool)
+# =======================================================
+_corpus = None
+
+
+def _init_worker(spec):
+    global _corpus
+    _corpus = load_corpus(spec)
+    # One OpenCV thread per worker: the pool already uses the cores, and latencies stay per-call
+    cv2.setNumThreads(1)
+    if _corpus:
+        # Warm-up (first-call allocations are not part of a stroke's latency)
+        _, (w, h), pts = _corpus[0]
+        ShapeRecognizer().classify(pts, (h, w))
+
+
+def _make_recognizer(params):
+    rec = ShapeRecognizer()
+    for key, value in params.items():
+        setattr(rec, PARAMS[key], value)
+    return rec
+
+
+def _eval_chunk(params, start, stop, memory):
+    """Worker: (labels, predictions, latencies ms, peak KB) for strokes [start, stop) of the corpus."""
+    rec = _make_recognizer(params)
+    strokes = _corpus[start:stop]
+    labels, preds, times = [], [], []
+    for label, (w, h), pts in strokes:
+        t0 = time.perf_counter()
+        shape_type, _ = rec.classify(pts, (h, w))
+        times.append((time.perf_counter() - t0) * 1000)
+        labels.append(label)
+        preds.append(shape_type)
+
+    peak = 0
+    if memory:
+        tracemalloc.start()
+        for _, (w, h), pts in strokes:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            rec.classify(pts, (h, w))
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+        tracemalloc.stop()
+    return labels, preds, times, peak / 1024
+
+
+def confusion_matrix(labels, preds):
+    """(len(LABELS), len(LABELS)) counts, rows = label, columns = prediction"""
+    m = np.zeros((len(LABELS), len(LABELS)), np.int64)
+    for label, pred in zip(labels, preds):
+        m[LABELS.index(label), LABELS.index(pred)] += 1
+    return m
+
+
+def summarize(params, labels, preds, times, peak_kb):
+    m = confusion_matrix(labels, preds)
+    times = np.asarray(times) if times else np.zeros(1)
+    recall = {LABELS[i]: float(m[i, i] / m[i].sum()) for i in range(len(LABELS)) if m[i].sum()}
+    return {
+        "params": params,
+        "strokes": len(labels),
+        "accuracy": float(np.trace(m) / max(m.sum(), 1)),
+        "recall": recall,
+        "confusion": m.tolist(),
+        "p50_ms": float(np.percentile(times, 50)),
+        "p90_ms": float(np.percentile(times, 90)),
+        "p99_ms": float(np.percentile(times, 99)),
+        "max_ms": float(times.max()),
+        "peak_kb": float(peak_kb),
+    }
+
+
+class CorpusEvaluator:
+    """Process pool with the corpus loaded in every worker; evaluate() runs one parameter set."""
+
+    def __init__(self, spec, workers=None, chunk=32):
+        self.size = len(load_corpus(spec))
+        self.chunk = chunk
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(spec,))
+
+    def evaluate_many(self, param_sets, memory=True):
+        """All parameter sets are queued at once so the pool stays busy across the sweep."""
+        jobs = [
+            [self._pool.submit(_eval_chunk, params, s, min(s + self.chunk, self.size), memory)
+             for s in range(0, self.size, self.chunk)]
+            for params in param_sets
+        ]
+        results = []
+        for params, futures in zip(param_sets, jobs):
+            labels, preds, times, peak = [], [], [], 0.0
+            for f in futures:
+                l, p, t, pk = f.result()
+                labels += l
+                preds += p
+                times += t
+                peak = max(peak, pk)
+            results.append(summarize(params, labels, preds, times, peak))
+        return results
+
+    def evaluate(self, params, memory=True):
+        return self.evaluate_many([params], memory)[0]
+
+    def close(self):
+        self._pool.shutdown()
+
+
+def sweep_params(grid):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+# =======================================================
+#  Report
+# =======================================================
+def print_report(result):
+    m = np.asarray(result["confusion"])
+    params = "  ".join(f"{k}={v:g}" for k, v in result["params"].items())
+    print(f"[SHAPES] {result['strokes']} strokes  {params}")
+    print(f"{'label / predicted':<18s}" + "".join(f"{l:>11s}" for l in LABELS) + f"{'recall':>9s}")
+    for i, label in enumerate(LABELS):
+        recall = result["recall"].get(label)
+        print(f"{label:<18s}" + "".join(f"{v:11d}" for v in m[i]) + (f"{recall * 100:8.1f}%" if recall is not None else f"{'-':>9s}"))
+    print(f"[SHAPES] accuracy {result['accuracy'] * 100:.1f}%  latency p50 {result['p50_ms']:.2f} ms  "
+          f"p90 {result['p90_ms']:.2f} ms  p99 {result['p99_ms']:.2f} ms  max {result['max_ms']:.2f} ms  "
+          f"peak {result['peak_kb']:.0f} KB")
+
+
+def print_sweep(results, current, top=10):
+    """Best parameter sets first (accuracy, then p50 latency); the current defaults are marked."""
+    ranked = sorted(results, key=lambda r: (-r["accuracy"], r["p50_ms"]))
+    keys = list(ranked[0]["params"]) if ranked else []
+    print(f"[SHAPES] sweep: {len(results)} parameter sets")
+    print("  ".join(f"{k:>16s}" for k in keys) + f"{'accuracy':>10s}{'p50 ms':>9s}{'p99 ms':>9s}")
+    for r in ranked[:top] + [r for r in ranked[top:] if r["params"] == current]:
+        mark = "  <- current" if r["params"] == current else ""
+        print("  ".join(f"{r['params'][k]:16g}" for k in keys)
+              + f"{r['accuracy'] * 100:9.1f}%{r['p50_ms']:9.2f}{r['p99_ms']:9.2f}{mark}")
@@ -0,0 +1,70 @@
+# stroke_interp.py
+import numpy as np
+
+
+class StrokeInterpolator:
+    """
+    Catmull-Rom spline through tracked pen points.
+    - add_point(): returns the points of the newly committed curve segment
+      (a segment is committed once the point after it is known, i.e. one sample behind)
+    - finish():    commits the last segment when the stroke ends
+    - tail():      uncommitted end of the stroke, extrapolated for frames without inference
+    """
+
+    def __init__(self, samples_per_segment=8):
+        self.samples = samples_per_segment
+        self.pts = []   # Last (up to 4) tracked points of the current stroke
+
+    def reset(self):
+        self.pts = []
+
+    def add_point(self, pt):
+        if self.pts and self.pts[-1] == pt:
+            return []
+        self.pts.append(pt)
+        if len(self.pts) > 4:
+            self.pts.pop(0)
+
+        n = len(self.pts)
+        if n == 1:
+            return [pt]          # Start of stroke: a dot
+        if n == 2:
+            return []            # Need the next point for the tangent at pts[1]
+        p0 = self.pts[-4] if n == 4 else self.pts[-3]
+        return self._segment(p0, self.pts[-3], self.pts[-2], self.pts[-1])
+
+    def finish(self):
+        """End the stroke and return the remaining segment up to the last point."""
+        pts, self.pts = self.pts, []
+        if len(pts) < 2:
+            return []
+        p0 = pts[-3] if len(pts) >= 3 else pts[-2]
+        return self._segment(p0, pts[-2], pts[-1], pts[-1])
+
+    def tail(self, alpha=0.0):
+        """
+        Preview of the uncommitted end of the stroke (not drawn into the canvas).
+        alpha: fraction of an inference interval elapsed since the last point (0..1),
+               used to extrapolate the pen position linearly.
+        """
+        if not self.pts:
+            return []
+        if len(self.pts) == 1:
+            return [self.pts[-1]]
+        (x1, y1), (x2, y2) = self.pts[-2], self.pts[-1]
+        ex = int(round(x2 + (x2 - x1) * alpha))
+        ey = int(round(y2 + (y2 - y1) * alpha))
+        return [self.pts[-2], self.pts[-1], (ex, ey)]
+
+    def _segment(self, p0, p1, p2, p3):
+        """Uniform Catmull-Rom points from p1 to p2 (both included)."""
+        t = np.linspace(0.0, 1.0, self.samples + 1)[:, None]
+        t2, t3 = t * t, t * t * t
+        p0, p1, p2, p3 = (np.asarray(p, dtype=np.float32) for p in (p0, p1, p2, p3))
+        curve = 0.5 * (
+            2 * p1
+            + (p2 - p0) * t
+            + (2 * p0 - 5 * p1 + 4 * p2 - p3) * t2
+            + (3 * p1 - p0 - 3 * p2 + p3) * t3
+        )
+        return [tuple(p) for p in np.rint(curve).astype(np.int32).tolist()]
@@ -5,11 +5,12 @@ def file_select_dialog():
     root = tk.Tk()
     root.withdraw()
     file_path = filedialog.askopenfilename(
-        title="Select PDF/Image for Background",
+        title="Select PDF/Image/Video for Background",
         filetypes=(
-            ("PDF and Image Files", "*.pdf *.png *.jpg *.jpeg"),
+            ("PDF, Image and Video Files", "*.pdf *.png *.jpg *.jpeg *.mp4 *.avi *.mov *.mkv *.webm *.m4v"),
             ("PDF Files", "*.pdf"),
-            ("Image Files", "*.png *.jpg *.jpeg")
+            ("Image Files", "*.png *.jpg *.jpeg"),
+            ("Video Files", "*.mp4 *.avi *.mov *.mkv *.webm *.m4v")
         )
     )
 
@@ -0,0 +1,190 @@
+# video_background.py
+import time
+import threading
+from collections import deque
+
+import cv2
+
+
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v")
+
+
+def video_page_key(frame_index):
+    """Ink page of a paused video frame (page 0 is the ink layer shown while the video plays)."""
+    return frame_index + 1
+
+
+class VideoPlayer:
+    """
+    Video background decoded on a worker thread.
+    - Frames are decoded ahead into a small ring buffer, already scaled to the board size.
+    - update() is called once per rendered frame and never blocks: it returns the frame due
+      at the play clock (dropping late frames), or None if the displayed frame did not change.
+    - play / pause / toggle / seek(frame) / step(n). While a seek is decoding, the previous
+      frame stays on screen.
+    """
+
+    def __init__(self, source, width, height, ring=4):
+        self.source = source
+        self.size = (width, height)
+        self.cap = cv2.VideoCapture(source)
+        if not self.cap.isOpened():
+            raise ValueError("could not open video")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        ok, frame = self._decode()
+        if not ok:
+            raise ValueError("video has no frames")
+        self.frame = frame          # Displayed frame (board size, BGR)
+        self.frame_index = 0
+        self.playing = False
+
+        self._ring = deque()
+        self._ring_size = ring
+        self._cond = threading.Condition()
+        self._gen = 0               # Bumped by seek(): frames of older generations are dropped
+        self._seek_to = None        # Seek request for the worker
+        self._next = 1              # Index of the next frame the worker decodes
+        self._target = 0            # Frame to show while paused
+        self._clock = (0.0, 0)      # (perf_counter, frame index) when playback (re)started
+        self._eof = False
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="VideoBackground", daemon=True)
+        self._thread.start()
+
+    # =======================================================
+    #  Decoder thread
+    # =======================================================
+    def _decode(self):
+        ok, img = self.cap.read()
+        if not ok:
+            return False, None
+        if (img.shape[1], img.shape[0]) != self.size:
+            img = cv2.resize(img, self.size, interpolation=cv2.INTER_AREA)
+        return True, img
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stop or self._seek_to is not None
+                    or (not self._eof and len(self._ring) < self._ring_size)
+                )
+                if self._stop:
+                    break
+                seek, self._seek_to = self._seek_to, None
+                gen = self._gen
+            if seek is not None:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, seek)
+                self._next = seek
+            ok, img = self._decode()
+            with self._cond:
+                if gen != self._gen:
+                    continue
+                if not ok:
+                    self._eof = True
+                else:
+                    self._ring.append((self._next, img))
+                    self._next += 1
+                self._cond.notify_all()
+        self.cap.release()
+
+    # =======================================================
+    #  Render thread
+    # =======================================================
+    @property
+    def position(self):
+        """Timestamp of the displayed frame (s)"""
+        return self.frame_index / self.fps
+
+    @property
+    def duration(self):
+        return self.frame_count / self.fps
+
+    @property
+    def page_key(self):
+        """Ink page of the current state (see video_page_key)."""
+        return 0 if self.playing else video_page_key(self.frame_index)
+
+    def update(self):
+        """New frame to display, or None."""
+        with self._cond:
+            if self.playing:
+                t, start = self._clock
+                target = start + int((time.perf_counter() - t) * self.fps)
+            else:
+                target = self._target
+            new = None
+            while self._ring and self._ring[0][0] <= target:
+                new = self._ring.popleft()
+            if new is not None:
+                self._cond.notify_all()
+            elif self.playing and self._eof and not self._ring:
+                # End of the video: stay paused on the last frame
+                self.playing = False
+                self._target = self.frame_index
+        if new is None:
+            return None
+        self.frame_index, self.frame = new
+        return self.frame
+
+    def play(self):
+        if self.playing:
+            return
+        if self._eof and not self._ring and self.frame_index >= self.frame_count - 1:
+            self.seek(0)    # Replay from the start
+        self.playing = True
+        self._clock = (time.perf_counter(), self._target)
+
+    def pause(self):
+        if self.playing:
+            self.playing = False
+            self._target = self.frame_index
+
+    def toggle(self):
+        self.pause() if self.playing else self.play()
+        return self.playing
+
+    def seek(self, index):
+        """Jump to frame `index` (decoded on the worker; the current frame stays until it arrives)."""
+        last = max(self.frame_count - 1, 0)
+        index = min(max(int(index), 0), last) if self.frame_count else max(int(index), 0)
+        with self._cond:
+            self._gen += 1
+            self._ring.clear()
+            self._eof = False
+            self._seek_to = index
+            self._target = index
+            self._clock = (time.perf_counter(), index)
+            self._cond.notify_all()
+
+    def step(self, n):
+        """Pause and move n frames (forward steps are usually already decoded)."""
+        self.pause()
+        target = self._target + n
+        with self._cond:
+            buffered = n > 0 and self._ring and self._ring[0][0] <= target <= self._ring[-1][0]
+            if buffered:
+                self._target = target
+        if not buffered:
+            self.seek(target)
+
+    def seek_seconds(self, delta):
+        base = self._target if not self.playing else self.frame_index
+        self.seek(base + delta * self.fps)
+
+    @property
+    def status(self):
+        state = "PLAY" if self.playing else "PAUSE"
+        return f"{state} {_fmt(self.position)}/{_fmt(self.duration)}"
+
+    def close(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        self._thread.join(timeout=2)
+
+
+def _fmt(seconds):
+    return f"{int(seconds // 60):02d}:{seconds % 60:04.1f}"
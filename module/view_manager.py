@@ -1,7 +1,7 @@
 # view_manager.py
 import cv2
 import numpy as np
-from .overlay_hud import draw_hud
+from .overlay_hud import draw_hud, draw_pointer
 
 
 class ViewManager:
@@ -11,82 +11,159 @@ class ViewManager:
     - View modes (normal / pip):
         normal: Full screen as before
         pip: User in a small window at the bottom right, main screen is 'blackboard without user'
+    - compose() = scene() + HUD. For separate presenter/audience outputs, scene() is the shared
+      composite and draw_presenter() adds the presenter-only overlays (HUD, pointer).
     """
 
+    PIP_SCALE = 0.25      # PIP diameter relative to the screen height
+    PIP_MARGIN = 20       # Distance from the bottom-right corner
+    CROP_SMOOTHING = 0.3  # EMA factor for the face crop (1.0 = no smoothing)
+
     def __init__(self):
         self.view_mode = "normal"   # "normal" or "pip"
 
+        # PIP geometry cache (rebuilt only when the output size changes)
+        self._pip_size = None       # (h, w) the cache was built for
+        self._pip_rect = None       # (x1, y1, x2, y2) of the PIP ROI
+        self._pip_mask = None       # bool (pip, pip, 1) circle mask
+        self._pip_buf = None        # Resized camera crop (reused every frame)
+
+        # Smoothed face crop (x, y, side) in camera coordinates
+        self._crop = None
+
     def toggle_mode(self):
         # Toggle view mode
         self.view_mode = "pip" if self.view_mode == "normal" else "normal"
+        self._crop = None
         print(f"[VIEW] mode = {self.view_mode}")
 
+    # =======================================================
+    #  PIP helpers
+    # =======================================================
+    def _ensure_pip_geometry(self, h, w):
+        """Precompute the circular mask and ROI once per output size."""
+        if self._pip_size == (h, w):
+            return
+
+        pip = max(int(h * self.PIP_SCALE), 2)
+        margin = self.PIP_MARGIN
+        x2, y2 = w - margin, h - margin
+        self._pip_rect = (x2 - pip, y2 - pip, x2, y2)
+
+        mask = np.zeros((pip, pip), dtype=np.uint8)
+        cv2.circle(mask, (pip // 2, pip // 2), pip // 2, 255, -1)
+        self._pip_mask = (mask > 0)[:, :, None]
+        self._pip_buf = np.empty((pip, pip, 3), dtype=np.uint8)
+        self._pip_size = (h, w)
+
+    def _face_crop(self, cam_h, cam_w, person_rect):
+        """
+        Square crop around the presenter's head, taken from the user mask bounding box.
+        Falls back to a centered crop when no person is detected.
+        """
+        if person_rect is not None:
+            px, py, pw, ph = person_rect
+            side = min(max(pw, ph // 2, 1), cam_h, cam_w)
+            cx = px + pw // 2
+            top = py - side // 10          # Small headroom above the head
+        else:
+            side = min(cam_h, cam_w)
+            cx = cam_w // 2
+            top = (cam_h - side) // 2
+
+        target = (cx - side // 2, top, side)
+        if self._crop is None:
+            self._crop = target
+        else:
+            a = self.CROP_SMOOTHING
+            self._crop = tuple(
+                int(round(prev + a * (cur - prev))) for prev, cur in zip(self._crop, target)
+            )
+
+        x, y, side = self._crop
+        side = min(max(side, 1), cam_h, cam_w)
+        x = min(max(x, 0), cam_w - side)
+        y = min(max(y, 0), cam_h - side)
+        return x, y, side
+
+    def _draw_pip(self, base, cam, person_rect, prep=None):
+        """Blend the circular camera crop into base in place."""
+        h, w = base.shape[:2]
+        self._ensure_pip_geometry(h, w)
+        x1, y1, x2, y2 = self._pip_rect
+
+        cam_h, cam_w = cam.shape[:2]
+        cx, cy, side = self._face_crop(cam_h, cam_w, person_rect)
+        pip = self._pip_buf.shape[0]
+
+        # Crop from the smallest downscaled frame this frame already has that keeps >= pip px
+        if prep is not None and side > pip:
+            need = (-(-cam_w * pip // side), -(-cam_h * pip // side))
+            small = prep.nearest("bgr", need)
+            if small is not None and small.shape[1] < cam_w:
+                s = small.shape[1] / cam_w
+                cam = small
+                cx, cy, side = int(cx * s), int(cy * s), max(int(side * s), 1)
+        crop = cam[cy:cy + side, cx:cx + side]
+
+        interp = cv2.INTER_AREA if side > pip else cv2.INTER_LINEAR
+        cv2.resize(crop, (pip, pip), dst=self._pip_buf, interpolation=interp)
+
+        # Only pixels inside the circle are written to the ROI
+        np.copyto(base[y1:y2, x1:x2], self._pip_buf, where=self._pip_mask)
+
     def compose(self, base_frame, blackboard, kb_manager):
         """
         - base_frame: Result of VirtualBlackboard.update(frame) (the previous final screen)
-        - blackboard: Uses last_combined_bg / last_frame
+        - blackboard: Uses last_combined_bg / last_frame / last_prep / last_user_rect
         - Returns: The final display frame
         """
+        scene = self.scene(base_frame, blackboard)
+        return draw_hud(scene, blackboard, kb_manager, extra_msg=self._extra_msg(blackboard))
 
-        # If there is a BG error message, get it and pass it to the HUD (None otherwise)
-        extra_msg = getattr(blackboard.bg_manager, "last_error", None)
+    @staticmethod
+    def _extra_msg(blackboard):
+        # If there is a BG error/loading message, get it and pass it to the HUD (None otherwise)
+        return getattr(blackboard.bg_manager, "last_error", None) or getattr(
+            blackboard.bg_manager, "status", None
+        )
 
-        # Default is HUD on top of the original final frame
+    def draw_presenter(self, img, blackboard, kb_manager, hands=(), roi=None, scale=(1.0, 1.0)):
+        """
+        Presenter-only overlays (HUD, finger pointers) on a scene image.
+        hands: (gesture_mode, point) per tracked hand, roi: RoiOverlay of a shared image,
+        scale: (sx, sy) of img relative to the scene (pointer positions)
+        """
+        draw_hud(img, blackboard, kb_manager, extra_msg=self._extra_msg(blackboard), roi=roi)
+        if not kb_manager.drawing_enabled:
+            return
+        for gesture_mode, point in hands:
+            if point != (-1, -1):
+                point = (int(point[0] * scale[0]), int(point[1] * scale[1]))
+                draw_pointer(img, gesture_mode, point, roi)
+
+    def scene(self, base_frame, blackboard):
+        """Shared composite without HUD: view mode (PIP) + page overview grid"""
+        # Default is the original final frame
         frame_for_hud = base_frame
 
         # In pip mode: blackboard without person + PIP camera
         if self.view_mode == "pip":
-            # Prioritize blackboard without person (if not available, use the existing final frame)
+            # Prioritize blackboard without person (if not available, use the existing final frame).
+            # Both are freshly rendered every frame, so the PIP is drawn into them directly.
             if blackboard.last_combined_bg is not None:
-                base = blackboard.last_combined_bg.copy()
-            else:
-                base = base_frame.copy()
-
-            h, w = base.shape[:2]
+                frame_for_hud = blackboard.last_combined_bg
 
             if blackboard.last_frame is not None:
-                cam = blackboard.last_frame.copy()
-
-                # 1) Set PIP size (about 1/4 of the screen height)
-                pip_h = int(h * 0.25)
-                pip_w = int(cam.shape[1] * (pip_h / cam.shape[0]))
-                pip = cv2.resize(cam, (pip_w, pip_h))
-
-                # 2) Create a circular mask (centered circle)
-                mask = np.zeros((pip_h, pip_w), dtype=np.uint8)
-                radius = min(pip_w, pip_h) // 2
-                center = (pip_w // 2, pip_h // 2)
-                cv2.circle(mask, center, radius, 255, -1)
-
-                # 3) Circularly cropped face PIP
-                pip_fg = cv2.bitwise_and(pip, pip, mask=mask)
-
-                # 4) Placement position: bottom right
-                margin = 20
-                y2 = h - margin
-                y1 = y2 - pip_h
-                x2 = w - margin
-                x1 = x2 - pip_w
-
-                # (If you want to place it in the center of the screen)
-                # cx, cy = w // 2, h // 2
-                # x1 = cx - pip_w // 2
-                # x2 = cx + pip_w // 2
-                # y1 = cy - pip_h // 2
-                # y2 = cy + pip_h // 2
-
-                # 5) Clear the circle area from the background ROI
-                roi = base[y1:y2, x1:x2]
-                mask_inv = cv2.bitwise_not(mask)  # Mask that leaves only the area outside the circle
-                bg = cv2.bitwise_and(roi, roi, mask=mask_inv)
-
-                # 6) Composite background + face
-                dst = cv2.add(bg, pip_fg)
-                base[y1:y2, x1:x2] = dst
-
-            frame_for_hud = base
-        else:
-            frame_for_hud = base_frame
-
-        final = draw_hud(frame_for_hud, blackboard, kb_manager, extra_msg=extra_msg)
-        return final
+                self._draw_pip(
+                    frame_for_hud,
+                    blackboard.last_frame,
+                    getattr(blackboard, "last_user_rect", None),
+                    getattr(blackboard, "last_prep", None),
+                )
+
+        # Page overview grid (cached thumbnails, drawn under the HUD)
+        overview = getattr(blackboard, "overview", None)
+        if overview is not None and overview.visible:
+            overview.draw(frame_for_hud)
+        return frame_for_hud
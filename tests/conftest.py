@@ -0,0 +1,58 @@
+# conftest.py
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import VirtualBlackboard  # noqa: E402
+from module.session_store import SessionStore  # noqa: E402
+
+
+class FakeHandTracker:
+    """No hand in view"""
+
+    def get_gesture(self, frame, rgb=None):
+        return "none", (-1, -1), frame
+
+    def close(self):
+        pass
+
+
+class FakeMaskManager:
+    """Empty user mask"""
+
+    def create_layer1_background(self, frame_shape, color=(0, 0, 0)):
+        return np.zeros(frame_shape, np.uint8)
+
+    def create_layer3_mask(self, frame, threshold=0.62, rgb=None):
+        return np.zeros(frame.shape[:2], np.uint8)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def make_board(tmp_path):
+    """Factory for headless blackboards sharing one session directory (close() them to resume)"""
+    boards = []
+
+    def make(width=320, height=180):
+        board = VirtualBlackboard(
+            width, height,
+            hand_tracker=FakeHandTracker(),
+            user_mask_manager=FakeMaskManager(),
+            session_store=SessionStore(root=str(tmp_path / "sessions")),
+            motion_gate=False,
+        )
+        boards.append(board)
+        return board
+
+    yield make
+    for board in boards:
+        try:
+            board.close()
+        except Exception:
+            pass
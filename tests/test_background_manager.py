@@ -0,0 +1,30 @@
+# test_background_manager.py
+import time
+
+import cv2
+import numpy as np
+
+from module.BackgroundManager import BackgroundManager
+
+
+def _wait_loaded(bg, timeout=5):
+    deadline = time.time() + timeout
+    while bg.is_loading and time.time() < deadline:
+        bg.poll()
+        time.sleep(0.01)
+    bg.poll()
+
+
+def test_cache_hit_is_not_loading(tmp_path):
+    path = str(tmp_path / "slide.png")
+    cv2.imwrite(path, np.full((90, 160, 3), 128, np.uint8))
+    bg = BackgroundManager(320, 180)
+
+    bg.add_background(path)
+    _wait_loaded(bg)
+    assert not bg.is_loading
+
+    bg.add_background(None)
+    bg.add_background(path)          # Restored from the deck cache
+    assert not bg.is_loading
+    assert bg.status == ""
@@ -0,0 +1,130 @@
+# test_board_sync.py
+import socket
+import time
+
+import numpy as np
+
+from module.board_sync import BoardState, BoardSyncServer, read_batches
+
+
+def _server(width=320, height=180):
+    return BoardSyncServer(width, height, host="127.0.0.1", port=0)
+
+
+def _connect(server):
+    """Viewer socket, accepted by the server (it gets its snapshot on the next flush)"""
+    sock = socket.create_connection(server._sock.getsockname()[:2], timeout=5)
+    deadline = time.time() + 5
+    while not server.joining and time.time() < deadline:
+        time.sleep(0.01)
+    assert server.joining
+    return sock
+
+
+def _received(sock, server):
+    """Board rebuilt from everything the viewer received until the server closed"""
+    server.close()
+    state = BoardState()
+    for batch in read_batches(sock):
+        state.apply(batch)
+    sock.close()
+    return state
+
+
+def test_solid_board_sends_the_identity_view(make_board):
+    board = make_board()
+    board.sync = server = _server()
+    frame = np.zeros((180, 320, 3), np.uint8)
+    try:
+        sock = _connect(server)
+        board.update(frame, False, False)
+        # Wheel / drag change the zoom state, but the solid board never transforms its ink
+        board.bg_manager.zoom = 2.0
+        board.bg_manager.offset_x, board.bg_manager.offset_y = 40, -20
+        board.update(frame, False, False)
+        state = _received(sock, server)
+        assert (state.zoom, state.offset_x, state.offset_y) == (1.0, 0, 0)
+    finally:
+        board.sync = None
+        server.close()
+
+
+def test_join_snapshot_reads_unvisited_pages_from_the_session(make_board):
+    board = make_board()
+    page = np.zeros_like(board.canvas)
+    page[50:60, 50:60] = (0, 255, 0)
+    board.page_canvases[3] = page
+    board.session.mark_dirty(3)
+    board.close()
+
+    resumed = make_board()
+    resumed.sync = server = _server()
+    try:
+        sock = _connect(server)
+        resumed.update(np.zeros((180, 320, 3), np.uint8), False, False)
+        state = _received(sock, server)
+        assert state.pages[3][55, 55].tolist() == [0, 255, 0]
+        assert 3 not in resumed.page_canvases       # Not decoded on the render thread
+    finally:
+        resumed.sync = None
+        server.close()
+
+
+def test_deltas_rebuild_the_presenter_pages(make_board):
+    board = make_board()
+    board.sync = server = _server()
+    try:
+        sock = _connect(server)
+        board.update(np.zeros((180, 320, 3), np.uint8), False, False)   # Snapshot of the blank board
+
+        for pt in [(20, 20), (100, 40), (160, 30)]:                     # 'L'
+            board.update_canvas("draw", pt)
+        board.update_canvas("move", (-1, -1))
+        board.smooth_ink = True
+        for pt in [(30, 120), (80, 140), (130, 120), (180, 150), (230, 130)]:   # 'P'
+            board.update_canvas("draw", pt)
+        board.update_canvas("move", (-1, -1))
+        board.canvas[150:170, 250:300] = (0, 0, 255)                   # 'R'
+        board._ink_changed()
+        server.patch(board.canvas, 250, 150, 50, 20)
+        server.view(1.5, 10, -5)                                        # 'V'
+        server.flush(board.current_page_index, board.session.snapshot)
+
+        board.background_path = "lecture.mp4"                           # 'G' to a paused frame
+        board.bg_manager.mode = "video"
+        board.bg_manager.page_index = 2
+        board._sync_canvas_with_page()
+        board.update_canvas("draw", (50, 50))
+        board.update_canvas("draw", (90, 90))
+        board.clear_canvas()                                            # 'C'
+        server.flush(board.current_page_index, board.session.snapshot)
+
+        state = _received(sock, server)
+        assert board.page_canvases[0].any()
+        assert np.array_equal(state.pages[0], board.page_canvases[0])
+        assert state.current_page == 2 and not state.pages[2].any()
+        assert (state.zoom, state.offset_x, state.offset_y) == (1.5, 10, -5)
+    finally:
+        board.sync = None
+        server.close()
+
+
+def test_unknown_message_skips_the_rest_of_its_batch(make_board):
+    board = make_board()
+    server = _server()
+    try:
+        state = BoardState()
+        state.apply(server.encode_snapshot(320, 180, 0, board.session.snapshot()))
+        server.line((10, 10), (100, 10), (255, 255, 255), 4)
+        first = bytes(server._buf) + b"Z\x01\x02\x03"
+        server._buf.clear()
+        server.line((10, 50), (100, 50), (0, 255, 0), 4)
+        second = bytes(server._buf)
+
+        state.apply(first)
+        state.apply(second)
+        assert state.skipped == 1
+        assert state.canvas[10, 50].tolist() == [255, 255, 255]
+        assert state.canvas[50, 50].tolist() == [0, 255, 0]
+    finally:
+        server.close()
@@ -0,0 +1,79 @@
+# test_exporter.py
+import os
+import threading
+
+import cv2
+import fitz
+import numpy as np
+
+from module.exporter import ExportWorker
+from module.highlight_ink import HighlightLayer
+from module.session_store import SessionStore
+
+
+def _pdf(path, pages=2, size=(160, 90)):
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page(width=size[0], height=size[1])
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_export_snapshots_pages_at_submit(tmp_path):
+    canvas = np.zeros((90, 160, 3), np.uint8)
+    cv2.circle(canvas, (40, 40), 10, (255, 255, 255), -1)
+    layer = HighlightLayer(160, 90)
+    layer.line((100, 20), (150, 20), (0, 255, 255), 0.4, 12)
+
+    store = SessionStore(root=str(tmp_path / "sessions"))
+    store.open(None, {0: canvas}, 160, 90, {0: layer})
+    store.mark_dirty(0)
+
+    worker = ExportWorker()
+    hold = threading.Event()
+    worker._submit(hold.wait)               # Keep the worker busy while the pages are changed
+    worker.export_deck(None, store.snapshot(), str(tmp_path / "out"), fmt="png")
+    canvas.fill(0)
+    layer.clear()
+    hold.set()
+    worker.close()
+    store.close()
+
+    page = cv2.imread(os.path.join(str(tmp_path / "out"), "page_001.png"))
+    assert page[40, 40].tolist() == [255, 255, 255]
+    assert page[20, 120].any()
+
+
+def test_export_reads_pages_not_in_memory_from_the_session(tmp_path):
+    pdf = _pdf(str(tmp_path / "deck.pdf"))
+    canvases, highlights = {}, {}
+    store = SessionStore(root=str(tmp_path / "sessions"))
+    store.open(pdf, canvases, 160, 90, highlights)
+
+    # Page 0 was autosaved and is no longer held in memory
+    saved = np.zeros((90, 160, 3), np.uint8)
+    cv2.circle(saved, (40, 40), 10, (0, 0, 255), -1)
+    canvases[0] = saved
+    store.mark_dirty(0)
+    store.flush()
+    del canvases[0]
+
+    # Page 1 changed after the last autosave: only this one is copied at submit
+    canvases[1] = np.zeros((90, 160, 3), np.uint8)
+    cv2.circle(canvases[1], (120, 50), 10, (0, 255, 0), -1)
+    store.mark_dirty(1)
+
+    pages = store.snapshot()
+    assert pages.indices() == [0, 1]
+    assert set(pages._changed) == {1}
+
+    worker = ExportWorker(dpi=72)
+    worker.export_deck(pdf, pages, str(tmp_path / "out"), fmt="png")
+    worker.close()
+    store.close()
+
+    first = cv2.imread(os.path.join(str(tmp_path / "out"), "page_001.png"))
+    second = cv2.imread(os.path.join(str(tmp_path / "out"), "page_002.png"))
+    assert first[40, 40].tolist() == [0, 0, 255]
+    assert second[50, 120].tolist() == [0, 255, 0]
@@ -0,0 +1,16 @@
+# test_frame_source.py
+import pytest
+
+from module.frame_source import FrameSource, open_source
+
+
+def test_frame_source_is_abstract():
+    with pytest.raises(TypeError):
+        FrameSource(64, 48)
+
+
+def test_synthetic_source_reads_output_size():
+    src = open_source("synthetic", 64, 48)
+    ok, frame, _ = src.read()
+    assert ok and frame.shape == (48, 64, 3)
+    src.release()
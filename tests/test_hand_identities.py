@@ -0,0 +1,73 @@
+# test_hand_identities.py
+import numpy as np
+
+from module.handTracker import HandIdentities, HandTracker, INDEX_FINGER_TIP, THUMB_TIP
+
+
+def _hand(x, y, pinch=0.0):
+    """(21, 3) normalized landmarks of a hand at (x, y); thumb tip `pinch` to the right of the index tip"""
+    lm = np.zeros((21, 3), np.float32)
+    lm[:, 0], lm[:, 1] = x, y
+    lm[THUMB_TIP, 0] = x + pinch
+    lm[INDEX_FINGER_TIP] = (x, y, 0)
+    return lm
+
+
+def test_slots_follow_the_hands_when_the_detector_swaps_them():
+    ids = HandIdentities(max_hands=2)
+    assert ids.assign([_hand(0.2, 0.5), _hand(0.8, 0.5)]) == [0, 1]
+    assert ids.assign([_hand(0.78, 0.52), _hand(0.22, 0.48)]) == [1, 0]
+    assert ids.assign([_hand(0.25, 0.5), _hand(0.75, 0.5)]) == [0, 1]
+
+
+def test_handedness_keeps_slots_when_the_hands_cross():
+    ids = HandIdentities(max_hands=2)
+    ids.assign([_hand(0.45, 0.5), _hand(0.55, 0.5)], ["Left", "Right"])
+    # Positions alone would swap the slots; the labels outweigh the small distance difference
+    assert ids.assign([_hand(0.54, 0.5), _hand(0.46, 0.5)], ["Left", "Right"]) == [0, 1]
+
+
+def test_a_hand_dropping_out_keeps_its_slot():
+    ids = HandIdentities(max_hands=2, keep_frames=3)
+    ids.assign([_hand(0.2, 0.5), _hand(0.8, 0.5)])
+    assert ids.assign([_hand(0.8, 0.5)]) == [1]             # Left hand gone: right keeps slot 1
+    assert ids.assign([_hand(0.8, 0.5)]) == [1]
+    assert ids.assign([_hand(0.82, 0.5), _hand(0.2, 0.5)]) == [1, 0]
+
+    for _ in range(4):                                      # Gone longer than keep_frames
+        ids.assign([_hand(0.8, 0.5)])
+    assert ids.assign([_hand(0.5, 0.5), _hand(0.8, 0.5)]) == [0, 1]   # Freed slot 0 is reused
+
+
+class _ScriptedBackend:
+    name = "scripted"
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    def process(self, rgb):
+        return self.frames.pop(0)
+
+    def close(self):
+        pass
+
+
+def test_dropout_does_not_take_over_the_other_hands_smoothing():
+    frame = np.zeros((100, 200, 3), np.uint8)
+    left = [_hand(0.25, 0.5), _hand(0.28125, 0.5), _hand(0.3125, 0.5)]     # x = 50, 56, 62 px
+    backend = _ScriptedBackend([
+        [left[0], _hand(0.75, 0.5)],
+        [left[1]],                                  # Right hand drops out
+        [_hand(0.6875, 0.625), left[2]],            # Both again, in swapped order
+    ])
+    tracker = HandTracker(backend=backend, max_hands=2)
+
+    tracker.get_gestures(frame)
+    results, _ = tracker.get_gestures(frame)
+    assert results[1] == ("none", (-1, -1))
+    assert results[0][1] == (53, 50)                # Mean of x=50 and 56: slot 0 keeps smoothing
+
+    results, _ = tracker.get_gestures(frame)
+    assert results[0][1] == (56, 50)                # Mean of x=50, 56, 62
+    assert results[1][1] == (137, 62)               # Slot 1 starts over: no left-hand points mixed in
+    assert [s for s, _ in tracker.last_hands] == [0, 1]
@@ -0,0 +1,80 @@
+# test_highlight_sync.py
+import time
+
+import numpy as np
+
+from module.board_sync import BoardState, BoardSyncServer
+from module.highlight_ink import HighlightLayer
+from module.page_overview import PageOverview
+from module.session_store import SessionStore
+
+YELLOW = (0, 255, 255)
+
+
+def _server(width=320, height=180):
+    return BoardSyncServer(width, height, host="127.0.0.1", port=0)
+
+
+def test_highlight_strokes_reach_the_viewer(make_board):
+    board = make_board()
+    board.sync = server = _server()
+    try:
+        state = BoardState()
+        state.apply(server.encode_snapshot(320, 180, 0, board.session.snapshot()))   # Blank board
+
+        board.draw_alpha = 0.4
+        for pt in [(40, 60), (120, 60), (200, 70)]:
+            board.update_canvas("draw", pt)
+        board.update_canvas("move", (-1, -1))
+        board.draw_alpha = 1.0
+        board.erase_thickness = 20
+        board.update_canvas("erase", (120, 40))
+        board.update_canvas("erase", (120, 90))
+
+        state.apply(bytes(server._buf))
+        local = board.page_highlights[0]
+        assert np.array_equal(state.highlights[0].index > 0, local.index > 0)
+        assert local.index[60, 80] and not local.index[60, 120]   # Drawn, then erased
+    finally:
+        board.sync = None
+        server.close()
+
+
+def test_snapshot_carries_highlights(tmp_path):
+    server = _server()
+    store = SessionStore(root=str(tmp_path / "sessions"))
+    try:
+        layer = HighlightLayer(320, 180)
+        layer.line((20, 20), (300, 20), YELLOW, 0.4, 10)
+        canvas = np.zeros((180, 320, 3), np.uint8)
+        canvas[100:110, 100:110] = 255
+        store.open(None, {0: canvas}, 320, 180, {0: layer})
+        store.mark_dirty(0)
+
+        state = BoardState()
+        state.apply(server.encode_snapshot(320, 180, 0, store.snapshot()))
+        assert np.array_equal(state.highlights[0].to_bgra(), layer.to_bgra())
+        shown = state.composite()
+        assert shown[20, 150].any() and not np.array_equal(shown[20, 150], YELLOW)   # Translucent
+        assert shown[105, 105].tolist() == [255, 255, 255]
+    finally:
+        server.close()
+        store.close()
+
+
+def test_thumbnails_include_highlights():
+    overview = PageOverview(320, 180, thumb_w=160)
+    try:
+        layer = HighlightLayer(320, 180)
+        layer.line((0, 90), (320, 90), YELLOW, 0.5, 40)
+        canvas = np.zeros((180, 320, 3), np.uint8)
+        overview.set_deck(None, "solid", 1, lambda page: None, (40, 40, 40))
+        overview.toggle({0: canvas}, 0, {0: layer})
+        deadline = time.time() + 5
+        while 0 not in overview._thumbs and time.time() < deadline:
+            time.sleep(0.01)
+        thumb = overview._thumbs[0]
+        assert thumb[5, 80].tolist() == [40, 40, 40]
+        assert thumb[45, 80].tolist() != [40, 40, 40]
+    finally:
+        overview.close()
@@ -0,0 +1,83 @@
+# test_landmark_trace.py
+import numpy as np
+
+from module.landmark_trace import (
+    MODES, ReplayHandTracker, ReplayUserMaskManager, TraceReader, TraceWriter,
+)
+
+FRAME = np.zeros((53, 37, 3), np.uint8)
+
+
+def _mask(i, h=53, w=37):
+    """Odd-sized mask (the packed bits do not end on a byte boundary), different per frame"""
+    rng = np.random.default_rng(i)
+    return np.where(rng.random((h, w)) > 0.5, 255, 0).astype(np.uint8)
+
+
+def _landmarks(i):
+    return np.random.default_rng(100 + i).random((21, 3)).astype(np.float32)
+
+
+def _record(path, frames, gesture_every=1):
+    writer = TraceWriter(str(path))
+    for i in range(frames):
+        if i % gesture_every == 0:
+            writer.write_gesture(MODES[i % len(MODES)], (i, -i), _landmarks(i) if i % 3 else None)
+        writer.write_mask(_mask(i))
+        writer.next_frame()
+    writer.close()
+    return str(path)
+
+
+def test_round_trip(tmp_path):
+    reader = TraceReader(_record(tmp_path / "t.vbt", 6))
+
+    assert [g[0] for g in reader.gestures] == list(range(6))
+    for i, (frame, mode, point, lm) in enumerate(reader.gestures):
+        assert (mode, point) == (MODES[i % len(MODES)], (i, -i))
+        if i % 3:
+            assert np.array_equal(lm, _landmarks(i))
+        else:
+            assert lm is None
+    for i, (frame, h, w, packed) in enumerate(reader.masks):
+        assert frame == i
+        assert np.array_equal(TraceReader.unpack_mask(h, w, packed), _mask(i))
+
+
+def test_replay_returns_records_in_order(tmp_path):
+    reader = TraceReader(_record(tmp_path / "t.vbt", 5))
+    hands = ReplayHandTracker(reader, loop=False)
+    masks = ReplayUserMaskManager(reader, loop=False)
+
+    for i in range(5):
+        mode, point, _ = hands.get_gesture(FRAME)
+        assert (mode, point) == (MODES[i % len(MODES)], (i, -i))
+        assert np.array_equal(masks.create_layer3_mask(FRAME), _mask(i))
+        reader.next_frame()
+
+    assert hands.get_gesture(FRAME)[:2] == ("none", (-1, -1))
+    assert not masks.create_layer3_mask(FRAME).any()
+
+
+def test_replay_follows_frame_numbers_not_calls(tmp_path):
+    # Recorded with smooth ink: hand tracking on every second frame, masks on every frame
+    reader = TraceReader(_record(tmp_path / "t.vbt", 10, gesture_every=2))
+    hands = ReplayHandTracker(reader, loop=False)
+    masks = ReplayUserMaskManager(reader, loop=False)
+
+    for i in range(10):
+        if 3 <= i <= 5:
+            reader.next_frame()                 # Tracking toggled off: no calls for a while
+            continue
+        _, point, _ = hands.get_gesture(FRAME)  # Called on every frame otherwise
+        assert point == (i - i % 2, -(i - i % 2))
+        assert np.array_equal(masks.create_layer3_mask(FRAME), _mask(i))
+        reader.next_frame()
+
+
+def test_concat_continues_frame_numbers(tmp_path):
+    paths = [_record(tmp_path / "a.vbt", 3), _record(tmp_path / "b.vbt", 4)]
+    reader = TraceReader.concat(paths)
+    assert [g[0] for g in reader.gestures] == list(range(7))
+    assert [m[0] for m in reader.masks] == list(range(7))
+    assert reader.length == 7
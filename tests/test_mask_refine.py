@@ -0,0 +1,57 @@
+# test_mask_refine.py
+import cv2
+import numpy as np
+
+from module.mask_refine import MaskRefiner
+
+
+def _inputs():
+    """Low-res mask of a person-like blob and a full-res frame whose edge is a few px off the upscale"""
+    small = np.zeros((45, 80), np.uint8)
+    cv2.ellipse(small, (40, 30), (14, 22), 0, 0, 360, 255, -1)
+    frame = np.full((180, 320, 3), 40, np.uint8)
+    cv2.ellipse(frame, (162, 122), (52, 84), 0, 0, 360, (220, 200, 180), -1)
+    return small, frame
+
+
+def _band(refiner, small, size):
+    up = cv2.resize(small, size, interpolation=cv2.INTER_LINEAR)
+    _, binary = cv2.threshold(up, 127, 255, cv2.THRESH_BINARY)
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * refiner.band + 1, 2 * refiner.band + 1))
+    band = cv2.dilate(cv2.inRange(up, 1, 254), kernel) > 0
+    return binary, band
+
+
+def test_only_the_boundary_band_changes():
+    small, frame = _inputs()
+    refiner = MaskRefiner()
+    out = refiner.refine(small, frame)
+
+    assert out.shape == frame.shape[:2] and out.dtype == np.uint8
+    assert set(np.unique(out)) <= {0, 255}
+
+    binary, band = _band(refiner, small, (320, 180))
+    changed = out != binary
+    assert changed.any()                        # The band follows the frame's edge
+    assert not (changed & ~band).any()
+    assert (out[~band] == binary[~band]).all()
+    assert out[90, 160] == 255 and out[5, 5] == 0
+
+
+def test_soft_matte_is_binary_outside_the_band():
+    small, frame = _inputs()
+    refiner = MaskRefiner(soft=True)
+    out = refiner.refine(small, frame)
+
+    assert out.shape == frame.shape[:2] and out.dtype == np.uint8
+    _, band = _band(refiner, small, (320, 180))
+    assert set(np.unique(out[~band])) <= {0, 255}
+    assert ((out[band] > 0) & (out[band] < 255)).any()
+
+
+def test_mask_without_boundary_is_only_upscaled():
+    frame = np.zeros((180, 320, 3), np.uint8)
+    for value in (0, 255):
+        out = MaskRefiner().refine(np.full((45, 80), value, np.uint8), frame)
+        assert out.shape == (180, 320) and out.dtype == np.uint8
+        assert (out == value).all()
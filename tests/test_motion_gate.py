@@ -0,0 +1,63 @@
+# test_motion_gate.py
+import numpy as np
+
+from module.motion_gate import MotionGate
+
+# Tiny grid of a 1280x720 frame at pyramid level 4
+STATIC = np.full((45, 80), 100, np.uint8)
+
+
+def _moved(x, y):
+    """STATIC with a bright 6x6 square at tiny grid position (x, y)"""
+    frame = STATIC.copy()
+    frame[y:y + 6, x:x + 6] = 250
+    return frame
+
+
+def _idle_gate(hold=3, idle_interval=100):
+    """Gate that has seen a first frame, with the presenter in the left half of the frame"""
+    gate = MotionGate(hold=hold, idle_interval=idle_interval)
+    assert gate.check(STATIC)                   # First frame: nothing to compare with
+    mask = np.zeros((720, 1280), np.uint8)
+    mask[:, :640] = 255
+    gate.set_presenter_mask(mask)
+    return gate
+
+
+def test_static_frames_keep_the_gate_closed():
+    gate = _idle_gate(idle_interval=8)
+    assert [gate.check(STATIC) for _ in range(8)] == [False] * 7 + [True]   # Idle-rate detection only
+    assert gate.idle
+
+
+def test_motion_inside_the_presenter_opens_the_gate():
+    gate = _idle_gate(hold=3)
+    assert not gate.check(STATIC)
+    assert gate.check(_moved(10, 20))
+    assert not gate.idle
+    # Stays open for `hold` frames after the last motion (the square disappearing is motion too)
+    assert [gate.check(STATIC) for _ in range(4)] == [True, True, True, False]
+
+
+def test_motion_outside_the_presenter_is_ignored():
+    gate = _idle_gate()
+    assert not gate.check(_moved(65, 20))
+    assert not gate.check(STATIC)
+    assert gate.idle
+
+
+def test_motion_near_the_last_hand_opens_the_gate():
+    gate = _idle_gate(hold=3)
+    gate.observe(True, (1100, 300))             # Hand seen at tiny (68, 18), outside the presenter mask
+    assert [gate.check(STATIC) for _ in range(3)] == [True, True, False]
+
+    assert not gate.check(_moved(60, 38))       # Outside the mask and away from the hand
+    assert not gate.check(STATIC)
+    assert gate.check(_moved(66, 16))           # Next to the hand
+
+
+def test_without_a_presenter_mask_the_whole_frame_counts():
+    gate = MotionGate(hold=3, idle_interval=100)
+    gate.check(STATIC)
+    gate.set_presenter_mask(None)
+    assert gate.check(_moved(65, 20))
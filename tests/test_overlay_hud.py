@@ -0,0 +1,35 @@
+# test_overlay_hud.py
+import numpy as np
+import pytest
+
+from module.keyboard_input import KeyboardInputManager
+from module.overlay_hud import draw_hud
+
+
+class _Pacer:
+    status = "30.0 fps  capture 1.0 ms"
+
+
+def _pacer_pixels(board, kb, height):
+    frame = np.zeros((height, 1280, 3), np.uint8)
+    board.pacer = None
+    without = draw_hud(frame.copy(), board, kb)
+    board.pacer = _Pacer()
+    return np.any(without != draw_hud(frame.copy(), board, kb), axis=2)
+
+
+@pytest.mark.parametrize("height", [720, 1080])
+def test_pacer_line_does_not_overlap_the_help_panel(make_board, height):
+    board = make_board(1280, height)
+    kb = KeyboardInputManager()
+    try:
+        kb.help_on = True
+        changed = _pacer_pixels(board, kb, height)
+        help_y0 = 20 + 110 + 10
+        help_bottom = help_y0 + 22 * (len(kb.help_lines()) + 1)
+        assert changed.any()
+        # Nothing drawn inside the help box (x 20..550)
+        assert not changed[help_y0:help_bottom + 1, 20:551].any()
+    finally:
+        board.pacer = None
+        kb.close()
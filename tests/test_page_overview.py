@@ -0,0 +1,76 @@
+# test_page_overview.py
+import time
+
+import numpy as np
+
+from module.page_overview import PageOverview
+
+
+def _wait(cond, timeout=5):
+    deadline = time.time() + timeout
+    while not cond() and time.time() < deadline:
+        time.sleep(0.01)
+    return cond()
+
+
+def test_thumbnails_are_built_when_shown():
+    overview = PageOverview(320, 180, thumb_w=40)
+    loaded = []
+
+    def ink_loader(page):
+        loaded.append(page)
+        return None
+
+    try:
+        overview.set_deck(None, "solid", 1, ink_loader, (40, 40, 40))
+        time.sleep(0.1)
+        assert not overview._thumbs and not loaded     # Nothing built on deck open
+
+        overview.toggle({0: np.zeros((180, 320, 3), np.uint8)}, 0)
+        assert _wait(lambda: 0 in overview._thumbs)
+    finally:
+        overview.close()
+
+
+def test_only_visible_pages_are_requested():
+    overview = PageOverview(320, 180, thumb_w=40)
+    loaded = []
+    try:
+        overview.set_deck(None, "solid", 500, lambda page: loaded.append(page), (0, 0, 0))
+        overview.toggle({}, 0)
+        visible = len(overview._visible_pages())
+        assert _wait(lambda: len(loaded) == visible)
+        assert sorted(loaded) == list(range(visible)) and visible < 500
+
+        overview.move(visible)                  # Scroll down one screen
+        overview.refresh({})
+        assert _wait(lambda: len(loaded) > visible)
+        assert max(loaded) >= visible
+    finally:
+        overview.close()
+
+
+def test_stroke_does_not_continue_across_the_overview(make_board):
+    board = make_board()
+    board.update_canvas("draw", (20, 20))
+    board.toggle_overview()                     # Opened mid-stroke: update_canvas() stops running
+    board.toggle_overview()
+    board.update_canvas("draw", (200, 150))
+    assert not board.canvas[85, 110].any()      # No line joining the two points
+    assert board.canvas[150, 200].any()
+
+
+def test_stroke_does_not_continue_onto_another_page(make_board):
+    board = make_board()
+    board.background_path = "lecture.mp4"
+    board.bg_manager.mode = "video"
+    board.smooth_ink = True
+    for pt in [(20, 20), (60, 30), (100, 40)]:
+        board.update_canvas("draw", pt)
+
+    board.bg_manager.page_index = 4             # Page picked in the overview grid
+    board._sync_canvas_with_page()
+    assert board.prev_draw_pt == (-1, -1) and board.stroke_interp.pts == []
+    board.update_canvas("draw", (200, 150))
+    board.update_canvas("move", (-1, -1))
+    assert np.count_nonzero(board.canvas.any(axis=-1)) < 100   # Only a dot at (200, 150)
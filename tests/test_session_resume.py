@@ -0,0 +1,87 @@
+# test_session_resume.py
+import cv2
+import numpy as np
+
+
+def test_solid_board_resumes_page_0(make_board):
+    board = make_board()
+    cv2.line(board.canvas, (20, 20), (200, 120), (255, 255, 255), 8)
+    board._ink_changed()
+    ink = np.count_nonzero(board.canvas)
+    board.close()
+
+    resumed = make_board()
+    assert np.count_nonzero(resumed.canvas) == ink
+    assert resumed.page_canvases[0] is resumed.canvas
+
+
+def test_resumed_ink_survives_the_next_stroke(make_board):
+    board = make_board()
+    cv2.line(board.canvas, (20, 20), (200, 120), (255, 255, 255), 8)
+    board._ink_changed()
+    board.close()
+
+    resumed = make_board()
+    cv2.circle(resumed.canvas, (280, 150), 10, (0, 0, 255), -1)
+    resumed._ink_changed()
+    resumed.close()
+
+    again = make_board()
+    assert again.canvas[70, 110].tolist() == [255, 255, 255]   # First session's line
+    assert again.canvas[150, 280].tolist() == [0, 0, 255]      # Second session's dot
+
+
+def test_unvisited_saved_pages_are_in_the_session_snapshot(make_board):
+    board = make_board()
+    page = np.zeros_like(board.canvas)
+    cv2.circle(page, (100, 100), 20, (0, 255, 0), -1)
+    board.page_canvases[3] = page
+    board.session.mark_dirty(3)
+    board.close()
+
+    resumed = make_board()
+    pages = resumed.session.snapshot()
+    assert pages.indices() == [3]
+    canvas, _ = pages.load(3)
+    assert canvas[100, 100].tolist() == [0, 255, 0]
+    assert 3 not in resumed.page_canvases           # Read for the snapshot, not restored
+
+
+def test_scrubbing_a_video_keeps_only_pages_with_ink(make_board):
+    board = make_board()
+    board.background_path = "lecture.mp4"
+    board.bg_manager.mode = "video"
+
+    board.bg_manager.page_index = 5             # Paused frame 4: drawn on
+    board._sync_canvas_with_page()
+    cv2.circle(board.canvas, (100, 100), 20, (0, 255, 0), -1)
+    board._ink_changed()
+    for key in range(6, 40):                    # Stepping through frames without drawing
+        board.bg_manager.page_index = key
+        board._sync_canvas_with_page()
+
+    assert set(board.page_canvases) == {5, 39}
+    board.bg_manager.page_index = 5
+    board._sync_canvas_with_page()
+    assert board.canvas[100, 100].tolist() == [0, 255, 0]
+
+
+def test_page_erased_blank_is_not_restored(make_board):
+    board = make_board()
+    board.background_path = "lecture.mp4"
+    board.bg_manager.mode = "video"
+    board.bg_manager.page_index = 2
+    board._sync_canvas_with_page()
+    cv2.circle(board.canvas, (100, 100), 20, (0, 255, 0), -1)
+    board._ink_changed()
+    board.session.flush()
+
+    board.clear_canvas()
+    board.bg_manager.page_index = 3             # Left blank: dropped before the next autosave
+    board._sync_canvas_with_page()
+    assert 2 not in board.page_canvases
+    board.session.flush()
+
+    board.bg_manager.page_index = 2
+    board._sync_canvas_with_page()
+    assert not board.canvas.any()
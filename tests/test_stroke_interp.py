@@ -0,0 +1,87 @@
+# test_stroke_interp.py
+import numpy as np
+
+from module.stroke_interp import StrokeInterpolator
+
+A, B, C, D = (0, 0), (40, 10), (80, 40), (120, 30)
+
+
+def test_segments_run_between_tracked_points():
+    interp = StrokeInterpolator(samples_per_segment=8)
+    assert interp.add_point(A) == [A]           # Start of stroke: a dot
+    assert interp.add_point(A) == []            # Same point again: nothing new
+    assert interp.add_point(B) == []            # Tangent at B needs the next point
+
+    ab = interp.add_point(C)
+    assert len(ab) == 9 and ab[0] == A and ab[-1] == B
+    bc = interp.add_point(D)
+    assert bc[0] == B and bc[-1] == C
+
+    cd = interp.finish()
+    assert cd[0] == C and cd[-1] == D
+    assert interp.pts == [] and interp.finish() == []
+
+
+def test_collinear_points_give_a_straight_segment():
+    interp = StrokeInterpolator()
+    for x in (0, 30, 60, 90):
+        seg = interp.add_point((x, 50))
+    assert seg[0] == (30, 50) and seg[-1] == (60, 50)
+    assert all(y == 50 for _, y in seg)
+    assert [x for x, _ in seg] == sorted(x for x, _ in seg)
+
+
+def test_tail_extrapolates_the_last_step():
+    interp = StrokeInterpolator()
+    assert interp.tail(0.5) == []
+    interp.add_point((10, 10))
+    assert interp.tail(0.5) == [(10, 10)]
+    interp.add_point((30, 20))
+    assert interp.tail(0.0) == [(10, 10), (30, 20), (30, 20)]
+    assert interp.tail(0.5) == [(10, 10), (30, 20), (40, 25)]
+    assert interp.tail(1.0)[-1] == (50, 30)
+
+
+def test_reset_starts_a_new_stroke():
+    interp = StrokeInterpolator()
+    for pt in (A, B, C):
+        interp.add_point(pt)
+    interp.reset()
+    assert interp.tail(0.5) == []
+    assert interp.finish() == []
+    assert interp.add_point(D) == [D]           # A dot, not a segment joined to C
+
+
+class _ScriptedHands:
+    """Draws along y=90, one step of 30 px per inference"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_gesture(self, frame, rgb=None):
+        self.calls += 1
+        return "draw", (20 + 30 * (self.calls - 1), 90), frame
+
+    def close(self):
+        pass
+
+
+def test_half_rate_smooth_ink(make_board):
+    board = make_board()
+    board.hand_tracker = hands = _ScriptedHands()
+    board.smooth_ink = True
+    frame = np.zeros((180, 320, 3), np.uint8)
+
+    outputs = [board.update(frame, True, False)[0] for _ in range(9)]
+    assert hands.calls == 4                     # Hand tracking on every second frame
+
+    # Tracked up to x=110, committed to the canvas up to x=80. The frame after the last
+    # inference shows the rest of the stroke plus the extrapolated tail (alpha 0.5 -> x=125)
+    assert board.canvas[90, 20:81].all(axis=-1).all()
+    assert not board.canvas[90, 95:].any()
+    assert outputs[-1][90, 20:121].all(axis=-1).all()
+
+    board.update_canvas("move", (-1, -1))       # Stroke ends: the last segment is committed
+    assert board.canvas[90, 20:111].all(axis=-1).all()
+    assert not board.canvas[90, 120:].any()
+    assert board.stroke_interp.pts == []